@@ -59,6 +59,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "inventory.timing.ServerTimingMiddleware",
+    "inventory.replicas.WriteForwardingMiddleware",
+    "inventory.replicas.ReplicaMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
@@ -81,7 +84,7 @@ ROOT_URLCONF = "film.urls"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "BACKEND": "inventory.timing.TimedDjangoTemplates",
         "DIRS": [],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -97,13 +100,80 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "film.wsgi.application"
 
+# The share of requests (0 to 1) to time for the innards' timings page, and
+# whether everyone's timed responses get a Server-Timing header rather than
+# only staff's.
+SERVER_TIMING_SAMPLE_RATE = env.float(
+    "SERVER_TIMING_SAMPLE_RATE", default=1.0 if DEBUG else 0.05
+)
+SERVER_TIMING_PUBLIC = env.bool("SERVER_TIMING_PUBLIC", default=False)
+
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
 DATABASES = {
-    "default": env.dj_db_url("DATABASE_URL", default="sqlite:///db.sqlite3"),
+    "default": env.dj_db_url(
+        "DATABASE_URL",
+        default="sqlite:///db.sqlite3",
+        conn_max_age=env.int("CONN_MAX_AGE", default=600),
+        conn_health_checks=True,
+    ),
 }
+# "primary" or "replica", which only reads from a copy of the primary's
+# database. See inventory/replicas.py.
+DATABASE_ROLE = env("DATABASE_ROLE", default="primary")
+if DATABASE_ROLE == "replica":
+    DATABASES["default"]["OPTIONS"] = {"read_only": True}
+if env("REPLICA_DATABASE_URL", default=""):
+    DATABASES["replica"] = env.dj_db_url(
+        "REPLICA_DATABASE_URL",
+        conn_max_age=env.int("CONN_MAX_AGE", default=600),
+        conn_health_checks=True,
+    )
+    DATABASES["replica"]["OPTIONS"] = {"read_only": True}
+    DATABASES["replica"]["TEST"] = {"MIRROR": "default"}
+# Pragmas and immediate write transactions. See inventory/sqlite/.
+for database in DATABASES.values():
+    if database["ENGINE"] == "django.db.backends.sqlite3":
+        database["ENGINE"] = "inventory.sqlite"
+DATABASE_ROUTERS = ["inventory.replicas.ReplicaRouter"]
+# After someone changes something, their reads aren't from a replica until it
+# has caught up, or for this long at most (if it's stopped following).
+REPLICA_PIN_SECONDS = env.int("REPLICA_PIN_SECONDS", default=300)
+# How a replica sends requests that write to the primary: a response with this
+# header, which Fly's proxy replays there, or (if it's blank) a redirect to
+# PRIMARY_URL. Fly sets PRIMARY_REGION from fly.toml.
+REPLAY_HEADER = env("REPLAY_HEADER", default="fly-replay")
+PRIMARY_REPLAY = env(
+    "PRIMARY_REPLAY", default=f"region={env('PRIMARY_REGION', default='')}"
+)
+PRIMARY_URL = env("PRIMARY_URL", default="")
+
+# Each process keeps recent entries in memory in front of a SQLite file they
+# all share, next to (but apart from) the database. See inventory/cache.py.
+CACHES = {
+    "default": {
+        "BACKEND": "inventory.cache.TwoTierCache",
+        "LOCATION": env(
+            "CACHE_PATH",
+            default=str(env.path("DB_DIR", default=BASE_DIR) / "cache.sqlite"),
+        ),
+        "OPTIONS": {
+            "MAX_ENTRIES": 5000,
+            "LOCAL_MAX_ENTRIES": 500,
+        },
+    }
+}
+
+# Where `manage.py run_jobs` keeps uploaded imports and finished exports.
+JOBS_DIR = env.path("JOBS_DIR", default=env.path("DB_DIR", default=BASE_DIR) / "jobs")
+
+AUTHENTICATION_BACKENDS = [
+    "inventory.backends.ProfileBackend",
+    # Only so sessions from before ProfileBackend still work.
+    "django.contrib.auth.backends.ModelBackend",
+]
 
 # Password validation
 # https://docs.djangoproject.com/en/2.0/ref/settings/#auth-password-validators
@@ -189,6 +259,11 @@ BLEACH_ALLOWED_TAGS = bleach.sanitizer.ALLOWED_TAGS.extend(["p", "hr"])
 
 MAINTENANCE_MODE = env.bool("MAINTENANCE_MODE", default=False)
 
+# Fly sets this to the image being run, so it changes with every deploy. Pages
+# browsers have kept (see inventory/versions.py) don't outlive the templates
+# and assets they were made with.
+RELEASE = env("FLY_IMAGE_REF", default="")
+
 # django-registration
 ACCOUNT_ACTIVATION_DAYS = 2
 
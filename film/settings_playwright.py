@@ -1,4 +1,14 @@
 # flake8: noqa
+import os
+import tempfile
 from .settings import *
 
 INSTALLED_APPS.remove("django.contrib.staticfiles")
+
+# Keep the tests' cache and jobs away from the development ones, and from
+# each other's when pytest-xdist runs them in several processes at once.
+worker = os.environ.get("PYTEST_XDIST_WORKER", "main")
+CACHES["default"]["LOCATION"] = os.path.join(
+    tempfile.gettempdir(), f"cassettenest-test-cache-{worker}.sqlite"
+)
+JOBS_DIR = os.path.join(tempfile.gettempdir(), f"cassettenest-test-jobs-{worker}")
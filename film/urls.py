@@ -5,6 +5,7 @@ from django.contrib.staticfiles.storage import staticfiles_storage
 from django.views.generic.base import RedirectView, TemplateView
 from django.conf import settings
 from inventory import views
+from inventory.replicas import primary_only
 
 admin.site.site_header = "Cassette Nest Admin"
 admin.site.site_title = "Cassette Nest Admin"
@@ -12,6 +13,8 @@ admin.site.index_title = "Cassette Nest’s innards"
 
 urlpatterns = [
     # Users
+    path("innards/cache/", views.cache_stats, name="cache-stats"),
+    path("innards/timings/", views.request_timings, name="request-timings"),
     path("innards/", admin.site.urls),
     path("marketing-site", views.marketing_site, name="marketing-site"),
     # PWA goodies
@@ -55,6 +58,12 @@ urlpatterns = [
         name="account-verified",
     ),
     path("accounts/", include("django_registration.backends.activation.urls")),
+    # It keeps the token in the session when it's opened.
+    path(
+        "accounts/reset/<uidb64>/<token>/",
+        primary_only(auth_views.PasswordResetConfirmView.as_view()),
+        name="password_reset_confirm",
+    ),
     path("accounts/", include("django.contrib.auth.urls")),
     # Static pages
     path("patterns", views.patterns, name="patterns"),
@@ -174,6 +183,7 @@ urlpatterns = [
     path("export/projects", views.ExportProjectsView.as_view(), name="export-projects"),
     path("export/journals", views.ExportJournalsView.as_view(), name="export-journals"),
     path("export/frames", views.ExportFramesView.as_view(), name="export-frames"),
+    path("export/account", views.ExportAccountView.as_view(), name="export-account"),
     # Import
     path("import/cameras", views.ImportCamerasView.as_view(), name="import-cameras"),
     path(
@@ -185,6 +195,10 @@ urlpatterns = [
     path("import/projects", views.ImportProjectsView.as_view(), name="import-projects"),
     path("import/journals", views.ImportJournalsView.as_view(), name="import-journals"),
     path("import/frames", views.ImportFramesView.as_view(), name="import-frames"),
+    path("import/account", views.RestoreAccountView.as_view(), name="import-account"),
+    # Background imports and exports
+    path("jobs/", views.jobs, name="jobs"),
+    path("jobs/<int:pk>/download", views.job_download, name="job-download"),
     # Ko-fi
     path("kofi-webhooks", views.kofi_webhooks, name="kofi-webhooks"),
     # Session Goodies
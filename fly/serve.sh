@@ -0,0 +1,9 @@
+#!/usr/bin/env bash
+
+# Litestream only runs one command, so start the background job worker here
+# before handing over to the web server. Replicas can't write, so they don't.
+if [[ "${DATABASE_ROLE:-primary}" != "replica" ]]; then
+    ./manage.py run_jobs &
+fi
+
+exec gunicorn --bind :8000 --workers 2 film.wsgi
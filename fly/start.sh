@@ -32,6 +32,15 @@ fi
 
 mkdir -p "$DB_DIR"
 
+# A replica only reads from a copy of the primary's database that it keeps up
+# to date itself. It must never replicate, migrate or run jobs.
+if [[ "${DATABASE_ROLE:-primary}" == "replica" ]]; then
+    ./manage.py follow_replica --once "$S3_DB_URL"
+    ./manage.py collectstatic --noinput
+    ./manage.py follow_replica "$S3_DB_URL" &
+    exec /code/fly/serve.sh
+fi
+
 litestream restore -if-db-not-exists -if-replica-exists -o "$DB_DIR/db.sqlite" "$S3_DB_URL"
 
 ./manage.py collectstatic --noinput
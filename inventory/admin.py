@@ -13,6 +13,7 @@ from .models import (
     Project,
     Roll,
     Frame,
+    Job,
 )
 from .forms import FilmForm
 
@@ -251,6 +252,19 @@ class FrameAdmin(admin.ModelAdmin):
     )
 
 
+class JobAdmin(admin.ModelAdmin):
+    list_filter = ("status", "action")
+    list_display = (
+        "__str__",
+        "status",
+        "done",
+        "total",
+        "created_at",
+        "finished_at",
+    )
+    raw_id_fields = ("owner",)
+
+
 admin.site.register(Stock, StockAdmin)
 admin.site.register(Film, FilmAdmin)
 admin.site.register(Roll, RollAdmin)
@@ -260,6 +274,7 @@ admin.site.register(CameraBack, CameraBackAdmin)
 admin.site.register(Project, ProjectAdmin)
 admin.site.register(Journal, JournalAdmin)
 admin.site.register(Frame, FrameAdmin)
+admin.site.register(Job, JobAdmin)
 
 # Customize the default User admin.
 admin.site.unregister(User)
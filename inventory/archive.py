@@ -0,0 +1,297 @@
+"""
+Someone's whole account in one file, to move, back up or copy it.
+
+An archive is a ZIP with a JSON Lines file for each kind of thing (every
+field but the owner, keeping the original ids) and a manifest. It's written
+inside one (read-only) transaction so it's a consistent snapshot, to a file
+so it never all has to be in memory. Downloads are written to a temporary
+file first, so the snapshot isn't held open for as long as a slow download
+takes (which would keep the WAL from being checkpointed).
+
+Restoring adds everything to an account that doesn't have anything of its
+own yet, in one transaction, with new ids. References between the rows are
+mapped to the new ids as they're inserted, and films are found again by
+their stock and format rather than their ids, so an archive can be restored
+to another copy of the site.
+"""
+
+import datetime
+import io
+import json
+import tempfile
+import zipfile
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from .exports import chunk_size
+from .imports import batch_size, create_keeping_timestamps, imports
+from .models import (
+    Camera,
+    CameraBack,
+    Film,
+    Frame,
+    Journal,
+    Project,
+    Roll,
+    RollCodeSequence,
+)
+from .sqlite import read_transaction
+from .utils import batched, pluralize
+
+format_version = 1
+
+# In the order they have to be restored: name, model, how to find someone's
+# own, and which columns refer to rows in which of the other tables.
+tables = [
+    ("cameras", Camera, "owner_id", {}),
+    ("camera-backs", CameraBack, "camera__owner_id", {"camera_id": "cameras"}),
+    ("projects", Project, "owner_id", {}),
+    (
+        "project-cameras",
+        Project.cameras.through,
+        "project__owner_id",
+        {"project_id": "projects", "camera_id": "cameras"},
+    ),
+    (
+        "rolls",
+        Roll,
+        "owner_id",
+        {
+            "film_id": "films",
+            "camera_id": "cameras",
+            "camera_back_id": "camera-backs",
+            "project_id": "projects",
+        },
+    ),
+    ("journals", Journal, "roll__owner_id", {"roll_id": "rolls"}),
+    ("frames", Frame, "roll__owner_id", {"roll_id": "rolls"}),
+]
+
+# What films are found again by.
+film_fields = ["id", "stock__slug", "format", "slug"]
+
+
+class RestoreError(Exception):
+    "An archive that can't be restored, with why."
+
+
+class Encoder(DjangoJSONEncoder):
+    "Keeps the microseconds DjangoJSONEncoder rounds off."
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def columns(model):
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+def line(values):
+    return (json.dumps(values, cls=Encoder) + "\n").encode()
+
+
+def write_archive(owner, out):
+    """
+    Write `owner`'s archive to `out`, yielding how many rows are in it so far
+    every so often so whatever's been written can be passed on.
+    """
+
+    written = 0
+    counts = {}
+    film_ids = set()
+
+    with (
+        read_transaction(),
+        zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as archive,
+    ):
+        for name, model, owner_path, remap in tables:
+            counts[name] = 0
+            rows = (
+                model.objects.filter(**{owner_path: owner.pk})
+                .order_by("pk")
+                .values(*(column for column in columns(model) if column != "owner_id"))
+            )
+            with archive.open(f"{name}.jsonl", "w") as file:
+                for values in rows.iterator(chunk_size=chunk_size):
+                    file.write(line(values))
+                    if "film_id" in remap:
+                        film_ids.add(values["film_id"])
+                    counts[name] += 1
+                    written += 1
+                    if written % chunk_size == 0:
+                        yield written
+
+        with archive.open("films.jsonl", "w") as file:
+            for pks in batched(film_ids):
+                for values in Film.objects.filter(pk__in=pks).values(*film_fields):
+                    file.write(line(values))
+
+        manifest = {
+            "format": format_version,
+            "exported_at": timezone.now(),
+            "username": owner.username,
+            "counts": counts,
+        }
+        archive.writestr("manifest.json", json.dumps(manifest, cls=Encoder))
+
+    yield written
+
+
+def archive_file(owner):
+    "The archive in a temporary file, to be sent once it's all written."
+
+    file = tempfile.TemporaryFile()
+    for written in write_archive(owner, file):
+        pass
+    file.seek(0)
+    return file
+
+
+def read_lines(archive, name):
+    try:
+        with archive.open(f"{name}.jsonl") as file:
+            for text in io.TextIOWrapper(file, encoding="utf-8"):
+                yield json.loads(text)
+    except KeyError:
+        raise RestoreError(f"The archive doesn’t have any {name.replace('-', ' ')}.")
+
+
+def find_films(archive):
+    "Map the archive's film ids to the ids of the same films here."
+
+    films = list(read_lines(archive, "films"))
+    by_stock = {}
+    by_slug = {}
+    for values in Film.objects.values(*film_fields):
+        if values["stock__slug"]:
+            by_stock[(values["stock__slug"], values["format"])] = values["id"]
+        elif values["slug"]:
+            by_slug[values["slug"]] = values["id"]
+
+    ids = {}
+    missing = []
+    for values in films:
+        if values["stock__slug"]:
+            pk = by_stock.get((values["stock__slug"], values["format"]))
+        else:
+            pk = by_slug.get(values["slug"])
+        if pk is None:
+            missing.append(values["stock__slug"] or values["slug"])
+        ids[values["id"]] = pk
+
+    if missing:
+        raise RestoreError(
+            f"Some of the films aren’t here: {', '.join(sorted(missing))}."
+        )
+
+    return ids
+
+
+def build(model, fields, values, remap, ids, owner):
+    kwargs = {}
+    for column, field in fields.items():
+        if column not in values:
+            continue
+        value = values[column]
+        if column in remap and value is not None:
+            try:
+                value = ids[remap[column]][value]
+            except KeyError:
+                raise RestoreError(
+                    f"{column} {value} isn’t in the archive’s {remap[column]}."
+                )
+        kwargs[column] = field.to_python(value)
+    if "owner_id" in fields:
+        kwargs["owner_id"] = owner.pk
+
+    return model(**kwargs)
+
+
+def count(owner):
+    "How many rows someone's archive will have."
+
+    return sum(
+        model.objects.filter(**{owner_path: owner.pk}).count()
+        for name, model, owner_path, remap in tables
+    )
+
+
+def owns_anything(owner):
+    return any(
+        model.objects.filter(**{owner_path: owner.pk}).exists()
+        for name, model, owner_path, remap in tables
+    )
+
+
+def restore(owner, file):
+    """
+    Add everything in an archive to `owner`'s account, all of it or (raising
+    RestoreError) none of it, and return how many of each there were.
+    """
+
+    try:
+        archive = zipfile.ZipFile(file)
+    except zipfile.BadZipFile:
+        raise RestoreError("That isn’t an account archive.")
+
+    with archive:
+        try:
+            manifest = json.loads(archive.read("manifest.json"))
+        except (KeyError, ValueError):
+            raise RestoreError("That isn’t an account archive.")
+        if manifest.get("format") != format_version:
+            raise RestoreError("That archive is from a newer version of the site.")
+        if owns_anything(owner):
+            raise RestoreError(
+                "Archives can only be restored to accounts that don’t have "
+                "anything in them yet."
+            )
+
+        counts = {}
+        ids = {"films": find_films(archive)}
+
+        try:
+            with transaction.atomic():
+                for name, model, owner_path, remap in tables:
+                    counts[name] = 0
+                    ids[name] = {}
+                    fields = {
+                        column: model._meta.get_field(column)
+                        for column in columns(model)
+                        if column != "id"
+                    }
+                    for batch in batched(read_lines(archive, name), batch_size):
+                        objs = [
+                            build(model, fields, values, remap, ids, owner)
+                            for values in batch
+                        ]
+                        if hasattr(model, "created_at"):
+                            create_keeping_timestamps(model, objs)
+                        else:
+                            model.objects.bulk_create(objs)
+                        ids[name].update(
+                            (values["id"], obj.pk) for values, obj in zip(batch, objs)
+                        )
+                        counts[name] += len(objs)
+
+                # Don't hand out codes the restored rolls already have.
+                if counts["rolls"]:
+                    RollCodeSequence.objects.rebuild(owner)
+        except (IntegrityError, ValidationError, ValueError) as error:
+            raise RestoreError(f"The archive couldn’t be restored: {error}")
+
+    return counts
+
+
+def summary(counts):
+    "Restored 2 cameras, 0 camera backs, …"
+
+    restored = [
+        f"{count} {pluralize(imports[name].noun, count)}"
+        for name, count in counts.items()
+        if name in imports
+    ]
+    return f"Restored {', '.join(restored)}."
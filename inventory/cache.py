@@ -0,0 +1,520 @@
+"""
+A cache backend for running several gunicorn workers on one machine.
+
+Each process keeps a small LRU of recently used entries in memory in front of
+a SQLite file every process shares. The file is kept apart from the main
+database so caching never waits on (or holds up) the lock for user writes.
+
+Writes that replace or remove an entry another process could have read bump
+a generation counter in the shared file, and log which keys they changed
+under the new generation. (Adding a new key doesn't, since nobody can have
+it yet.) Each process rereads the counter at the start of each request, and
+at most every `GENERATION_CHECK` seconds otherwise. If it has moved on, the
+process drops just the logged keys from memory. So a write in one worker is
+seen by the others from their next request on, without them losing the rest
+of what they have.
+
+Each process also counts its hits and misses and every so often writes them
+to the shared file, where `TwoTierCache.stats()` reads them all back.
+"""
+
+import contextlib
+import datetime
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.signals import request_started
+
+schema = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires REAL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires);
+CREATE TABLE IF NOT EXISTS generation (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO generation VALUES (0, 0);
+-- The keys each generation changed, or NULL for all of them.
+CREATE TABLE IF NOT EXISTS changes (
+    generation INTEGER NOT NULL,
+    key TEXT
+);
+CREATE INDEX IF NOT EXISTS changes_generation ON changes (generation);
+-- How many entries there are, kept up to date so culling doesn't count them.
+CREATE TABLE IF NOT EXISTS size (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    entries INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO size VALUES (0, (SELECT COUNT(*) FROM cache));
+CREATE TABLE IF NOT EXISTS stats (
+    pid INTEGER PRIMARY KEY,
+    started REAL NOT NULL,
+    updated REAL NOT NULL,
+    local_hits INTEGER NOT NULL,
+    shared_hits INTEGER NOT NULL,
+    misses INTEGER NOT NULL,
+    writes INTEGER NOT NULL
+);
+"""
+
+# Forget the stats of processes that haven't written any for this long.
+stats_lifetime = 60 * 60 * 24
+
+# How many generations of changes to keep. A process further behind than this
+# drops everything it has.
+changes_kept = 10000
+
+
+class CacheStats(NamedTuple):
+    pid: int
+    started: float
+    updated: float
+    local_hits: int
+    shared_hits: int
+    misses: int
+    writes: int
+
+    @classmethod
+    def total(cls, processes):
+        "Every process's counts added together."
+
+        return cls(
+            None,
+            min(process.started for process in processes),
+            max(process.updated for process in processes),
+            *(sum(column) for column in list(zip(*processes))[3:]),
+        )
+
+    @property
+    def started_at(self):
+        return datetime.datetime.fromtimestamp(self.started, datetime.timezone.utc)
+
+    @property
+    def updated_at(self):
+        return datetime.datetime.fromtimestamp(self.updated, datetime.timezone.utc)
+
+    @property
+    def hits(self):
+        return self.local_hits + self.shared_hits
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else None
+
+    @property
+    def local_hit_rate(self):
+        "How many hits never had to leave the process."
+
+        return self.local_hits / self.hits if self.hits else None
+
+
+class LocalTier:
+    "The in-memory half of the cache, shared by every thread in a process."
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # key: (pickled value, expires)
+        self.lock = threading.Lock()
+        self.pid = os.getpid()
+        # The newest generation whose changes have been dropped from entries.
+        self.generation = None
+        self.checked_at = float("-inf")
+        self.started = time.time()
+        self.flushed_at = time.monotonic()
+        self.counts = dict.fromkeys(
+            ("local_hits", "shared_hits", "misses", "writes"), 0
+        )
+
+    def get(self, key, now):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+
+            value, expires = entry
+            if expires <= now:
+                del self.entries[key]
+                return None
+
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, expires, generation):
+        """
+        Keep a value that was current as of `generation`, unless changes since
+        then (which might include this key's) have already been dropped.
+        """
+
+        with self.lock:
+            if self.generation is not None and generation < self.generation:
+                return
+
+            self.entries[key] = (value, expires)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, keys):
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def catch_up(self, generation, changes):
+        """
+        Drop whatever's changed since our generation. `changes` are the
+        (generation, key) rows logged after it.
+        """
+
+        with self.lock:
+            if self.generation is None or generation == self.generation:
+                self.generation = generation
+                return
+
+            changed = {key for changed_in, key in changes}
+            oldest = min((changed_in for changed_in, key in changes), default=None)
+            # Anything else means the log's been trimmed (or the file's been
+            # replaced) since we last looked.
+            if oldest != self.generation + 1 or None in changed:
+                self.entries.clear()
+            else:
+                for key in changed:
+                    self.entries.pop(key, None)
+            self.generation = generation
+
+    def wrote(self, generation):
+        """
+        Note a generation of our own. If it's the next one, there's nothing
+        else to catch up on, and our own entries are already up to date.
+        """
+
+        with self.lock:
+            if self.generation is not None and generation == self.generation + 1:
+                self.generation = generation
+
+    def count(self, name):
+        self.counts[name] += 1
+
+
+# One local tier per location per process, whichever thread asks.
+local_tiers = {}
+local_tiers_lock = threading.Lock()
+
+
+def recheck_generations(**kwargs):
+    for tier in local_tiers.values():
+        tier.checked_at = float("-inf")
+
+
+request_started.connect(recheck_generations)
+
+
+class TwoTierCache(BaseCache):
+    """
+    LOCATION is the path to the shared SQLite file. OPTIONS can also have:
+
+    - LOCAL_MAX_ENTRIES: how many entries each process keeps in memory
+    - LOCAL_TIMEOUT: how many seconds an entry stays in memory at most
+    - GENERATION_CHECK: how many seconds to go between rereading the
+      generation outside the start of a request
+    - STATS_INTERVAL: how many seconds to go between writing the stats
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self.location = location
+        self.local_max_entries = int(options.get("LOCAL_MAX_ENTRIES", 500))
+        self.local_timeout = options.get("LOCAL_TIMEOUT", 60)
+        self.generation_check = options.get("GENERATION_CHECK", 1)
+        self.stats_interval = options.get("STATS_INTERVAL", 10)
+        self._db = None
+
+    @property
+    def db(self):
+        # Connect lazily, and again in a forked child.
+        if self._db is None or self._db_pid != os.getpid():
+            db = sqlite3.connect(
+                self.location,
+                timeout=10,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            db.execute("PRAGMA journal_mode = WAL")
+            db.execute("PRAGMA synchronous = NORMAL")
+            db.executescript(schema)
+            self._db, self._db_pid = db, os.getpid()
+
+        return self._db
+
+    @property
+    def tier(self):
+        tier = local_tiers.get(self.location)
+        if tier is None or tier.pid != os.getpid():
+            with local_tiers_lock:
+                tier = local_tiers.get(self.location)
+                if tier is None or tier.pid != os.getpid():
+                    tier = local_tiers[self.location] = LocalTier(
+                        self.local_max_entries
+                    )
+
+        return tier
+
+    def generation(self):
+        tier = self.tier
+        now = time.monotonic()
+        if tier.generation is None or now - tier.checked_at >= self.generation_check:
+            (generation,) = self.db.execute("SELECT value FROM generation").fetchone()
+            changes = []
+            if tier.generation is not None and generation != tier.generation:
+                changes = self.db.execute(
+                    "SELECT generation, key FROM changes "
+                    "WHERE generation > ? AND generation <= ?",
+                    (tier.generation, generation),
+                ).fetchall()
+            tier.catch_up(generation, changes)
+            tier.checked_at = now
+
+        return tier.generation
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        # Know where we are first, so our own writes can keep up with it.
+        self.generation()
+        db = self.db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def _changed(self, db, keys):
+        """
+        Log that these keys (None for all of them) have changed, in a new
+        generation, and return the generation the file's now at.
+        """
+
+        if keys:
+            db.execute("UPDATE generation SET value = value + 1")
+        (generation,) = db.execute("SELECT value FROM generation").fetchone()
+        if keys:
+            db.executemany(
+                "INSERT INTO changes VALUES (?, ?)", [(generation, key) for key in keys]
+            )
+            db.execute(
+                "DELETE FROM changes WHERE generation <= ?",
+                (generation - changes_kept,),
+            )
+
+        return generation
+
+    def _resize(self, db, by):
+        (entries,) = db.execute(
+            "UPDATE size SET entries = max(entries + ?, 0) RETURNING entries", (by,)
+        ).fetchone()
+        return entries
+
+    def _wrote(self, generation, keys):
+        tier = self.tier
+        if keys:
+            tier.wrote(generation)
+        tier.count("writes")
+        self._maybe_flush_stats()
+
+    def _cull(self, db, now):
+        "Make some room, returning the keys of live entries it deleted."
+
+        expired = db.execute("DELETE FROM cache WHERE expires <= ?", (now,)).rowcount
+        entries = self._resize(db, -expired)
+        if entries <= self._max_entries or not self._cull_frequency:
+            return []
+
+        # Whatever is closest to expiring anyway (forever sorts last).
+        culled = [
+            key
+            for (key,) in db.execute(
+                "DELETE FROM cache WHERE key IN ("
+                "SELECT key FROM cache ORDER BY expires IS NULL, expires LIMIT ?) "
+                "RETURNING key",
+                (entries // self._cull_frequency,),
+            ).fetchall()
+        ]
+        self._resize(db, -len(culled))
+        return culled
+
+    def _local_expires(self, expires, now):
+        local_expires = now + self.local_timeout
+        return local_expires if expires is None else min(expires, local_expires)
+
+    def _get(self, key):
+        "The pickled value for a key, or None."
+
+        tier = self.tier
+        generation = self.generation()
+        now = time.time()
+
+        value = tier.get(key, now)
+        if value is not None:
+            tier.count("local_hits")
+        else:
+            row = self.db.execute(
+                "SELECT value, expires FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (row[1] is not None and row[1] <= now):
+                tier.count("misses")
+            else:
+                value, expires = row
+                # Read under the generation from before the query, so a write
+                # that sneaks in between still makes this entry stale.
+                tier.set(key, value, self._local_expires(expires, now), generation)
+                tier.count("shared_hits")
+
+        self._maybe_flush_stats()
+        return value
+
+    def _store(self, key, value, timeout, only_new=False):
+        expires = self.get_backend_timeout(timeout)
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+
+        with self._transaction() as db:
+            row = db.execute(
+                "SELECT expires FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            # Only an entry that hasn't expired could be in anyone's memory.
+            live = row is not None and (row[0] is None or row[0] > now)
+            if only_new and live:
+                return False
+
+            db.execute(
+                "INSERT INTO cache (key, value, expires) VALUES (?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE "
+                "SET value = excluded.value, expires = excluded.expires",
+                (key, pickled, expires),
+            )
+            changed = [key] if live else []
+            if row is None and self._resize(db, 1) > self._max_entries:
+                changed += self._cull(db, now)
+            generation = self._changed(db, changed)
+
+        self._wrote(generation, changed)
+        self.tier.set(key, pickled, self._local_expires(expires, now), generation)
+        return True
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        value = self._get(key)
+        return default if value is None else pickle.loads(value)
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._get(key) is not None
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._store(key, value, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._store(key, value, timeout, only_new=True)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._transaction() as db:
+            changed = db.execute(
+                "UPDATE cache SET expires = ? "
+                "WHERE key = ? AND (expires IS NULL OR expires > ?)",
+                (self.get_backend_timeout(timeout), key, time.time()),
+            ).rowcount
+            # Others might have it for longer than it now has left.
+            generation = self._changed(db, [key] if changed else [])
+
+        self.tier.delete([key])
+        if changed:
+            self._wrote(generation, [key])
+        return bool(changed)
+
+    def delete(self, key, version=None):
+        return self.delete_many([key], version=version)
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_and_validate_key(key, version=version) for key in keys]
+        if not keys:
+            return False
+
+        with self._transaction() as db:
+            deleted = [
+                key
+                for key in keys
+                if db.execute("DELETE FROM cache WHERE key = ?", (key,)).rowcount
+            ]
+            if deleted:
+                self._resize(db, -len(deleted))
+            generation = self._changed(db, deleted)
+
+        self.tier.delete(keys)
+        if deleted:
+            self._wrote(generation, deleted)
+        return bool(deleted)
+
+    def clear(self):
+        with self._transaction() as db:
+            db.execute("DELETE FROM cache")
+            db.execute("UPDATE size SET entries = 0")
+            generation = self._changed(db, [None])
+
+        self.tier.clear()
+        self._wrote(generation, [None])
+
+    def _maybe_flush_stats(self):
+        if time.monotonic() - self.tier.flushed_at >= self.stats_interval:
+            self.flush_stats()
+
+    def flush_stats(self):
+        "Write this process's counts to the shared file."
+
+        tier = self.tier
+        now = time.time()
+        tier.flushed_at = time.monotonic()
+        self.db.execute(
+            "INSERT OR REPLACE INTO stats VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                tier.pid,
+                tier.started,
+                now,
+                tier.counts["local_hits"],
+                tier.counts["shared_hits"],
+                tier.counts["misses"],
+                tier.counts["writes"],
+            ),
+        )
+        self.db.execute("DELETE FROM stats WHERE updated < ?", (now - stats_lifetime,))
+
+    def stats(self):
+        "The counts of every process that's used the cache lately, newest first."
+
+        self.flush_stats()
+        return [
+            CacheStats(*row)
+            for row in self.db.execute("SELECT * FROM stats ORDER BY updated DESC")
+        ]
+
+    def size(self):
+        "How many entries there are in the shared file and in this process."
+
+        (shared,) = self.db.execute("SELECT COUNT(*) FROM cache").fetchone()
+        return shared, len(self.tier.entries)
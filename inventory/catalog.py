@@ -0,0 +1,79 @@
+"""
+Caching for the public film stock catalog (manufacturers, stocks and films).
+
+Every key includes the catalog's current version, and saving or deleting
+anything in the catalog sets a new version (see the receivers in models.py),
+so everything cached before then is simply never asked for again. On a
+replica, keys include the copy of the database it was read from too.
+"""
+
+import time
+from functools import wraps
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from .replicas import copy_version
+
+# The catalog itself only changes a few times a week, but stock pages also show
+# everyone's roll counts, so don't let those drift too far.
+timeout = 60 * 15
+
+version_key = "catalog-version"
+
+
+def catalog_version():
+    return cache.get_or_set(version_key, time.time_ns, None)
+
+
+def forget_catalog():
+    cache.set(version_key, time.time_ns(), None)
+
+
+def catalog_key(*parts):
+    return ":".join(
+        ["catalog", str(catalog_version()), str(copy_version()), *map(str, parts)]
+    )
+
+
+def cached(key, default):
+    "Get something out of the catalog cache, calling `default` for it if needed."
+
+    return cache.get_or_set(catalog_key(*key), default, timeout)
+
+
+def cache_for_anonymous(view):
+    """
+    Cache the whole response (page or HTMX fragment) of a catalog view for
+    people who aren't logged in.
+
+    Responses that set cookies, render a CSRF token or show messages are
+    particular to whoever asked, so they aren't cached.
+    """
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (
+            request.method != "GET"
+            or request.user.is_authenticated
+            or get_messages(request)
+        ):
+            return view(request, *args, **kwargs)
+
+        key = catalog_key(
+            "page", "htmx" if request.htmx else "full", request.get_full_path()
+        )
+        response = cache.get(key)
+        if response is not None:
+            return response
+
+        response = view(request, *args, **kwargs)
+        if (
+            response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and not request.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+        ):
+            cache.set(key, response, timeout)
+
+        return response
+
+    return wrapper
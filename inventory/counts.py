@@ -0,0 +1,238 @@
+from django.core.cache import cache
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce, ExtractYear
+from .models import Camera, Project, Roll, RollCounter
+from .utils import (
+    film_formats,
+    film_types,
+    logbook_facets_cache_key,
+    status_keys,
+    status_number,
+)
+
+# How each push/pull value is keyed in the ready table.
+push_pull_keys = {
+    "-2": "pull2",
+    "-1": "pull1",
+    "+1": "push1",
+    "+2": "push2",
+    "+3": "push3",
+}
+
+
+class DashboardSummary:
+    """
+    All the counts the dashboard needs for its tabs and onboarding checklist,
+    gathered with conditional aggregation rather than a query per tab.
+    """
+
+    def __init__(self, owner):
+        # Backs are joined onto their cameras, so count distinct rows.
+        cameras = Camera.objects.filter(owner=owner).aggregate(
+            total=Count("pk", distinct=True),
+            empty=Count(
+                "pk", filter=Q(status="empty", multiple_backs=False), distinct=True
+            ),
+            unavailable=Count("pk", filter=Q(status="unavailable"), distinct=True),
+            backs_empty=Count(
+                "camera_backs", filter=Q(camera_backs__status="empty"), distinct=True
+            ),
+        )
+        rolls = RollCounter.objects.filter(owner=owner).aggregate(
+            total=Coalesce(Sum("count"), 0),
+            loaded=Coalesce(Sum("count", filter=Q(status=status_number("loaded"))), 0),
+        )
+        projects = Project.objects.filter(owner=owner).aggregate(
+            current=Count("pk", filter=Q(status="current")),
+            archived=Count("pk", filter=Q(status="archived")),
+        )
+
+        self.cameras_total = cameras["total"]
+        self.cameras_empty = cameras["empty"]
+        self.camera_backs_empty = cameras["backs_empty"]
+        self.cameras_unavailable = cameras["unavailable"]
+        self.rolls_total = rolls["total"]
+        self.rolls_loaded = rolls["loaded"]
+        self.projects_current = projects["current"]
+        self.projects_archived = projects["archived"]
+
+    @property
+    def cameras_ready(self):
+        "Empty cameras (that don't take backs) plus empty backs."
+
+        return self.cameras_empty + self.camera_backs_empty
+
+    @property
+    def has_cameras(self):
+        return self.cameras_total > 0
+
+    @property
+    def has_rolls(self):
+        return self.rolls_total > 0
+
+    def initial_cameras_tab(self):
+        "Show a non-empty tab by default."
+
+        if self.cameras_ready and not self.rolls_loaded:
+            return 1
+        elif self.cameras_unavailable and not self.rolls_loaded:
+            return 2
+        return 0
+
+    def initial_projects_tab(self):
+        "Show a non-empty tab by default."
+
+        if not self.projects_current and self.projects_archived:
+            return 1
+        return 0
+
+
+class ProjectCamerasSummary:
+    """
+    Counts for the tabs of a project's cameras section, so the rows of the
+    tabs that aren't showing never have to be fetched.
+    """
+
+    def __init__(self, project):
+        loaded = status_number("loaded")
+        cameras = project.cameras.aggregate(
+            empty=Count(
+                "pk", filter=Q(status="empty", multiple_backs=False), distinct=True
+            ),
+            backs_empty=Count(
+                "camera_backs",
+                filter=Q(multiple_backs=True, camera_backs__status="empty"),
+                distinct=True,
+            ),
+            multiple_backs=Count("pk", filter=Q(multiple_backs=True), distinct=True),
+        )
+        rolls = Roll.objects.filter(owner=project.owner, status=loaded).aggregate(
+            loaded=Count("pk", filter=Q(project=project)),
+            loaded_outside=Count(
+                "pk",
+                filter=Q(camera__in=project.cameras.values("pk")) & ~Q(project=project),
+            ),
+        )
+
+        self.cameras_ready = cameras["empty"] + cameras["backs_empty"]
+        self.has_multiple_backs = cameras["multiple_backs"] > 0
+        self.rolls_loaded = rolls["loaded"]
+        self.rolls_loaded_outside = rolls["loaded_outside"]
+
+    def initial_cameras_tab(self):
+        "Show a non-empty tab by default."
+
+        if self.cameras_ready and not self.rolls_loaded:
+            return 1
+        elif self.rolls_loaded_outside:
+            return 2
+        return 0
+
+
+class RollPivot:
+    """
+    Roll counts by format, type and push/pull from one GROUP BY query, folded
+    into the nested dict the inventory and ready tables expect. Totals are
+    added up here rather than counted again in the database.
+
+    Works on either a Roll queryset or (with count=Sum("count")) a RollCounter
+    queryset.
+    """
+
+    def __init__(self, rolls, count=None):
+        self.rows = list(
+            rolls.order_by()
+            .values("push_pull", format=F("film__format"), type=F("film__stock__type"))
+            .annotate(count=count or Count("pk"))
+        )
+
+    @classmethod
+    def from_counters(cls, owner, status):
+        return cls(
+            RollCounter.objects.filter(owner=owner, status=status, count__gt=0),
+            count=Sum("count"),
+        )
+
+    def counts(self):
+        formats = [format for format, name in film_formats]
+        counts = {"all": 0, **{format: 0 for format in formats}}
+
+        for type, name in film_types:
+            counts[type] = {"all": 0, **{format: 0 for format in formats}}
+            for key in push_pull_keys.values():
+                counts[type][key] = {format: 0 for format in formats}
+
+        for row in self.rows:
+            format = row["format"]
+            count = row["count"]
+            counts["all"] += count
+            counts[format] = counts.get(format, 0) + count
+
+            # Films without a stock don't have a type.
+            if row["type"] in counts:
+                by_type = counts[row["type"]]
+                by_type["all"] += count
+                by_type[format] = by_type.get(format, 0) + count
+
+                if row["push_pull"] in push_pull_keys:
+                    by_push_pull = by_type[push_pull_keys[row["push_pull"]]]
+                    by_push_pull[format] = by_push_pull.get(format, 0) + count
+
+        return counts
+
+    def formats(self):
+        "The formats with any rolls, largest first."
+
+        return sorted({row["format"] for row in self.rows}, reverse=True)
+
+    def types(self):
+        "The types with any rolls."
+
+        return sorted({row["type"] for row in self.rows if row["type"] is not None})
+
+
+class LogbookFacets:
+    """
+    The counts on the logbook's status and year filters: statuses come from the
+    roll counters and years from one GROUP BY query. They're cached per user
+    and forgotten whenever that user's rolls are written (see
+    `forget_logbook_facets`).
+    """
+
+    timeout = 60 * 60 * 24
+
+    def __init__(self, owner):
+        key = logbook_facets_cache_key(owner.pk)
+        facets = cache.get(key)
+        if facets is None:
+            facets = self.count(owner)
+            cache.set(key, facets, self.timeout)
+
+        self.status_counts, self.all_years = facets
+
+    @staticmethod
+    def count(owner):
+        storage = status_number("storage")
+        statuses = dict(
+            RollCounter.objects.filter(owner=owner)
+            .exclude(status=storage)
+            .order_by()
+            .values_list("status")
+            .annotate(Sum("count"))
+        )
+        status_counts = {"all": sum(statuses.values())}
+        for status in status_keys:
+            if status != "storage":
+                status_counts[status] = statuses.get(status_number(status), 0)
+
+        years = (
+            Roll.objects.filter(owner=owner, started_on__isnull=False)
+            .exclude(status=storage)
+            .annotate(year=ExtractYear("started_on"))
+            .order_by("-year")
+            .values_list("year")
+            .annotate(Count("pk"))
+        )
+        all_years = {"all": status_counts["all"], **dict(years)}
+
+        return status_counts, all_years
@@ -0,0 +1,437 @@
+"""
+The CSV files of someone's own data that the settings page offers, and that
+inventory/imports.py reads back in.
+
+Rows are fetched a chunk at a time with only the columns they need, so a file
+of any size is written in about the same memory, whether it's streamed to the
+browser or written to disk by `manage.py run_jobs`.
+
+Every export comes with an opaque `since` mark. Given it back, an export only
+has the rows changed since then, plus a row with just the id and when for each
+one that's been deleted (from its `Tombstone`), in an extra `deleted` column.
+"""
+
+import datetime
+from django.core import signing
+from django.db.models import Prefetch
+from django.utils import timezone
+from .models import Camera, CameraBack, Frame, Journal, Project, Roll, Tombstone
+
+# How many rows to fetch from the database at a time.
+chunk_size = 2000
+
+# Rows changed this long before an export started are in the next delta export
+# too, so none saved by a transaction that was still going are missed.
+since_overlap = datetime.timedelta(minutes=1)
+# How long deletions are kept for. Marks older than this need a full export.
+tombstones_kept = datetime.timedelta(days=90)
+
+since_salt = "inventory.exports.since"
+
+
+def since_token(mark):
+    return signing.dumps(mark.timestamp(), salt=since_salt)
+
+
+def parse_since(token):
+    "The time in a `since_token`, raising signing.BadSignature if it isn't one."
+
+    return datetime.datetime.fromtimestamp(
+        signing.loads(token, salt=since_salt), tz=datetime.timezone.utc
+    )
+
+
+def film_name_relations(film="film"):
+    "What to select_related() for `Film.__str__`."
+
+    return [f"{film}__stock__manufacturer", f"{film}__manufacturer"]
+
+
+def film_name_fields(film="film"):
+    "The fields `Film.__str__` needs, for only()."
+
+    return [
+        f"{film}__format",
+        f"{film}__name",
+        f"{film}__manufacturer__name",
+        f"{film}__stock__name",
+        f"{film}__stock__manufacturer__name",
+    ]
+
+
+def roll_name_fields(roll="roll"):
+    "The fields `Roll.__str__` needs, for only()."
+
+    return [
+        f"{roll}__code",
+        f"{roll}__started_on",
+        f"{roll}__created_at",
+        *film_name_fields(f"{roll}__film"),
+    ]
+
+
+class CSVExport:
+    # Also what the export and import URLs are called.
+    name = None
+    header = []
+
+    def __init__(self, owner, since=None):
+        self.owner = owner
+        self.since = since
+        self.mark = timezone.now() - since_overlap
+        if since is not None:
+            self.header = [*self.header, "deleted"]
+
+    @property
+    def filename(self):
+        return f"{self.name}.csv"
+
+    @property
+    def next_since(self):
+        "What to give the next export to get only what's changed after this one."
+
+        return since_token(self.mark)
+
+    def queryset(self):
+        raise NotImplementedError
+
+    def row(self, obj):
+        raise NotImplementedError
+
+    def changed(self):
+        queryset = self.queryset()
+        if self.since is not None:
+            queryset = queryset.filter(updated_at__gt=self.since)
+        return queryset
+
+    def count(self):
+        return self.changed().count()
+
+    def rows(self):
+        if self.since is None:
+            for obj in self.queryset().iterator(chunk_size=chunk_size):
+                yield self.row(obj)
+            return
+
+        for obj in self.changed().iterator(chunk_size=chunk_size):
+            yield [*self.row(obj), ""]
+
+        blank = [""] * (len(self.header) - 2)
+        tombstones = Tombstone.objects.filter(
+            owner=self.owner, data=self.name, deleted_at__gt=self.since
+        ).only("object_id", "deleted_at")
+        for tombstone in tombstones.iterator(chunk_size=chunk_size):
+            yield [tombstone.object_id, *blank, tombstone.deleted_at]
+
+
+class CameraExport(CSVExport):
+    name = "cameras"
+    header = [
+        "id",
+        "format",
+        "name",
+        "notes",
+        "status",
+        "multiple_backs",
+        "created",
+        "updated",
+    ]
+
+    def queryset(self):
+        return Camera.objects.filter(owner=self.owner)
+
+    def row(self, camera):
+        return [
+            camera.id,
+            camera.format,
+            camera.name,
+            camera.notes,
+            camera.status,
+            camera.multiple_backs,
+            camera.created_at,
+            camera.updated_at,
+        ]
+
+
+class CameraBackExport(CSVExport):
+    name = "camera-backs"
+    header = [
+        "id",
+        "camera",
+        "camera_id",
+        "name",
+        "notes",
+        "status",
+        "format",
+        "created",
+        "updated",
+    ]
+
+    def queryset(self):
+        return (
+            CameraBack.objects.filter(camera__owner=self.owner)
+            .select_related("camera")
+            .only(
+                "name",
+                "notes",
+                "status",
+                "format",
+                "created_at",
+                "updated_at",
+                "camera__name",
+            )
+        )
+
+    def row(self, back):
+        return [
+            back.id,
+            back.camera,
+            back.camera_id,
+            back.name,
+            back.notes,
+            back.status,
+            back.format,
+            back.created_at,
+            back.updated_at,
+        ]
+
+
+class ProjectExport(CSVExport):
+    name = "projects"
+    header = [
+        "id",
+        "name",
+        "notes",
+        "status",
+        "camera_ids",
+        "cameras",
+        "roll_ids",
+        "rolls",
+        "created",
+        "updated",
+    ]
+
+    def queryset(self):
+        return Project.objects.filter(owner=self.owner).prefetch_related(
+            Prefetch("cameras", queryset=Camera.objects.only("name")),
+            Prefetch(
+                "roll_set",
+                queryset=Roll.objects.filter(owner=self.owner)
+                .select_related(*film_name_relations())
+                .only("project", "code", "status", *film_name_fields()),
+            ),
+        )
+
+    def row(self, project):
+        roll_ids = []
+        rolls = []
+        for roll in project.roll_set.all():
+            roll_ids.append(roll.id)
+            roll_code = f"{roll.code} / " if roll.code else ""
+            roll_name = (
+                f"{roll_code}{roll.film.__str__()} / {roll.get_status_display()}"
+            )
+            rolls.append(roll_name)
+        camera_ids = []
+        cameras = []
+        for camera in project.cameras.all():
+            camera_ids.append(camera.id)
+            cameras.append(camera.__str__())
+
+        return [
+            project.id,
+            project.name,
+            project.notes,
+            project.status,
+            camera_ids,
+            cameras,
+            roll_ids,
+            rolls,
+            project.created_at,
+            project.updated_at,
+        ]
+
+
+class RollExport(CSVExport):
+    name = "rolls"
+    header = [
+        "id",
+        "code",
+        "status",
+        "film",
+        "film_id",
+        "push_pull",
+        "camera",
+        "camera_id",
+        "camera_back",
+        "camera_back_id",
+        "lens",
+        "project",
+        "project_id",
+        "location",
+        "notes",
+        "lab",
+        "scanner",
+        "notes_on_development",
+        "created",
+        "updated",
+        "started",
+        "ended",
+    ]
+
+    def queryset(self):
+        return (
+            Roll.objects.filter(owner=self.owner)
+            .select_related(
+                *film_name_relations(),
+                "camera",
+                "camera_back__camera",
+                "project",
+            )
+            .only(
+                "code",
+                "status",
+                "push_pull",
+                "lens",
+                "location",
+                "notes",
+                "lab",
+                "scanner",
+                "notes_on_development",
+                "created_at",
+                "updated_at",
+                "started_on",
+                "ended_on",
+                *film_name_fields(),
+                "camera__name",
+                "camera_back__name",
+                "camera_back__camera__name",
+                "project__name",
+            )
+        )
+
+    def row(self, roll):
+        return [
+            roll.id,
+            roll.code,
+            roll.status,
+            roll.film,
+            roll.film_id,
+            roll.push_pull,
+            roll.camera,
+            roll.camera_id or "",
+            roll.camera_back,
+            roll.camera_back_id or "",
+            roll.lens,
+            roll.project,
+            roll.project_id or "",
+            roll.location,
+            roll.notes,
+            roll.lab,
+            roll.scanner,
+            roll.notes_on_development,
+            roll.created_at,
+            roll.updated_at,
+            roll.started_on,
+            roll.ended_on,
+        ]
+
+
+class JournalExport(CSVExport):
+    name = "journals"
+    header = [
+        "id",
+        "roll_id",
+        "roll",
+        "date",
+        "notes",
+        "frame",
+        "created",
+        "updated",
+    ]
+
+    def queryset(self):
+        return (
+            Journal.objects.filter(roll__owner=self.owner)
+            .select_related(*film_name_relations("roll__film"))
+            .only(
+                "date",
+                "notes",
+                "frame",
+                "created_at",
+                "updated_at",
+                *roll_name_fields(),
+            )
+        )
+
+    def row(self, journal):
+        return [
+            journal.id,
+            journal.roll_id,
+            journal.roll,
+            journal.date,
+            journal.notes,
+            journal.frame,
+            journal.created_at,
+            journal.updated_at,
+        ]
+
+
+class FrameExport(CSVExport):
+    name = "frames"
+    header = [
+        "id",
+        "roll_id",
+        "roll",
+        "number",
+        "date",
+        "notes",
+        "aperture",
+        "shutter_speed",
+        "created",
+        "updated",
+    ]
+
+    def queryset(self):
+        return (
+            Frame.objects.filter(roll__owner=self.owner)
+            .select_related(*film_name_relations("roll__film"))
+            .only(
+                "number",
+                "date",
+                "notes",
+                "aperture",
+                "shutter_speed",
+                "created_at",
+                "updated_at",
+                *roll_name_fields(),
+            )
+        )
+
+    def row(self, frame):
+        return [
+            frame.id,
+            frame.roll_id,
+            frame.roll,
+            frame.number,
+            frame.date,
+            frame.notes,
+            frame.aperture,
+            frame.shutter_speed,
+            frame.created_at,
+            frame.updated_at,
+        ]
+
+
+# In the order they should be imported.
+exports = {
+    export.name: export
+    for export in (
+        CameraExport,
+        CameraBackExport,
+        ProjectExport,
+        RollExport,
+        JournalExport,
+        FrameExport,
+    )
+}
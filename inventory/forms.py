@@ -137,7 +137,9 @@ class RollsAddForm(ModelForm):
             choices_groupby="stock.manufacturer",
         )
 
-    quantity = forms.IntegerField(initial=1, min_value=1)
+    # They're all added in one transaction, which holds up everyone else's
+    # writes until it's done.
+    quantity = forms.IntegerField(initial=1, min_value=1, max_value=100)
 
     class Meta:
         model = Roll
@@ -340,6 +342,10 @@ class UploadCSVForm(forms.Form):
     csv = forms.FileField()
 
 
+class UploadArchiveForm(forms.Form):
+    archive = forms.FileField()
+
+
 class FilmForm(ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -0,0 +1,456 @@
+"""
+Importing the CSV files the exports make.
+
+Every row is checked before anything is written, against ids looked up a
+batch at a time rather than a row at a time. The good rows are then written
+with `bulk_create` in one transaction, and the bad ones come back in the
+report with their line numbers instead of stopping the whole import.
+
+Rows whose ids are already someone's own are skipped, so importing the same
+file twice is harmless. Import cameras, then camera backs, projects, rolls,
+journals and frames so everything a row refers to is already there.
+"""
+
+import json
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils.text import get_text_list
+from .models import (
+    Camera,
+    CameraBack,
+    Frame,
+    Journal,
+    Project,
+    Roll,
+    RollCodeSequence,
+)
+from .utils import batched, pluralize, status_number
+
+batch_size = 500
+
+
+def create_keeping_timestamps(model, objs):
+    "bulk_create, keeping the `created_at` and `updated_at` the objects came with."
+
+    timestamps = [(obj.created_at, obj.updated_at) for obj in objs]
+    model.objects.bulk_create(objs, batch_size=batch_size)
+
+    # Saving sets these to now, so put back the ones from the file.
+    for obj, (created_at, updated_at) in zip(objs, timestamps):
+        obj.created_at = created_at or obj.created_at
+        obj.updated_at = updated_at or obj.updated_at
+    model.objects.bulk_update(objs, ["created_at", "updated_at"], batch_size=batch_size)
+
+
+class RowError(Exception):
+    "Something wrong with a single row."
+
+
+class ImportReport:
+    # How many of the rows that couldn't be imported to go into detail about.
+    errors_shown = 5
+
+    def __init__(self, noun, created=0, skipped=0, errors=()):
+        self.noun = noun
+        self.created = created
+        self.skipped = skipped
+        self.errors = [tuple(error) for error in errors]  # (line, message)
+
+    def __repr__(self):
+        return (
+            f"<ImportReport: {self.created} created, {self.skipped} skipped, "
+            f"{len(self.errors)} errors>"
+        )
+
+    def as_dict(self):
+        "For keeping on a `Job`, and making it again with `ImportReport(**it)`."
+
+        return {
+            "noun": self.noun,
+            "created": self.created,
+            "skipped": self.skipped,
+            "errors": self.errors,
+        }
+
+    @property
+    def summary(self):
+        if self.created:
+            return f"Imported {self.created} {pluralize(self.noun, self.created)}."
+        return f"No {self.noun}s imported."
+
+    @property
+    def error_summary(self):
+        errors = len(self.errors)
+        details = [
+            f"Line {line}: {message}"
+            for line, message in self.errors[: self.errors_shown]
+        ]
+        if errors > self.errors_shown:
+            details.append(f"…and {errors - self.errors_shown} more.")
+
+        return " ".join(
+            [f"{errors} {pluralize('row', errors)} couldn’t be imported.", *details]
+        )
+
+
+class CSVImport:
+    model = None
+    # The same as the export's.
+    name = None
+    noun = None
+    # Columns with the ids of things that have to exist already, and whether
+    # they have to be the importer's own (rather than from the film catalog).
+    references = {}
+
+    def __init__(self, owner):
+        self.owner = owner
+        self.report = ImportReport(self.noun)
+        opts = self.model._meta
+        self.relations = [f.name for f in opts.concrete_fields if f.is_relation]
+        self.unique = [
+            [opts.get_field(name).attname for name in fields]
+            for fields in opts.unique_together
+        ]
+
+    def run(self, rows, progress=None):
+        """
+        Import what can be, reporting the rest. `progress`, if given, is
+        called with how many rows have been checked so far and how many
+        there are.
+        """
+
+        rows = list(rows)
+        self.preload(rows)
+
+        objs = []
+        ids = set()
+        for line, row in enumerate(rows, start=2):  # The header is line 1.
+            if progress and line % batch_size == 2:
+                progress(line - 2, len(rows))
+            try:
+                obj = self.check(row, ids)
+            except RowError as error:
+                self.report.errors.append((line, str(error)))
+                continue
+
+            if obj is None:
+                self.report.skipped += 1
+            else:
+                objs.append(obj)
+
+        with transaction.atomic():
+            self.save(objs)
+        self.report.created = len(objs)
+
+        return self.report
+
+    def owned(self, model):
+        return model.objects.filter(**{model.owner_path: self.owner.pk})
+
+    def preload(self, rows):
+        self.existing = {}
+        for pks in batched(self.ids(rows, "id")):
+            self.existing.update(
+                self.model.objects.filter(pk__in=pks).values_list(
+                    "pk", self.model.owner_path
+                )
+            )
+
+        self.found = {}
+        for column, owned in self.references.items():
+            model = self.model._meta.get_field(column.removesuffix("_id")).related_model
+            self.found[column] = self.find(
+                self.owned(model) if owned else model.objects.all(),
+                self.ids(rows, column),
+            )
+
+        self.taken = [
+            set(self.owned(self.model).values_list(*fields)) for fields in self.unique
+        ]
+
+    def find(self, queryset, pks):
+        found = set()
+        for batch in batched(pks):
+            found.update(queryset.filter(pk__in=batch).values_list("pk", flat=True))
+        return found
+
+    def ids(self, rows, column):
+        "Every id in a column, leaving any that aren't ids for `check` to report."
+
+        ids = set()
+        for row in rows:
+            try:
+                ids.add(int(row.get(column) or ""))
+            except ValueError:
+                pass
+        return ids
+
+    def check(self, row, ids):
+        "Build the new object for a row, or None if it's already been imported."
+
+        pk = self.integer(row, "id")
+        if pk in self.existing:
+            if self.existing[pk] == self.owner.pk:
+                return None
+            raise RowError(f"id {pk} is already taken.")
+        if pk in ids:
+            raise RowError(f"id {pk} is in the file more than once.")
+
+        obj = self.build(row)
+        obj.pk = pk
+        try:
+            obj.clean_fields(exclude=self.relations)
+        except ValidationError as error:
+            raise RowError(
+                " ".join(
+                    f"{field}: {' '.join(messages)}"
+                    for field, messages in error.message_dict.items()
+                )
+            )
+
+        keys = [tuple(getattr(obj, name) for name in fields) for fields in self.unique]
+        for fields, key, taken in zip(self.unique, keys, self.taken):
+            if key in taken:
+                raise RowError(
+                    f"There’s already one with the same {get_text_list(fields, 'and')}."
+                )
+        for key, taken in zip(keys, self.taken):
+            taken.add(key)
+        ids.add(pk)
+
+        return obj
+
+    def build(self, row):
+        raise NotImplementedError
+
+    def value(self, row, column):
+        value = row.get(column)
+        if value is None:
+            raise RowError(f"The {column} column is missing.")
+        return value
+
+    def integer(self, row, column):
+        value = self.value(row, column)
+        try:
+            return int(value)
+        except ValueError:
+            raise RowError(f"{column} should be a number, not “{value}”.")
+
+    def reference(self, row, column, required=True):
+        "The id of something from the `references` that exists."
+
+        if not self.value(row, column):
+            if required:
+                raise RowError(f"{column} is missing.")
+            return None
+
+        pk = self.integer(row, column)
+        if pk not in self.found[column]:
+            name = self.model._meta.get_field(column.removesuffix("_id")).verbose_name
+            raise RowError(f"There’s no {name} with id {pk}.")
+        return pk
+
+    def save(self, objs):
+        create_keeping_timestamps(self.model, objs)
+
+
+class CameraImport(CSVImport):
+    model = Camera
+    name = "cameras"
+    noun = "camera"
+
+    def build(self, row):
+        return Camera(
+            owner=self.owner,
+            format=self.value(row, "format"),
+            name=self.value(row, "name"),
+            notes=self.value(row, "notes"),
+            status=self.value(row, "status"),
+            multiple_backs=self.value(row, "multiple_backs"),
+            created_at=self.value(row, "created"),
+            updated_at=self.value(row, "updated"),
+        )
+
+
+class CameraBackImport(CSVImport):
+    model = CameraBack
+    name = "camera-backs"
+    noun = "camera back"
+    references = {"camera_id": True}
+
+    def build(self, row):
+        return CameraBack(
+            camera_id=self.reference(row, "camera_id"),
+            name=self.value(row, "name"),
+            notes=self.value(row, "notes"),
+            status=self.value(row, "status"),
+            format=self.value(row, "format"),
+            created_at=self.value(row, "created"),
+            updated_at=self.value(row, "updated"),
+        )
+
+
+class ProjectImport(CSVImport):
+    model = Project
+    name = "projects"
+    noun = "project"
+
+    def preload(self, rows):
+        super().preload(rows)
+        self.cameras = self.find(self.owned(Camera), self.listed(rows, "camera_ids"))
+        self.rolls = self.find(self.owned(Roll), self.listed(rows, "roll_ids"))
+
+    def listed(self, rows, column):
+        ids = set()
+        for row in rows:
+            try:
+                ids.update(self.id_list(row, column))
+            except RowError:
+                pass
+        return ids
+
+    def id_list(self, row, column):
+        try:
+            ids = json.loads(self.value(row, column) or "[]")
+            return [int(pk) for pk in ids]
+        except (ValueError, TypeError):
+            raise RowError(f"{column} should be a list of ids.")
+
+    def build(self, row):
+        project = Project(
+            owner=self.owner,
+            name=self.value(row, "name"),
+            notes=self.value(row, "notes"),
+            status=self.value(row, "status"),
+            created_at=self.value(row, "created"),
+            updated_at=self.value(row, "updated"),
+        )
+
+        project.camera_ids = self.id_list(row, "camera_ids")
+        for pk in project.camera_ids:
+            if pk not in self.cameras:
+                raise RowError(f"There’s no camera with id {pk}.")
+
+        # Rolls refer to their projects too, so any that haven't been
+        # imported yet will be added to this project when they are.
+        project.roll_ids = [
+            pk for pk in self.id_list(row, "roll_ids") if pk in self.rolls
+        ]
+
+        return project
+
+    def save(self, projects):
+        super().save(projects)
+
+        for project in projects:
+            for pks in batched(project.roll_ids):
+                self.owned(Roll).filter(pk__in=pks).update(project=project)
+        # Which touched the projects, so put back the times from the file.
+        Project.objects.bulk_update(projects, ["updated_at"], batch_size=batch_size)
+
+        Project.cameras.through.objects.bulk_create(
+            [
+                Project.cameras.through(project_id=project.pk, camera_id=camera_id)
+                for project in projects
+                for camera_id in project.camera_ids
+            ],
+            batch_size=batch_size,
+        )
+
+
+class RollImport(CSVImport):
+    model = Roll
+    name = "rolls"
+    noun = "roll"
+    references = {
+        "film_id": False,
+        "camera_id": True,
+        "camera_back_id": True,
+        "project_id": True,
+    }
+
+    def build(self, row):
+        return Roll(
+            owner=self.owner,
+            film_id=self.reference(row, "film_id"),
+            camera_id=self.reference(row, "camera_id", required=False),
+            camera_back_id=self.reference(row, "camera_back_id", required=False),
+            project_id=self.reference(row, "project_id", required=False),
+            code=self.value(row, "code"),
+            status=self.value(row, "status"),
+            push_pull=self.value(row, "push_pull"),
+            lens=self.value(row, "lens"),
+            location=self.value(row, "location"),
+            notes=self.value(row, "notes"),
+            lab=self.value(row, "lab"),
+            scanner=self.value(row, "scanner"),
+            notes_on_development=self.value(row, "notes_on_development"),
+            started_on=self.value(row, "started") or None,
+            ended_on=self.value(row, "ended") or None,
+            created_at=self.value(row, "created"),
+            updated_at=self.value(row, "updated"),
+        )
+
+    def save(self, rolls):
+        super().save(rolls)
+
+        # What Roll.save would have done for loaded rolls.
+        loaded = [roll for roll in rolls if roll.status == status_number("loaded")]
+        for model, field in ((Camera, "camera_id"), (CameraBack, "camera_back_id")):
+            holders = {getattr(roll, field) for roll in loaded} - {None}
+            for pks in batched(holders):
+                model.objects.filter(pk__in=pks, status="empty").update(status="loaded")
+
+        # Don't hand out codes the imported rolls already have.
+        if rolls:
+            RollCodeSequence.objects.rebuild(self.owner)
+
+
+class JournalImport(CSVImport):
+    model = Journal
+    name = "journals"
+    noun = "journal"
+    references = {"roll_id": True}
+
+    def build(self, row):
+        return Journal(
+            roll_id=self.reference(row, "roll_id"),
+            date=self.value(row, "date"),
+            notes=self.value(row, "notes"),
+            frame=self.value(row, "frame"),
+            created_at=self.value(row, "created"),
+            updated_at=self.value(row, "updated"),
+        )
+
+
+class FrameImport(CSVImport):
+    model = Frame
+    name = "frames"
+    noun = "frame"
+    references = {"roll_id": True}
+
+    def build(self, row):
+        return Frame(
+            roll_id=self.reference(row, "roll_id"),
+            number=self.value(row, "number"),
+            date=self.value(row, "date"),
+            notes=self.value(row, "notes"),
+            aperture=self.value(row, "aperture"),
+            shutter_speed=self.value(row, "shutter_speed"),
+            created_at=self.value(row, "created"),
+            updated_at=self.value(row, "updated"),
+        )
+
+
+# In the order they should be imported.
+imports = {
+    importer.name: importer
+    for importer in (
+        CameraImport,
+        CameraBackImport,
+        ProjectImport,
+        RollImport,
+        JournalImport,
+        FrameImport,
+    )
+}
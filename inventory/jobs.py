@@ -0,0 +1,171 @@
+"""
+Imports and exports too big to run in a request. They're queued as `Job`s and
+run one at a time by `manage.py run_jobs` in its own process, so the web
+workers stay free for everyone else while the settings page polls for how
+they're getting on.
+"""
+
+import csv
+import datetime
+import logging
+import os
+from django.db import transaction
+from django.utils import timezone
+from . import archive
+from .exports import chunk_size, exports, tombstones_kept
+from .imports import imports
+from .models import Job, Tombstone
+
+logger = logging.getLogger(__name__)
+
+# Uploads (in bytes) and exports (in rows) bigger than these are left to a job.
+background_import_size = 512 * 1024
+background_export_rows = 5000
+
+# Jobs that have been running this long without any progress were interrupted.
+stale_after = datetime.timedelta(minutes=30)
+# How long to keep finished jobs and their files.
+keep_for = datetime.timedelta(days=7)
+
+
+class JobError(Exception):
+    "Something wrong that the person who queued the job can fix."
+
+
+def queue_export(owner, data):
+    return Job.objects.create(owner=owner, action="export", data=data)
+
+
+def queue_import(owner, data, upload):
+    # The worker can't see the job until its file is there.
+    with transaction.atomic():
+        job = Job.objects.create(owner=owner, action="import", data=data)
+        job.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(job.path, "wb") as file:
+            for chunk in upload.chunks():
+                file.write(chunk)
+
+    return job
+
+
+def claim():
+    "The oldest queued job, now marked as running, or None if there aren't any."
+
+    while True:
+        job = Job.objects.filter(status="queued").order_by("created_at").first()
+        if job is None:
+            return None
+
+        now = timezone.now()
+        if Job.objects.filter(pk=job.pk, status="queued").update(
+            status="running", started_at=now, updated_at=now
+        ):
+            job.refresh_from_db()
+            return job
+        # Another worker got to it first.
+
+
+def progress(job, done, total=None):
+    job.done = done
+    fields = ["done", "updated_at"]
+    if total is not None:
+        job.total = total
+        fields.append("total")
+    job.save(update_fields=fields)
+
+
+def run(job):
+    try:
+        if job.action == "export":
+            run_export(job)
+        else:
+            run_import(job)
+    except JobError as error:
+        job.status = "failed"
+        job.error = str(error)
+    except Exception:
+        logger.exception("Job %s failed", job.pk)
+        job.status = "failed"
+        job.error = "Something went wrong. Please try again."
+    else:
+        job.status = "done"
+
+    job.finished_at = timezone.now()
+    job.save()
+
+
+def run_export(job):
+    # Written under another name first so a half-written file is never offered.
+    partial = job.path.with_suffix(".partial")
+    partial.parent.mkdir(parents=True, exist_ok=True)
+
+    if job.data == "account":
+        progress(job, 0, archive.count(job.owner))
+        with open(partial, "wb") as file:
+            for done in archive.write_archive(job.owner, file):
+                progress(job, done)
+    else:
+        export = exports[job.data](job.owner)
+        progress(job, 0, export.count())
+        with open(partial, "w", encoding="utf-8", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(export.header)
+            done = 0
+            for done, row in enumerate(export.rows(), start=1):
+                writer.writerow(row)
+                if done % chunk_size == 0:
+                    progress(job, done)
+
+    os.replace(partial, job.path)
+    job.done = job.total = done
+
+
+def run_import(job):
+    def report_progress(done, total):
+        progress(job, done, total)
+
+    try:
+        if job.data == "account":
+            # All in one transaction, so there's no progress to show on the way.
+            counts = archive.restore(job.owner, job.path)
+            job.report = {"counts": counts}
+            job.done = job.total = sum(counts.values())
+        else:
+            with open(job.path, encoding="utf-8", newline="") as file:
+                report = imports[job.data](job.owner).run(
+                    csv.DictReader(file), progress=report_progress
+                )
+            job.report = report.as_dict()
+            job.done = job.total = report.created + report.skipped + len(report.errors)
+    except archive.RestoreError as error:
+        raise JobError(str(error))
+    except (UnicodeDecodeError, csv.Error):
+        raise JobError("That doesn’t look like a CSV file.")
+    finally:
+        # Nothing else needs what was uploaded.
+        job.path.unlink(missing_ok=True)
+
+
+def fail_stale():
+    "Fail jobs whose worker was stopped (by a deploy, say) partway through."
+
+    now = timezone.now()
+    return Job.objects.filter(
+        status="running", updated_at__lt=now - stale_after
+    ).update(
+        status="failed",
+        error="This was interrupted. Please try again.",
+        finished_at=now,
+        updated_at=now,
+    )
+
+
+def clean_up():
+    """
+    Delete finished jobs, and their files, once they've been around a while,
+    and tombstones too old for any delta export to need.
+    """
+
+    now = timezone.now()
+    Tombstone.objects.filter(deleted_at__lt=now - tombstones_kept).delete()
+    return Job.objects.filter(finished_at__lt=now - keep_for).delete()
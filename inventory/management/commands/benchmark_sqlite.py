@@ -0,0 +1,166 @@
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from django.core.management.base import BaseCommand
+from inventory.sqlite.base import pragmas
+from inventory.timing import percentile
+
+# How each setup connects, starts a write and whether it keeps its connection.
+setups = {
+    "Django’s defaults": {"pragmas": {}, "begin": "BEGIN", "persistent": False},
+    "inventory.sqlite": {
+        "pragmas": pragmas,
+        "begin": "BEGIN IMMEDIATE",
+        "persistent": True,
+    },
+}
+
+owners = 100
+
+
+def connect(path, setup):
+    # Five seconds is what sqlite3 (and so Django) waits for a lock by default.
+    db = sqlite3.connect(path, timeout=5, isolation_level=None)
+    for name, value in setup["pragmas"].items():
+        db.execute(f"PRAGMA {name} = {value}")
+    return db
+
+
+def seed(path, rows):
+    db = sqlite3.connect(path, isolation_level=None)
+    db.executescript(
+        """
+        CREATE TABLE rolls (
+            id INTEGER PRIMARY KEY,
+            owner INTEGER NOT NULL,
+            status INTEGER NOT NULL,
+            notes TEXT NOT NULL
+        );
+        CREATE INDEX rolls_owner ON rolls (owner, status);
+        """
+    )
+    with db:
+        db.executemany(
+            "INSERT INTO rolls (owner, status, notes) VALUES (?, ?, ?)",
+            ((n % owners, n % 5, "x" * 200) for n in range(rows)),
+        )
+    db.close()
+
+
+def work(path, setup, deadline, writes_share, results):
+    "Read like a page and write like a form (reading first), until `deadline`."
+
+    rng = random.Random()
+    counts = {"reads": 0, "writes": 0, "locked": 0}
+    latencies = []
+    kept = connect(path, setup) if setup["persistent"] else None
+
+    while time.monotonic() < deadline:
+        # A new connection for each request, unless they're kept.
+        db = kept or connect(path, setup)
+        owner = rng.randrange(owners)
+        started = time.perf_counter()
+        try:
+            if rng.random() < writes_share:
+                db.execute(setup["begin"])
+                (count,) = db.execute(
+                    "SELECT count(*) FROM rolls WHERE owner = ?", (owner,)
+                ).fetchone()
+                db.execute(
+                    "INSERT INTO rolls (owner, status, notes) VALUES (?, ?, ?)",
+                    (owner, count % 5, "x" * 200),
+                )
+                db.execute("COMMIT")
+                counts["writes"] += 1
+            else:
+                db.execute(
+                    "SELECT status, count(*) FROM rolls WHERE owner = ? GROUP BY status",
+                    (owner,),
+                ).fetchall()
+                counts["reads"] += 1
+        except sqlite3.OperationalError as error:
+            if "locked" not in str(error):
+                raise
+            counts["locked"] += 1
+        finally:
+            if db.in_transaction:
+                db.execute("ROLLBACK")
+            if db is not kept:
+                db.close()
+        latencies.append(time.perf_counter() - started)
+
+    if kept:
+        kept.close()
+    results.append((counts, latencies))
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare SQLite reads and writes a second with Django’s defaults and "
+        "with inventory.sqlite’s, on a throwaway database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--seconds",
+            type=float,
+            default=5,
+            help="How long to run each setup for",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="How many connections to use at once",
+        )
+        parser.add_argument(
+            "--writes",
+            type=float,
+            default=0.2,
+            help="The share of requests (0 to 1) that write",
+        )
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=20000,
+            help="How many rows to start with",
+        )
+
+    def handle(self, *args, **kwargs):
+        for name, setup in setups.items():
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, "benchmark.sqlite")
+                seed(path, kwargs["rows"])
+
+                results = []
+                deadline = time.monotonic() + kwargs["seconds"]
+                threads = [
+                    threading.Thread(
+                        target=work,
+                        args=(path, setup, deadline, kwargs["writes"], results),
+                    )
+                    for _ in range(kwargs["workers"])
+                ]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+
+            totals = {
+                key: sum(counts[key] for counts, latencies in results)
+                for key in ("reads", "writes", "locked")
+            }
+            latencies = sorted(
+                latency for counts, latencies in results for latency in latencies
+            )
+            p99 = percentile(latencies, 0.99) * 1000 if latencies else 0
+            self.stdout.write(
+                f"{name}: "
+                f"{totals['reads'] / kwargs['seconds']:.0f} reads/s, "
+                f"{totals['writes'] / kwargs['seconds']:.0f} writes/s, "
+                f"{totals['locked']} “database is locked”, "
+                f"p99 {p99:.1f} ms"
+            )
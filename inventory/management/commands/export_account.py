@@ -0,0 +1,27 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from inventory.archive import write_archive
+
+
+class Command(BaseCommand):
+    help = "Write everything in someone's account to an archive"
+
+    def add_arguments(self, parser):
+        parser.add_argument("username", help="Whose account to export")
+        parser.add_argument("path", help="Where to write the archive (a .zip)")
+
+    def handle(self, *args, **kwargs):
+        try:
+            owner = User.objects.get(username=kwargs["username"])
+        except User.DoesNotExist:
+            raise CommandError(
+                f"User with username '{kwargs['username']}' does not exist"
+            )
+
+        with open(kwargs["path"], "wb") as file:
+            for written in write_archive(owner, file):
+                pass
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Exported {written} rows to {kwargs['path']}")
+        )
@@ -0,0 +1,140 @@
+import os
+import sqlite3
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from inventory.replicas import is_replica, record_copy, replica
+
+# Litestream uploads changes every second by default, and the primary's clock
+# may be a little ahead of ours.
+litestream_lag = 5
+
+
+def copy(source, target):
+    "Copy one SQLite file over another, without stopping anyone reading it."
+
+    source_db = sqlite3.connect(f"{Path(source).resolve().as_uri()}?mode=ro", uri=True)
+    target_db = sqlite3.connect(target, timeout=5)
+    try:
+        source_db.backup(target_db)
+    finally:
+        source_db.close()
+        target_db.close()
+
+
+def file_position(path):
+    "Something that changes whenever a SQLite file (or its WAL) is written to."
+
+    stat = os.stat(path)
+    try:
+        wal = os.stat(f"{path}-wal")
+    except FileNotFoundError:
+        wal = None
+    # Reading the file creates an empty WAL, which is the same as none.
+    return (
+        (stat.st_mtime_ns, stat.st_size),
+        (wal.st_mtime_ns, wal.st_size) if wal and wal.st_size else None,
+    )
+
+
+def litestream(*args):
+    try:
+        return subprocess.run(
+            ["litestream", *args], check=True, capture_output=True, text=True
+        ).stdout
+    except FileNotFoundError:
+        raise CommandError("Litestream isn’t installed.")
+    except subprocess.CalledProcessError as error:
+        raise CommandError(f"Litestream couldn’t {args[0]}: {error.stderr}")
+
+
+class Command(BaseCommand):
+    help = (
+        "Keep a read-only copy of the database up to date from a Litestream "
+        "replica (or, locally, the database file itself). See "
+        "inventory/replicas.py."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "source",
+            help="A Litestream replica URL (like s3://… or file://…) or a SQLite file",
+        )
+        parser.add_argument(
+            "--database",
+            default=replica if replica in settings.DATABASES else "default",
+            help="Which database to keep up to date",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=10,
+            help="How many seconds to wait between copies",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Copy it once and stop",
+        )
+
+    def handle(self, *args, **kwargs):
+        alias = kwargs["database"]
+        if alias not in settings.DATABASES:
+            raise CommandError(f"There isn’t a “{alias}” database.")
+        if alias != replica and not is_replica():
+            raise CommandError(
+                f"The “{alias}” database is the primary’s. Set DATABASE_ROLE to "
+                "“replica” to follow into it."
+            )
+        target = str(settings.DATABASES[alias]["NAME"])
+        self.position = None
+
+        if kwargs["once"]:
+            self.follow(kwargs["source"], target)
+            return
+
+        self.stdout.write(
+            f"Copying {kwargs['source']} to {target} every {kwargs['interval']:g} seconds"
+        )
+        while True:
+            try:
+                self.follow(kwargs["source"], target)
+            except CommandError as error:
+                # It'll probably work next time. Meanwhile the copy is older.
+                self.stderr.write(str(error))
+            time.sleep(kwargs["interval"])
+
+    def follow(self, source, target):
+        """
+        Copy the source if it's changed since the last copy. Whether it has
+        is cheap to find out, and a copy (or restoring from Litestream) takes
+        as long as the database is big.
+        """
+
+        started = time.time()
+        try:
+            if "://" in source:
+                # The WAL segments Litestream has uploaded, in every generation.
+                position = litestream("wal", source)
+                started -= litestream_lag
+                if position != self.position:
+                    self.restore(source, target)
+            else:
+                position = file_position(source)
+                if position != self.position:
+                    copy(source, target)
+        except (OSError, sqlite3.Error) as error:
+            raise CommandError(f"Couldn’t copy {source}: {error}")
+
+        # This machine's cache never hears about writes on the primary.
+        record_copy(as_of=started, changed=position != self.position)
+        self.position = position
+
+    def restore(self, source, target):
+        with tempfile.TemporaryDirectory() as directory:
+            restored = os.path.join(directory, "db.sqlite")
+            litestream("restore", "-o", restored, source)
+            copy(restored, target)
@@ -0,0 +1,351 @@
+import datetime
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from importlib import import_module
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.test import Client, override_settings
+from django.urls import URLPattern, reverse
+from inventory.models import (
+    Camera,
+    CameraBack,
+    Film,
+    Frame,
+    Journal,
+    Manufacturer,
+    Project,
+    Roll,
+    Stock,
+)
+from inventory.utils import status_number
+
+# A rough idea of what each query costs: one for running it at all, the rows
+# of every table it reads from start to finish, and this for each sort or
+# grouping it needs a temporary B-tree for.
+temp_b_tree_cost = 10
+
+# Reading a whole table, or the whole of one of its indexes.
+scan = re.compile(r"^SCAN (\w+)")
+alias = re.compile(r'"(\w+)" (U\d+)\b')
+
+
+@contextmanager
+def copy_of_everything():
+    """
+    Read and write a temporary copy of the default database, and a cache of
+    its own, so nobody else's writes are held up and nothing's left behind.
+    """
+
+    original = connections[DEFAULT_DB_ALIAS]
+    original.ensure_connection()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "db.sqlite")
+        target = sqlite3.connect(path)
+        try:
+            original.connection.backup(target)
+        finally:
+            target.close()
+
+        copied = original.__class__(
+            {**original.settings_dict, "NAME": path}, alias=DEFAULT_DB_ALIAS
+        )
+        connections[DEFAULT_DB_ALIAS] = copied
+        try:
+            with override_settings(
+                CACHES={
+                    "default": {
+                        **settings.CACHES["default"],
+                        "LOCATION": os.path.join(directory, "cache.sqlite"),
+                    }
+                }
+            ):
+                yield
+        finally:
+            copied.close()
+            connections[DEFAULT_DB_ALIAS] = original
+
+
+class Seeded:
+    "Someone with a bit of everything, for the views to show."
+
+    def __init__(self, rolls):
+        key = uuid.uuid4().hex[:8]
+        self.user = User.objects.create_user(username=f"index-advisor-{key}")
+        manufacturer = Manufacturer.objects.create(
+            name=f"Index Advisor {key}", slug=f"index-advisor-{key}"
+        )
+        self.films = [
+            Film.objects.create(
+                stock=Stock.objects.create(
+                    manufacturer=manufacturer,
+                    name=f"Stock {n}",
+                    slug=f"index-advisor-{key}-{n}",
+                ),
+                format="135",
+            )
+            for n in range(3)
+        ]
+        self.cameras = [
+            Camera.objects.create(owner=self.user, name=f"Camera {n}", format="135")
+            for n in range(3)
+        ]
+        self.back = CameraBack.objects.create(
+            camera=self.cameras[0], name="A", format="135"
+        )
+        self.project = Project.objects.create(owner=self.user, name="Project")
+        self.project.cameras.set(self.cameras)
+
+        started_on = datetime.date.today() - datetime.timedelta(days=rolls)
+        statuses = ["storage", "shot", "processing", "processed", "scanned"]
+        for n in range(rolls):
+            status = statuses[n % len(statuses)]
+            roll = Roll(
+                owner=self.user,
+                film=self.films[n % len(self.films)],
+                status=status_number(status),
+                project=self.project if n % 2 else None,
+            )
+            if status != "storage":
+                roll.camera = self.cameras[n % len(self.cameras)]
+                roll.code = f"35-c41-{n}"
+                roll.started_on = started_on + datetime.timedelta(days=n)
+                roll.ended_on = roll.started_on
+            roll.save()
+
+        # One roll loaded in each camera, and the first camera's back.
+        for n, camera in enumerate(self.cameras):
+            self.roll = Roll.objects.create(
+                owner=self.user,
+                film=self.films[0],
+                camera=camera,
+                camera_back=self.back if n == 0 else None,
+                project=self.project,
+                code=f"35-c41-loaded-{n}",
+                status=status_number("loaded"),
+                started_on=datetime.date.today(),
+            )
+            Camera.objects.filter(pk=camera.pk).update(status="loaded")
+        CameraBack.objects.filter(pk=self.back.pk).update(status="loaded")
+
+        self.journal = Journal.objects.create(roll=self.roll, frame=1)
+        self.frame = Frame.objects.create(roll=self.roll, number=1)
+
+    def kwargs(self, pattern):
+        "What to fill the pattern's URL in with, or None if it can't be."
+
+        stock = self.films[0].stock
+        first = str(pattern.pattern).split("/")[0]
+        values = {
+            "roll_pk": self.roll.pk,
+            "entry_pk": self.journal.pk,
+            "number": self.frame.number,
+            "back_pk": self.back.pk,
+            "manufacturer": stock.manufacturer.slug,
+            "slug": stock.slug,
+            "stock": stock.slug,
+            "format": self.films[0].format,
+            "user_id": self.user.pk,
+        }
+        pks = {
+            "roll": self.roll.pk,
+            "project": self.project.pk,
+            "camera": self.cameras[0].pk,
+        }
+        if first in pks:
+            values["pk"] = pks[first]
+
+        kwargs = {}
+        for name in pattern.pattern.converters:
+            if name not in values:
+                return None
+            kwargs[name] = values[name]
+        return kwargs
+
+
+class Query:
+    def __init__(self, sql, params, duration):
+        self.sql = sql
+        self.params = params
+        self.duration = duration
+        self.plan = []
+
+    def explain(self, cursor):
+        cursor.execute(f"EXPLAIN QUERY PLAN {self.sql}", self.params)
+        self.plan = [row[3] for row in cursor.fetchall()]
+
+    def scans(self):
+        "The tables this reads from start to finish."
+
+        aliases = dict((a, table) for table, a in alias.findall(self.sql))
+        return [
+            aliases.get(match[1], match[1])
+            for match in map(scan.match, self.plan)
+            if match
+        ]
+
+    def temp_b_trees(self):
+        return [step for step in self.plan if "TEMP B-TREE" in step]
+
+
+class Command(BaseCommand):
+    help = (
+        "Visit every page in the site's URLs as someone with a bit of "
+        "everything, and report the queries each one runs that scan whole "
+        "tables, sort without an index, or run again and again. It works on "
+        "copies of the database and cache, which it throws away afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rolls",
+            type=int,
+            default=50,
+            help="How many rolls to give the seeded user",
+        )
+        parser.add_argument(
+            "--repeats",
+            type=int,
+            default=3,
+            help="Report queries a page runs at least this many times",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="List the pages without anything to report too",
+        )
+
+    def handle(self, *args, **kwargs):
+        if not connection.vendor == "sqlite":
+            raise CommandError("Only SQLite query plans can be read.")
+
+        with (
+            override_settings(
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+                EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+                SERVER_TIMING_SAMPLE_RATE=0,
+            ),
+            copy_of_everything(),
+        ):
+            seeded = Seeded(kwargs["rolls"])
+            client = Client()
+            client.force_login(seeded.user)
+
+            # The pages that are only for POSTs or htmx say so in the report.
+            request_logger = logging.getLogger("django.request")
+            request_logger.disabled = True
+            try:
+                pages = [
+                    self.visit(client, seeded, pattern) for pattern in self.patterns()
+                ]
+            finally:
+                request_logger.disabled = False
+            pages = [page for page in pages if page]
+
+            self.rows = {}
+            with connection.cursor() as cursor:
+                for page in pages:
+                    for query in page["queries"]:
+                        if query.sql.lstrip().upper().startswith("SELECT"):
+                            query.explain(cursor)
+                    page["cost"] = sum(
+                        self.cost(cursor, query) for query in page["queries"]
+                    )
+
+        for page in sorted(pages, key=lambda page: page["cost"], reverse=True):
+            self.report(page, kwargs["repeats"], kwargs["all"])
+
+    def patterns(self):
+        "Every page in ROOT_URLCONF itself, not the ones it includes."
+
+        urlconf = import_module(settings.ROOT_URLCONF)
+        return [
+            pattern
+            for pattern in urlconf.urlpatterns
+            if isinstance(pattern, URLPattern)
+        ]
+
+    def visit(self, client, seeded, pattern):
+        url_kwargs = seeded.kwargs(pattern)
+        if url_kwargs is None:
+            self.stderr.write(f"Skipped {pattern.pattern}: no values for its URL")
+            return None
+        if pattern.name:
+            url = reverse(pattern.name, kwargs=url_kwargs)
+        else:
+            url = f"/{pattern.pattern}"
+
+        queries = []
+
+        def capture(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                queries.append(Query(sql, params, time.perf_counter() - start))
+
+        with connection.execute_wrapper(capture):
+            response = client.get(url)
+
+        return {
+            "name": pattern.name or str(pattern.pattern),
+            "url": url,
+            "status": response.status_code,
+            "queries": queries,
+        }
+
+    def cost(self, cursor, query):
+        cost = 1 + temp_b_tree_cost * len(query.temp_b_trees())
+        for table in query.scans():
+            if table not in self.rows:
+                cursor.execute(f'SELECT count(*) FROM "{table}"')
+                self.rows[table] = cursor.fetchone()[0]
+            cost += self.rows[table]
+        return cost
+
+    def report(self, page, repeats, everything):
+        queries = page["queries"]
+        findings = []
+
+        counts = Counter(query.sql for query in queries)
+        for sql, count in counts.most_common():
+            if count >= repeats:
+                findings.append(f"{count}× the same query: {self.short(sql)}")
+
+        reported = set()
+        for query in queries:
+            if query.sql in reported:
+                continue
+            for table in query.scans():
+                findings.append(
+                    f"Scans {table} ({self.rows[table]} rows): {self.short(query.sql)}"
+                )
+                reported.add(query.sql)
+            for step in query.temp_b_trees():
+                findings.append(f"{step.capitalize()}: {self.short(query.sql)}")
+                reported.add(query.sql)
+
+        if not findings and not everything:
+            return
+
+        milliseconds = sum(query.duration for query in queries) * 1000
+        self.stdout.write(
+            self.style.MIGRATE_HEADING(
+                f"{page['name']} ({page['url']}, {page['status']}): cost "
+                f"{page['cost']}, {len(queries)} queries, {milliseconds:.1f} ms"
+            )
+        )
+        for finding in findings:
+            self.stdout.write(f"  {finding}")
+
+    def short(self, sql, length=160):
+        sql = " ".join(sql.split())
+        return sql if len(sql) <= length else f"{sql[:length]}…"
@@ -0,0 +1,26 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from inventory.archive import RestoreError, restore, summary
+
+
+class Command(BaseCommand):
+    help = "Restore an archive from export_account to an account without any data"
+
+    def add_arguments(self, parser):
+        parser.add_argument("username", help="Whose account to restore it to")
+        parser.add_argument("path", help="The archive (a .zip)")
+
+    def handle(self, *args, **kwargs):
+        try:
+            owner = User.objects.get(username=kwargs["username"])
+        except User.DoesNotExist:
+            raise CommandError(
+                f"User with username '{kwargs['username']}' does not exist"
+            )
+
+        try:
+            counts = restore(owner, kwargs["path"])
+        except RestoreError as error:
+            raise CommandError(str(error))
+
+        self.stdout.write(self.style.SUCCESS(summary(counts)))
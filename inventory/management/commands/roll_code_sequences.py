@@ -0,0 +1,27 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from inventory.models import RollCodeSequence
+
+
+class Command(BaseCommand):
+    help = "Seed the roll code sequences from existing roll codes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            type=str,
+            help="Only seed the sequences for the user with this username",
+        )
+
+    def handle(self, *args, **kwargs):
+        owner = None
+        if kwargs["user"]:
+            try:
+                owner = User.objects.get(username=kwargs["user"])
+            except User.DoesNotExist:
+                raise CommandError(
+                    f"User with username '{kwargs['user']}' does not exist"
+                )
+
+        RollCodeSequence.objects.rebuild(owner)
+        self.stdout.write(self.style.SUCCESS("Roll code sequences seeded"))
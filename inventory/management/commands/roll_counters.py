@@ -0,0 +1,48 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from inventory.models import RollCounter
+
+
+class Command(BaseCommand):
+    help = "Check (and rebuild) the roll counters against the Roll table"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Only report counters that don't match, without rebuilding them",
+        )
+        parser.add_argument(
+            "--user",
+            type=str,
+            help="Only check the counters for the user with this username",
+        )
+
+    def handle(self, *args, **kwargs):
+        owner = None
+        if kwargs["user"]:
+            try:
+                owner = User.objects.get(username=kwargs["user"])
+            except User.DoesNotExist:
+                raise CommandError(
+                    f"User with username '{kwargs['user']}' does not exist"
+                )
+
+        if not kwargs["verify"]:
+            RollCounter.objects.rebuild(owner)
+            self.stdout.write(self.style.SUCCESS("Roll counters rebuilt"))
+
+        mismatches = RollCounter.objects.mismatches(owner)
+        for key, expected, actual in mismatches:
+            owner_id, film_id, status, push_pull = key
+            self.stdout.write(
+                self.style.ERROR(
+                    f"User {owner_id}, film {film_id}, {status} {push_pull or '±0'}: "
+                    f"expected {expected}, counted {actual}"
+                )
+            )
+
+        if mismatches:
+            raise CommandError(f"{len(mismatches)} roll counters are off")
+
+        self.stdout.write(self.style.SUCCESS("Roll counters match"))
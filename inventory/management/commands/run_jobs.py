@@ -0,0 +1,49 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from inventory import jobs
+from inventory.cache import recheck_generations
+
+# How often to fail interrupted jobs and delete old ones, in seconds.
+tidy_interval = 60
+
+
+class Command(BaseCommand):
+    help = "Run queued imports and exports, waiting for more unless told not to"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Stop once there aren't any queued jobs left",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=2,
+            help="How many seconds to wait before looking for new jobs again",
+        )
+
+    def handle(self, *args, **kwargs):
+        tidied = None
+
+        while True:
+            # What Django does at the start of every request. With --once
+            # (as in tests) the connection may well be someone else's.
+            if not kwargs["once"]:
+                close_old_connections()
+            recheck_generations()
+
+            if tidied is None or time.monotonic() - tidied > tidy_interval:
+                jobs.fail_stale()
+                jobs.clean_up()
+                tidied = time.monotonic()
+
+            job = jobs.claim()
+            if job:
+                jobs.run(job)
+                self.stdout.write(f"{job}: {job.get_status_display()}")
+            elif kwargs["once"]:
+                break
+            else:
+                time.sleep(kwargs["sleep"])
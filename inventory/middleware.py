@@ -1,4 +1,5 @@
-import pytz
+import functools
+import zoneinfo
 from django.utils import timezone
 from django.conf import settings
 from django.http import HttpResponsePermanentRedirect
@@ -7,24 +8,39 @@ from django.shortcuts import render
 from .models import Profile
 
 
+@functools.cache
+def get_zone(name):
+    "The tzinfo for a zone name, made once per process rather than per request."
+
+    return zoneinfo.ZoneInfo(name)
+
+
 class TimezoneMiddleware:
     """
     Automatically set the timezone to what's set on the User's profile.
+
+    The profile (loaded with the user by `backends.ProfileBackend`) and the
+    zone are on the request too, as `request.profile` and `request.timezone`.
     """
 
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
+        request.profile = None
         if request.user.is_authenticated:
             try:
-                tzname = request.user.profile.timezone
-                if tzname:
-                    timezone.activate(pytz.timezone(tzname))
-                else:
-                    timezone.activate(pytz.timezone(settings.TIME_ZONE))
+                request.profile = request.user.profile
             except Profile.DoesNotExist:
-                timezone.activate(pytz.timezone(settings.TIME_ZONE))
+                pass
+
+        if request.profile and request.profile.timezone:
+            request.timezone = get_zone(request.profile.timezone)
+        else:
+            request.timezone = get_zone(settings.TIME_ZONE)
+
+        if request.user.is_authenticated:
+            timezone.activate(request.timezone)
         else:
             timezone.deactivate()
 
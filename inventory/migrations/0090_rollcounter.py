@@ -0,0 +1,99 @@
+# Generated by Django 5.1.8 on 2026-10-18 10:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_rolls(apps, schema_editor):
+    Roll = apps.get_model("inventory", "Roll")
+    RollCounter = apps.get_model("inventory", "RollCounter")
+
+    RollCounter.objects.bulk_create(
+        [
+            RollCounter(
+                owner_id=row["owner"],
+                film_id=row["film"],
+                status=row["status"],
+                push_pull=row["push_pull"],
+                count=row["count"],
+            )
+            for row in Roll.objects.order_by()
+            .values("owner", "film", "status", "push_pull")
+            .annotate(count=Count("pk"))
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0089_alter_stock_slug"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RollCounter",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("01_storage", "Storage"),
+                            ("02_loaded", "Loaded"),
+                            ("03_shot", "Shot"),
+                            ("04_processing", "Processing"),
+                            ("05_processed", "Processed"),
+                            ("06_scanned", "Scanned"),
+                            ("07_archived", "Archived"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "push_pull",
+                    models.CharField(
+                        blank=True,
+                        choices=[
+                            ("-2", "Pull 2 stops"),
+                            ("-1", "Pull 1 stop"),
+                            ("+1", "Push 1 stop"),
+                            ("+2", "Push 2 stops"),
+                            ("+3", "Push 3 stops"),
+                        ],
+                        max_length=2,
+                    ),
+                ),
+                ("count", models.IntegerField(default=0)),
+                (
+                    "film",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="inventory.film"
+                    ),
+                ),
+                (
+                    "owner",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("owner", "film", "status", "push_pull")},
+            },
+        ),
+        migrations.RunPython(count_rolls, migrations.RunPython.noop),
+    ]
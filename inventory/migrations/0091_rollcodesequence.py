@@ -0,0 +1,95 @@
+# Generated by Django 5.1.8 on 2026-10-18 10:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def seed_sequences(apps, schema_editor):
+    Roll = apps.get_model("inventory", "Roll")
+    RollCodeSequence = apps.get_model("inventory", "RollCodeSequence")
+
+    used = {}
+    for owner_id, format, type, year, code in (
+        Roll.objects.filter(started_on__isnull=False, film__stock__isnull=False)
+        .values_list(
+            "owner", "film__format", "film__stock__type", "started_on__year", "code"
+        )
+        .iterator()
+    ):
+        key = (owner_id, format, type, year)
+        sequence = code.rsplit("-", 1)[-1]
+        count, highest = used.get(key, (0, 0))
+        used[key] = (
+            count + 1,
+            max(highest, int(sequence) if sequence.isdigit() else 0),
+        )
+
+    RollCodeSequence.objects.bulk_create(
+        [
+            RollCodeSequence(
+                owner_id=owner_id,
+                format=format,
+                type=type,
+                year=year,
+                last=max(count, highest),
+            )
+            for (owner_id, format, type, year), (count, highest) in used.items()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0090_rollcounter"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RollCodeSequence",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "format",
+                    models.CharField(
+                        choices=[("135", "35mm"), ("120", "120")], max_length=20
+                    ),
+                ),
+                (
+                    "type",
+                    models.CharField(
+                        choices=[
+                            ("c41", "C41 Color"),
+                            ("bw", "Black and White"),
+                            ("e6", "E6 Color Reversal"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("year", models.PositiveSmallIntegerField()),
+                ("last", models.PositiveIntegerField(default=0)),
+                (
+                    "owner",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("owner", "format", "type", "year")},
+            },
+        ),
+        migrations.RunPython(seed_sequences, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.8 on 2026-10-18 11:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0092_job"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="job",
+            name="data",
+            field=models.CharField(
+                choices=[
+                    ("cameras", "Cameras"),
+                    ("camera-backs", "Camera backs"),
+                    ("projects", "Projects"),
+                    ("rolls", "Rolls"),
+                    ("journals", "Journals"),
+                    ("frames", "Frames"),
+                    ("account", "Whole account"),
+                ],
+                max_length=20,
+            ),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.1.8 on 2026-10-18 12:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0094_tombstone"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="roll",
+            index=models.Index(
+                fields=["owner", "-status", "ended_on", "started_on", "code"],
+                name="roll_owner_status",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="roll",
+            index=models.Index(
+                fields=["owner", "film", "status"], name="roll_owner_film_status"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="roll",
+            index=models.Index(
+                fields=["owner", "project", "status"], name="roll_owner_project_status"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="roll",
+            index=models.Index(
+                condition=models.Q(("status", "01_storage")),
+                fields=["owner", "film", "created_at"],
+                name="roll_storage",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="roll",
+            index=models.Index(
+                condition=models.Q(("status", "02_loaded")),
+                fields=["camera"],
+                name="roll_loaded_camera",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="roll",
+            index=models.Index(
+                condition=models.Q(("status", "02_loaded")),
+                fields=["camera_back"],
+                name="roll_loaded_camera_back",
+            ),
+        ),
+    ]
@@ -3,21 +3,55 @@ import csv
 from django.contrib import messages
 from django.shortcuts import redirect
 from django.urls import reverse
-from django.http import HttpResponse
+from django.http import StreamingHttpResponse
 from .forms import UploadCSVForm
-from .utils import pluralize
+
+
+class Echo(object):
+    "Hands back whatever's written to it, so csv.writer can build lines."
+
+    def write(self, value):
+        return value
 
 
 class WriteCSVMixin(object):
-    def write_csv(self, filename):
-        response = HttpResponse(content_type="text/csv")
+    # Send about this much at a time rather than a line at a time.
+    csv_chunk_size = 64 * 1024
+
+    def write_csv(self, filename, header, rows):
+        """
+        Stream a CSV file of `rows` (best a generator over a queryset's
+        `iterator()`) as it's written, so it never all has to be in memory.
+        """
+
+        response = StreamingHttpResponse(
+            self.csv_chunks(header, rows), content_type="text/csv"
+        )
         response["Content-Disposition"] = f'attachment; filename="{filename}"'
 
-        return {"writer": csv.writer(response), "response": response}
+        return response
+
+    def csv_chunks(self, header, rows):
+        writer = csv.writer(Echo())
+        chunk = [writer.writerow(header)]
+        size = len(chunk[0])
+
+        for row in rows:
+            line = writer.writerow(row)
+            chunk.append(line)
+            size += len(line)
+            if size >= self.csv_chunk_size:
+                yield "".join(chunk)
+                chunk = []
+                size = 0
+
+        yield "".join(chunk)
 
 
 class ReadCSVMixin(object):
-    def read_csv(self, request):
+    def upload_csv(self, request):
+        "The uploaded CSV file, or None (with a message saying why not)."
+
         form = UploadCSVForm(request.POST, request.FILES)
 
         if form.is_valid():
@@ -25,28 +59,28 @@ class ReadCSVMixin(object):
 
             if not csv_file.name.endswith(".csv"):
                 messages.error(request, "Please choose a CSV file.")
-                return False
-
-            data_set = csv_file.read().decode("UTF-8")
-            io_string = io.StringIO(data_set)
+                return None
 
-            return csv.DictReader(io_string, delimiter=",", quotechar='"')
+            return csv_file
         else:
             messages.error(request, "Nope.")
-            return False
+            return None
+
+    def read_csv(self, csv_file):
+        data_set = csv_file.read().decode("UTF-8")
+        io_string = io.StringIO(data_set)
+
+        return csv.DictReader(io_string, delimiter=",", quotechar='"')
 
 
 class RedirectAfterImportMixin(object):
-    def redirect(self, request, count, item):
-        noun = item["noun"]
-        try:
-            url = item["redirect_url"]
-        except KeyError:
-            url = "settings"
-
-        if count:
-            messages.success(request, f"Imported {count} {pluralize(noun, count)}.")
+    def redirect(self, request, report, url="settings"):
+        if report.created:
+            messages.success(request, report.summary)
         else:
-            messages.info(request, f"No {noun}s imported.")
+            messages.info(request, report.summary)
+
+        if report.errors:
+            messages.error(request, report.error_summary)
 
         return redirect(reverse(url))
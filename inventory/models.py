@@ -1,12 +1,26 @@
 import datetime
-from django.db import models
+import shutil
+from pathlib import Path
+from django.db import IntegrityError, models, router, transaction
+from django.db.models import Count, F, Min, Q
 from django.contrib.auth.models import User
 from django.urls import reverse
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
-from .utils import status_number, film_types, film_formats, push_pull_to_db
+from .catalog import forget_catalog
+from .versions import bump_data_versions
+from .utils import (
+    status_number,
+    film_types,
+    film_formats,
+    push_pull_to_db,
+    logbook_facets_cache_key,
+    batched,
+)
 
 
 class Profile(models.Model):
@@ -32,6 +46,9 @@ class Profile(models.Model):
         help_text="This person has given us money",
     )
 
+    # Their settings change how all their pages look.
+    owner_path = "user_id"
+
     def __str__(self):
         return "Settings for %s" % self.user
 
@@ -201,6 +218,87 @@ class Film(models.Model):
             return reverse("film-slug-redirect", args=(self.slug,))
 
 
+@receiver(post_save, sender=Manufacturer)
+@receiver(post_delete, sender=Manufacturer)
+@receiver(post_save, sender=Stock)
+@receiver(post_delete, sender=Stock)
+@receiver(post_save, sender=Film)
+@receiver(post_delete, sender=Film)
+def catalog_changed(sender, **kwargs):
+    forget_catalog()
+
+
+def owner_id_of(instance):
+    "Follow a model's `owner_path` from one of its rows to its owner's id."
+
+    value = instance
+    for name in instance.owner_path.split("__"):
+        value = getattr(value, name)
+    return value
+
+
+def owner_ids_of(model, objs):
+    """
+    The owners of a lot of rows at once. Where the first step of the
+    `owner_path` isn't already loaded, it's looked up in bulk rather than
+    a row at a time.
+    """
+
+    first, _, rest = model.owner_path.partition("__")
+    if not rest:
+        return {getattr(obj, first) for obj in objs}
+
+    field = model._meta.get_field(first)
+    owner_ids = set()
+    missing = set()
+    for obj in objs:
+        if field.is_cached(obj):
+            owner_ids.add(owner_id_of(obj))
+        else:
+            missing.add(getattr(obj, field.attname))
+
+    for pks in batched(missing):
+        owner_ids.update(
+            field.related_model.objects.filter(pk__in=pks).values_list(rest, flat=True)
+        )
+
+    return owner_ids
+
+
+class OwnedQuerySet(models.QuerySet):
+    """
+    For models whose rows belong to a user (through `owner_path`), giving
+    everyone whose rows are written in bulk a new data version. Saves and
+    deletes of single rows go through the `owned_data_changed` receiver.
+    """
+
+    def owner_ids(self):
+        return set(
+            self.order_by().values_list(self.model.owner_path, flat=True).distinct()
+        )
+
+    def update(self, **kwargs):
+        # As save() would, so delta exports see rows changed in bulk too.
+        kwargs.setdefault("updated_at", timezone.now())
+
+        with transaction.atomic():
+            owner_ids = self.owner_ids()
+            count = super().update(**kwargs)
+            # Rows can be handed to someone else, too.
+            if "owner" in kwargs:
+                owner_ids.add(getattr(kwargs["owner"], "pk", kwargs["owner"]))
+            if "owner_id" in kwargs:
+                owner_ids.add(kwargs["owner_id"])
+            bump_data_versions(owner_ids)
+
+        return count
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        bump_data_versions(owner_ids_of(self.model, objs))
+        return objs
+
+
 class Camera(models.Model):
     """
     A person's camera.
@@ -237,6 +335,9 @@ class Camera(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = OwnedQuerySet.as_manager()
+    owner_path = "owner_id"
+
     class Meta:
         unique_together = (("owner", "name"),)
         ordering = ["status", "name"]
@@ -288,6 +389,9 @@ class CameraBack(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = OwnedQuerySet.as_manager()
+    owner_path = "camera__owner_id"
+
     def __str__(self):
         return "%s, Back “%s”" % (self.camera, self.name)
 
@@ -322,6 +426,9 @@ class Project(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = OwnedQuerySet.as_manager()
+    owner_path = "owner_id"
+
     class Meta:
         unique_together = (("owner", "name"),)
         ordering = ["-status"]
@@ -339,6 +446,158 @@ class Project(models.Model):
         ).count()
 
 
+def forget_logbook_facets(owner_ids):
+    """
+    Drop the cached logbook counts for these owners now and again once the
+    current transaction commits, so a request that read the old rows in the
+    meantime can't leave them cached.
+    """
+    keys = [logbook_facets_cache_key(owner_id) for owner_id in set(owner_ids)]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def touch_projects(project_ids):
+    """
+    A project's row in exports lists its rolls (with their codes, films and
+    statuses), so give it a new updated_at when they change.
+    """
+    project_ids = set(project_ids) - {None}
+    if project_ids:
+        Project.objects.filter(pk__in=project_ids).update(updated_at=timezone.now())
+
+
+class RollQuerySet(OwnedQuerySet):
+    # Changing any of these moves a roll from one RollCounter to another.
+    counted_fields = {"owner", "owner_id", "film", "film_id", "status", "push_pull"}
+    # Changing any of these changes the counts on the logbook filters.
+    faceted_fields = counted_fields | {"started_on"}
+    # Changing any of these changes the roll's project's row in exports.
+    project_row_fields = {"project", "project_id", "film", "film_id", "status", "code"}
+
+    def update(self, **kwargs):
+        # The data versions are looked after by OwnedQuerySet.
+        faceted = self.faceted_fields.intersection(kwargs)
+        in_projects = self.project_row_fields.intersection(kwargs)
+        if not faceted and not in_projects:
+            return super().update(**kwargs)
+
+        counted = self.counted_fields.intersection(kwargs)
+        with transaction.atomic():
+            # The update might change what the original filters match, so
+            # hang on to exactly which rolls are being changed.
+            rolls = Roll.objects.filter(pk__in=list(self.values_list("pk", flat=True)))
+            owner_ids = set(rolls.values_list("owner_id", flat=True))
+            if in_projects:
+                project_ids = set(rolls.values_list("project_id", flat=True))
+            if counted:
+                RollCounter.objects.adjust_for(rolls, -1)
+            count = super().update(**kwargs)
+            if counted:
+                RollCounter.objects.adjust_for(rolls, 1)
+            if {"owner", "owner_id"}.intersection(kwargs):
+                owner_ids.update(rolls.values_list("owner_id", flat=True))
+            if faceted:
+                forget_logbook_facets(owner_ids)
+            if in_projects:
+                # The projects they were in, and any they're in now.
+                project_ids.update(rolls.values_list("project_id", flat=True))
+                touch_projects(project_ids)
+
+        return count
+
+    def bulk_create(self, objs, *args, **kwargs):
+        with transaction.atomic():
+            objs = super().bulk_create(objs, *args, **kwargs)
+            keys = {}
+            for obj in objs:
+                key = obj.counter_key()
+                keys[key] = keys.get(key, 0) + 1
+            for key, count in keys.items():
+                RollCounter.objects.adjust(*key, count)
+            forget_logbook_facets(obj.owner_id for obj in objs)
+            touch_projects(obj.project_id for obj in objs)
+
+        return objs
+
+    def transition(self, pks, status, **changes):
+        """
+        Move the rolls with these pks (out of this queryset, so usually
+        someone's rolls) to a status past loaded all at once, following the
+        rules `Roll.save` applies one roll at a time: finished rolls get an
+        `ended_on` and are unloaded from any camera or back still holding them.
+        `changes` are any other fields to set on every roll.
+
+        Returns the outcome for each pk: "updated" or "not found".
+        """
+
+        loaded = status_number("loaded")
+        if status in (status_number("storage"), loaded):
+            raise ValueError("Rolls can only be moved past loaded in bulk.")
+
+        outcomes = {pk: "not found" for pk in pks}
+        ids = {}
+        for pk in pks:
+            try:
+                ids[int(pk)] = pk
+            except (TypeError, ValueError):
+                pass
+
+        today = datetime.date.today()
+        now = timezone.now()
+
+        with transaction.atomic():
+            rolls = list(self.filter(pk__in=ids))
+            finishing = {
+                roll.pk: roll for roll in rolls if roll.code and roll.ended_on is None
+            }
+
+            # A camera or back is only emptied if the roll it has loaded (the
+            # first, if there's somehow more than one) is one that's finishing.
+            for field, model in (("camera", Camera), ("camera_back", CameraBack)):
+                holders = {getattr(roll, f"{field}_id") for roll in finishing.values()}
+                first_loaded = (
+                    Roll.objects.filter(
+                        **{f"{field}__in": holders - {None}},
+                        **{f"{field}__status": "loaded"},
+                        status=loaded,
+                    )
+                    .order_by()
+                    .values(field)
+                    .annotate(first=Min("pk"))
+                )
+                model.objects.filter(
+                    pk__in=[
+                        row[field] for row in first_loaded if row["first"] in finishing
+                    ]
+                ).update(status="empty", updated_at=now)
+
+            bulk = []
+            for roll in rolls:
+                roll.status = status
+                for field, value in changes.items():
+                    setattr(roll, field, value)
+
+                if not roll.code:
+                    # Rolls get their codes when they're loaded, so this is
+                    # rare enough to leave to save().
+                    roll.save()
+                else:
+                    if roll.pk in finishing:
+                        roll.ended_on = today
+                    roll.updated_at = now
+                    bulk.append(roll)
+
+                outcomes[ids[roll.pk]] = "updated"
+
+            # This goes through update() above, which keeps the counters right.
+            Roll.objects.bulk_update(
+                bulk, ["status", "ended_on", "updated_at", *changes], batch_size=500
+            )
+
+        return outcomes
+
+
 class Roll(models.Model):
     STATUS_CHOICES = (
         ("01_storage", "Storage"),
@@ -420,6 +679,45 @@ class Roll(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = RollQuerySet.as_manager()
+    owner_path = "owner_id"
+
+    class Meta:
+        # For the pages everyone looks at most. test_indexes.py checks that
+        # they're used.
+        indexes = [
+            # Someone's rolls by status. Read backwards, it's in the logbook's
+            # order (`logbook_ordering`, then newest first) with no sorting.
+            models.Index(
+                fields=["owner", "-status", "ended_on", "started_on", "code"],
+                name="roll_owner_status",
+            ),
+            models.Index(
+                fields=["owner", "film", "status"], name="roll_owner_film_status"
+            ),
+            models.Index(
+                fields=["owner", "project", "status"],
+                name="roll_owner_project_status",
+            ),
+            # The oldest roll of a film in storage, to load or add to a project.
+            models.Index(
+                fields=["owner", "film", "created_at"],
+                condition=Q(status=status_number("storage")),
+                name="roll_storage",
+            ),
+            # What's loaded in a camera or back.
+            models.Index(
+                fields=["camera"],
+                condition=Q(status=status_number("loaded")),
+                name="roll_loaded_camera",
+            ),
+            models.Index(
+                fields=["camera_back"],
+                condition=Q(status=status_number("loaded")),
+                name="roll_loaded_camera_back",
+            ),
+        ]
+
     def __str__(self):
         if self.code is not None and self.started_on:
             return "%s / %s" % (self.code, self.started_on.strftime("%Y"))
@@ -450,6 +748,29 @@ class Roll(models.Model):
                 "+3": self.film.iso * 8,
             }[self.push_pull]
 
+    def counter_key(self):
+        return (self.owner_id, self.film_id, self.status, self.push_pull)
+
+    def saved_values(self, *fields):
+        """
+        These fields as they are in the row now. Inside a transaction, which
+        holds the write lock (see inventory/sqlite/), nobody else can change
+        them before this one's done, whatever's happened since it was loaded.
+        """
+
+        return (
+            Roll.objects.using(router.db_for_write(Roll, instance=self))
+            .filter(pk=self.pk)
+            .values_list(*fields)
+            .first()
+        )
+
+    def saved_counter_key(self):
+        "The RollCounter the row is tallied in now."
+
+        return self.saved_values("owner_id", "film_id", "status", "push_pull")
+
+    @transaction.atomic
     def save(self, *args, **kwargs):
         # Adjust push_pull to translate from the [type=number] field to the proper
         # PUSH_PULL_CHOICES options.
@@ -462,16 +783,14 @@ class Roll(models.Model):
         #
         # 1. Get the format from `film.format`
         # 2. Get the type from `film.type`
-        # 3. Query the Roll table to count everything with that format and type
-        #    within the year of the `started_on` field. Add one to that number.
+        # 3. Take the next number in this person's sequence for that format and
+        #    type within the year of the `started_on` field.
         if not self.code and self.started_on:
-            sequence = (
-                Roll.objects.filter(film__stock__type=self.film.stock.type)
-                .filter(film__format=self.film.format)
-                .filter(started_on__year=self.started_on.year)
-                .filter(owner=self.owner)
-                .count()
-                + 1
+            sequence = RollCodeSequence.objects.allocate(
+                self.owner_id,
+                self.film.format,
+                self.film.stock.type,
+                self.started_on.year,
             )
 
             format = "35" if self.film.format == "135" else self.film.format
@@ -548,12 +867,283 @@ class Roll(models.Model):
             self.started_on = None
             self.ended_on = None
 
+        # The counter key, then the rest of what's in its project's export row.
+        saved = (
+            None
+            if self._state.adding
+            else self.saved_values(
+                "owner_id", "film_id", "status", "push_pull", "project_id", "code"
+            )
+        )
+        old_key = saved[:4] if saved else None
+
         super().save(*args, **kwargs)
 
+        new_key = self.counter_key()
+        if old_key != new_key:
+            if old_key:
+                RollCounter.objects.adjust(*old_key, -1)
+            RollCounter.objects.adjust(*new_key, 1)
+        owner_ids = {self.owner_id}
+        if old_key:
+            owner_ids.add(old_key[0])
+        forget_logbook_facets(owner_ids)
+        if saved != (*new_key, self.project_id, self.code):
+            touch_projects([saved[4] if saved else None, self.project_id])
+
     def get_absolute_url(self):
         return reverse("roll-detail", args=(self.id,))
 
 
+@receiver(pre_delete, sender=Roll)
+def read_roll_counter_key(sender, instance, origin=None, **kwargs):
+    # A deleted account's counters go with it.
+    if not isinstance(origin, User):
+        instance._deleted_counter_key = instance.saved_counter_key()
+
+
+@receiver(post_delete, sender=Roll)
+def decrement_roll_counter(sender, instance, **kwargs):
+    key = getattr(instance, "_deleted_counter_key", None)
+    if key:
+        RollCounter.objects.adjust(*key, -1)
+        touch_projects([instance.project_id])
+    forget_logbook_facets([instance.owner_id])
+
+
+class RollCounterManager(models.Manager):
+    def adjust(self, owner_id, film_id, status, push_pull, by):
+        "Add `by` (which can be negative) to the count for a single key."
+
+        key = {
+            "owner_id": owner_id,
+            "film_id": film_id,
+            "status": status,
+            "push_pull": push_pull,
+        }
+
+        if self.filter(**key).update(count=F("count") + by) or by < 0:
+            return
+
+        try:
+            with transaction.atomic():
+                self.create(count=by, **key)
+        except IntegrityError:
+            # Someone else created it first.
+            self.filter(**key).update(count=F("count") + by)
+
+    def adjust_for(self, rolls, sign):
+        "Add (sign=1) or remove (sign=-1) a queryset of rolls from the counts."
+
+        for row in self.tally(rolls):
+            self.adjust(
+                row["owner"],
+                row["film"],
+                row["status"],
+                row["push_pull"],
+                sign * row["count"],
+            )
+
+    def tally(self, rolls):
+        return (
+            rolls.order_by()
+            .values("owner", "film", "status", "push_pull")
+            .annotate(count=Count("pk"))
+        )
+
+    def rebuild(self, owner=None):
+        "Recount everything (or everything for one person) from the Roll table."
+
+        counters = self.all()
+        rolls = Roll.objects.all()
+        if owner is not None:
+            counters = counters.filter(owner=owner)
+            rolls = rolls.filter(owner=owner)
+
+        with transaction.atomic():
+            counters.delete()
+            self.bulk_create(
+                [
+                    RollCounter(
+                        owner_id=row["owner"],
+                        film_id=row["film"],
+                        status=row["status"],
+                        push_pull=row["push_pull"],
+                        count=row["count"],
+                    )
+                    for row in self.tally(rolls)
+                ],
+                batch_size=500,
+            )
+
+    def mismatches(self, owner=None):
+        """
+        Compare the counters to the Roll table and return a list of
+        (key, expected, actual) for any that are off.
+        """
+
+        counters = self.all()
+        rolls = Roll.objects.all()
+        if owner is not None:
+            counters = counters.filter(owner=owner)
+            rolls = rolls.filter(owner=owner)
+
+        expected = {
+            (row["owner"], row["film"], row["status"], row["push_pull"]): row["count"]
+            for row in self.tally(rolls)
+        }
+        actual = {
+            (c.owner_id, c.film_id, c.status, c.push_pull): c.count
+            for c in counters
+            if c.count
+        }
+
+        return [
+            (key, expected.get(key, 0), actual.get(key, 0))
+            for key in sorted(expected.keys() | actual.keys(), key=str)
+            if expected.get(key, 0) != actual.get(key, 0)
+        ]
+
+
+class RollCounter(models.Model):
+    """
+    A running count of someone's rolls of a film with a given status and
+    push/pull, kept up to date whenever rolls are saved, updated or deleted
+    so that pages with counts don't have to count the Roll table.
+
+    `manage.py roll_counters` checks and rebuilds them.
+    """
+
+    owner = models.ForeignKey(User, on_delete=models.CASCADE)
+    film = models.ForeignKey(Film, on_delete=models.CASCADE)
+    status = models.CharField(max_length=20, choices=Roll.STATUS_CHOICES)
+    push_pull = models.CharField(
+        max_length=2, choices=Roll.PUSH_PULL_CHOICES, blank=True
+    )
+    count = models.IntegerField(default=0)
+
+    objects = RollCounterManager()
+
+    class Meta:
+        unique_together = (("owner", "film", "status", "push_pull"),)
+
+    def __str__(self):
+        return f"{self.count} × {self.film} ({self.status}) for {self.owner}"
+
+
+def code_sequence(code):
+    "The sequence number at the end of a roll code, or 0 if it doesn't have one."
+
+    sequence = code.rsplit("-", 1)[-1]
+    return int(sequence) if sequence.isdigit() else 0
+
+
+class RollCodeSequenceManager(models.Manager):
+    def allocate(self, owner_id, format, type, year):
+        """
+        Claim the next sequence number for a key. Call this inside the
+        transaction that saves the roll so the number is only used once.
+        """
+
+        key = {"owner_id": owner_id, "format": format, "type": type, "year": year}
+
+        if not self.filter(**key).update(last=F("last") + 1):
+            # First roll for this key since the sequences were seeded.
+            rolls = Roll.objects.filter(
+                owner_id=owner_id,
+                film__format=format,
+                film__stock__type=type,
+                started_on__year=year,
+            )
+            try:
+                with transaction.atomic():
+                    used = self.used(rolls).get((owner_id, format, type, year), 0)
+                    self.create(last=used + 1, **key)
+            except IntegrityError:
+                # Someone else created it first.
+                self.filter(**key).update(last=F("last") + 1)
+
+        return self.filter(**key).values_list("last", flat=True).get()
+
+    def used(self, rolls):
+        """
+        The highest sequence number already taken for each key by a queryset
+        of rolls: the most rolls started or the biggest number in their codes,
+        whichever is more.
+        """
+
+        used = {}
+        rows = rolls.filter(started_on__isnull=False, film__stock__isnull=False)
+        for owner_id, format, type, year, code in rows.values_list(
+            "owner", "film__format", "film__stock__type", "started_on__year", "code"
+        ):
+            key = (owner_id, format, type, year)
+            count, highest = used.get(key, (0, 0))
+            used[key] = (count + 1, max(highest, code_sequence(code)))
+
+        return {key: max(count, highest) for key, (count, highest) in used.items()}
+
+    def rebuild(self, owner=None):
+        """
+        Seed the sequences (or one person's) from their existing rolls,
+        never winding one back.
+        """
+
+        sequences = self.all()
+        rolls = Roll.objects.all()
+        if owner is not None:
+            sequences = sequences.filter(owner=owner)
+            rolls = rolls.filter(owner=owner)
+
+        with transaction.atomic():
+            existing = {
+                (s.owner_id, s.format, s.type, s.year): s
+                for s in sequences.select_for_update()
+            }
+            created = []
+            for key, last in self.used(rolls).items():
+                if key in existing:
+                    existing[key].last = max(existing[key].last, last)
+                else:
+                    owner_id, format, type, year = key
+                    created.append(
+                        RollCodeSequence(
+                            owner_id=owner_id,
+                            format=format,
+                            type=type,
+                            year=year,
+                            last=last,
+                        )
+                    )
+
+            self.bulk_update(existing.values(), ["last"], batch_size=500)
+            self.bulk_create(created, batch_size=500)
+
+
+class RollCodeSequence(models.Model):
+    """
+    The last sequence number handed out for someone's roll codes of a format
+    and type in a year, so codes don't need the Roll table counted and
+    aren't reused when rolls are deleted.
+
+    `manage.py roll_code_sequences` seeds them from existing codes.
+    """
+
+    owner = models.ForeignKey(User, on_delete=models.CASCADE)
+    format = models.CharField(max_length=20, choices=film_formats)
+    type = models.CharField(max_length=20, choices=film_types)
+    year = models.PositiveSmallIntegerField()
+    last = models.PositiveIntegerField(default=0)
+
+    objects = RollCodeSequenceManager()
+
+    class Meta:
+        unique_together = (("owner", "format", "type", "year"),)
+
+    def __str__(self):
+        return f"{self.format} {self.type} {self.year} for {self.owner}: {self.last}"
+
+
 class Journal(models.Model):
     roll = models.ForeignKey(Roll, on_delete=models.CASCADE)
     date = models.DateField(default=datetime.date.today)
@@ -562,6 +1152,9 @@ class Journal(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = OwnedQuerySet.as_manager()
+    owner_path = "roll__owner_id"
+
     class Meta:
         verbose_name = "journal entry"
         verbose_name_plural = "journal entries"
@@ -601,8 +1194,178 @@ class Frame(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = OwnedQuerySet.as_manager()
+    owner_path = "roll__owner_id"
+
     class Meta:
         unique_together = (("roll", "number"),)
 
     def __str__(self):
         return f"Frame #{self.number} of {self.roll}"
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_save, sender=Camera)
+@receiver(post_delete, sender=Camera)
+@receiver(post_save, sender=CameraBack)
+@receiver(post_delete, sender=CameraBack)
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+@receiver(post_save, sender=Roll)
+@receiver(post_delete, sender=Roll)
+@receiver(post_save, sender=Journal)
+@receiver(post_delete, sender=Journal)
+@receiver(post_save, sender=Frame)
+@receiver(post_delete, sender=Frame)
+def owned_data_changed(sender, instance, origin=None, **kwargs):
+    # Rows deleted along with something else are covered by whatever that was.
+    if isinstance(origin, models.Model) and origin is not instance:
+        return
+
+    bump_data_versions([owner_id_of(instance)])
+
+
+@receiver(m2m_changed, sender=Project.cameras.through)
+def project_cameras_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # The instance is either the project or the camera, both the same owner's.
+    if action.startswith("post_"):
+        bump_data_versions([instance.owner_id])
+
+        # A project's cameras are part of its row in exports.
+        projects = [instance.pk] if not reverse else pk_set or []
+        Project.objects.filter(pk__in=projects).update(updated_at=timezone.now())
+
+
+class Tombstone(models.Model):
+    """
+    A row someone deleted, so delta exports (see inventory/exports.py) can
+    say so. They're kept for `exports.tombstones_kept`.
+    """
+
+    owner = models.ForeignKey(User, on_delete=models.CASCADE)
+    # The name of the export the row was in.
+    data = models.CharField(max_length=20)
+    object_id = models.PositiveIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["owner", "data", "deleted_at"])]
+
+    def __str__(self):
+        return f"{self.data} {self.object_id} for {self.owner}"
+
+
+tombstone_data = {
+    Camera: "cameras",
+    CameraBack: "camera-backs",
+    Project: "projects",
+    Roll: "rolls",
+    Journal: "journals",
+    Frame: "frames",
+}
+
+
+@receiver(post_delete, sender=Camera)
+@receiver(post_delete, sender=CameraBack)
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=Roll)
+@receiver(post_delete, sender=Journal)
+@receiver(post_delete, sender=Frame)
+def record_tombstone(sender, instance, origin=None, **kwargs):
+    # Nobody's left to tell when a whole account is deleted.
+    if isinstance(origin, User):
+        return
+
+    # Rows deleted along with something else belong to the same person.
+    if isinstance(origin, models.Model) and hasattr(origin, "owner_path"):
+        owner_id = owner_id_of(origin)
+    else:
+        owner_id = owner_id_of(instance)
+
+    Tombstone.objects.create(
+        owner_id=owner_id, data=tombstone_data[sender], object_id=instance.pk
+    )
+
+
+@receiver(pre_delete, sender=Camera)
+@receiver(pre_delete, sender=CameraBack)
+@receiver(pre_delete, sender=Project)
+def touch_rolls_losing_a_reference(sender, instance, origin=None, **kwargs):
+    # Deleting these sets the rolls' references to NULL without saving them, so
+    # give the rolls a new updated_at for delta exports to find them by.
+    if isinstance(origin, User):
+        return
+
+    field = {Camera: "camera", CameraBack: "camera_back", Project: "project"}[sender]
+    Roll.objects.filter(**{field: instance}).update(updated_at=timezone.now())
+
+
+class Job(models.Model):
+    """
+    An import or export run by `manage.py run_jobs` rather than in a request,
+    with its file kept in `settings.JOBS_DIR` until the job is cleaned up.
+    """
+
+    ACTION_CHOICES = [
+        ("import", "Import"),
+        ("export", "Export"),
+    ]
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+    # The names of the exports and imports.
+    DATA_CHOICES = [
+        ("cameras", "Cameras"),
+        ("camera-backs", "Camera backs"),
+        ("projects", "Projects"),
+        ("rolls", "Rolls"),
+        ("journals", "Journals"),
+        ("frames", "Frames"),
+        # All of them, in one archive (see inventory/archive.py).
+        ("account", "Whole account"),
+    ]
+
+    owner = models.ForeignKey(User, on_delete=models.CASCADE)
+    action = models.CharField(max_length=20, choices=ACTION_CHOICES)
+    data = models.CharField(max_length=20, choices=DATA_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="queued")
+    # Rows so far, out of how many.
+    done = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(null=True, blank=True)
+    # What `ImportReport.as_dict` returns, for imports.
+    report = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["status", "created_at"])]
+
+    def __str__(self):
+        return f"{self.get_data_display()} {self.action} for {self.owner}"
+
+    @property
+    def path(self):
+        "The uploaded file for an import, or the finished file for an export."
+
+        extension = "zip" if self.data == "account" else "csv"
+        return Path(settings.JOBS_DIR) / str(self.pk) / f"{self.data}.{extension}"
+
+    @property
+    def finished(self):
+        return self.status in ("done", "failed")
+
+    @property
+    def percent(self):
+        return round(self.done / self.total * 100) if self.total else 0
+
+
+@receiver(post_delete, sender=Job)
+def delete_job_files(sender, instance, **kwargs):
+    shutil.rmtree(instance.path.parent, ignore_errors=True)
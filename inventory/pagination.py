@@ -0,0 +1,222 @@
+import base64
+import json
+from collections.abc import Sequence
+from functools import reduce
+from math import ceil
+from operator import or_
+from django.core.exceptions import ValidationError
+from django.core.paginator import Page, Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+
+# The order of the logbook tables.
+logbook_ordering = ["status", "-ended_on", "-started_on", "-code"]
+
+
+class NumberedPage(Page):
+    "A regular page that knows how to link to its neighbours."
+
+    @property
+    def querystring(self):
+        return f"page={self.number}" if self.number > 1 else ""
+
+    @property
+    def next_querystring(self):
+        return f"page={self.next_page_number()}"
+
+    @property
+    def previous_querystring(self):
+        return f"page={self.previous_page_number()}"
+
+    @property
+    def page_range(self):
+        return self.paginator.get_elided_page_range(number=self.number)
+
+
+class NumberedPaginator(Paginator):
+    def _get_page(self, *args, **kwargs):
+        return NumberedPage(*args, **kwargs)
+
+
+class CursorPage(Sequence):
+    """
+    A page of a `CursorPaginator`. It doesn't know its number or how many
+    pages there are, only the cursors for the pages either side of it.
+    """
+
+    number = None
+    page_range = None
+
+    def __init__(self, object_list, paginator, cursor, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.cursor = cursor
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f"<Page after {self.cursor or 'the start'}>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def querystring(self):
+        return f"cursor={self.cursor}" if self.cursor else ""
+
+    @property
+    def next_querystring(self):
+        return f"cursor={self.next_cursor}"
+
+    @property
+    def previous_querystring(self):
+        return f"cursor={self.previous_cursor}"
+
+
+class CursorPaginator:
+    """
+    Pages through a queryset by the values of its ordering (keyset pagination)
+    so turning a page is a single indexed query however deep it is, rather
+    than an OFFSET plus a COUNT of everything.
+
+    The cursor is an opaque token holding the sort key of the row at the edge
+    of the current page. If the caller already knows how many rows there are
+    (from counters, say) and there aren't many pages, it falls back to plain
+    numbered pages.
+
+    Nulls sort first going up and last going down, which is what SQLite does
+    anyway.
+    """
+
+    cursor_param = "cursor"
+    page_param = "page"
+    max_numbered_pages = 20
+
+    def __init__(self, object_list, per_page, ordering, count=None):
+        self.object_list = object_list
+        self.per_page = per_page
+        self.count = count
+        self.ordering = [(name.lstrip("-"), name.startswith("-")) for name in ordering]
+        # Tie-break on the primary key so every row has a unique position.
+        if not any(name == "pk" for name, descending in self.ordering):
+            self.ordering.append(("pk", True))
+
+        opts = object_list.model._meta
+        self.fields = [
+            opts.pk if name == "pk" else opts.get_field(name)
+            for name, descending in self.ordering
+        ]
+
+    def get_page(self, params):
+        "Return the page for a request's GET parameters."
+
+        cursor = params.get(self.cursor_param)
+        if cursor:
+            try:
+                previous, values = self.decode(cursor)
+            except (ValueError, TypeError, ValidationError):
+                pass
+            else:
+                return self.cursor_page(values, previous, cursor)
+
+        if (
+            self.count is not None
+            and ceil(self.count / self.per_page) <= self.max_numbered_pages
+        ):
+            paginator = NumberedPaginator(self.sorted(self.ordering), self.per_page)
+            paginator.count = self.count
+            return paginator.get_page(params.get(self.page_param))
+
+        return self.cursor_page()
+
+    def cursor_page(self, values=None, previous=False, cursor=None):
+        ordering = self.ordering
+        if previous:
+            ordering = [(name, not descending) for name, descending in ordering]
+
+        rows = self.sorted(ordering)
+        if values is not None:
+            rows = rows.filter(self.after(ordering, values))
+        rows = list(rows[: self.per_page + 1])
+
+        more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if previous:
+            rows.reverse()
+            has_next, has_previous = values is not None, more
+        else:
+            has_next, has_previous = more, values is not None
+
+        # If the rows either side of the cursor have gone, still offer a way
+        # back from where we are.
+        first = self.key(rows[0]) if rows else values
+        last = self.key(rows[-1]) if rows else values
+
+        return CursorPage(
+            rows,
+            self,
+            cursor,
+            self.encode(last) if has_next else None,
+            self.encode(first, previous=True) if has_previous else None,
+        )
+
+    def sorted(self, ordering):
+        order_by = []
+        for (name, descending), field in zip(ordering, self.fields):
+            if not field.null:
+                order_by.append(f"-{name}" if descending else name)
+            elif descending:
+                order_by.append(F(name).desc(nulls_last=True))
+            else:
+                order_by.append(F(name).asc(nulls_first=True))
+
+        return self.object_list.order_by(*order_by)
+
+    def after(self, ordering, values):
+        "The filter for rows that come after `values` in `ordering`."
+
+        conditions = []
+        equal = Q()
+        for (name, descending), field, value in zip(ordering, self.fields, values):
+            if value is None:
+                # Nulls come first going up and last going down.
+                if not descending:
+                    conditions.append(equal & Q(**{f"{name}__isnull": False}))
+                equal &= Q(**{f"{name}__isnull": True})
+            else:
+                beyond = Q(**{f"{name}__lt" if descending else f"{name}__gt": value})
+                if descending and field.null:
+                    beyond |= Q(**{f"{name}__isnull": True})
+                conditions.append(equal & beyond)
+                equal &= Q(**{name: value})
+
+        return reduce(or_, conditions)
+
+    def key(self, row):
+        return [getattr(row, field.attname) for field in self.fields]
+
+    def encode(self, values, previous=False):
+        data = json.dumps([int(previous), values], cls=DjangoJSONEncoder)
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+    def decode(self, cursor):
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        previous, values = json.loads(data)
+        if len(values) != len(self.fields):
+            raise ValueError("Cursor doesn't match the ordering")
+
+        return bool(previous), [
+            field.to_python(value) for field, value in zip(self.fields, values)
+        ]
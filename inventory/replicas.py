@@ -0,0 +1,204 @@
+"""
+Reading from a copy of the database, so there can be machines other than the
+one with the database on.
+
+A machine's `DATABASE_ROLE` is "primary" (the default), where the database is
+and Litestream replicates it from, or "replica". A replica's database is a
+local copy that `manage.py follow_replica` keeps restoring from the
+primary's Litestream replica, and it's opened read-only.
+
+Wherever there's a "replica" database as well as the "default" one (when
+`REPLICA_DATABASE_URL` is set), `ReplicaRouter` reads from the replica and
+writes to the default one. The copy is behind by however long a copy takes
+(and Litestream's own delay), so someone who has just changed something would
+often not see it. After any request that might have written,
+`ReplicaMiddleware` sets a cookie with the time, and their requests read from
+the default database until `follow_replica` has copied everything from before
+then. The cookie lasts `REPLICA_PIN_SECONDS` at most, in case it never does.
+
+Each machine has its own cache, and a replica's never hears about writes on
+the primary. So `follow_replica` records a new `copy_version()` in it whenever
+a copy changes anything, and whatever's cached from the replica's data (data
+versions in ETags, logbook facets, the catalog) is keyed on that as well.
+
+To try it out locally, with the second process reading from a copy of the
+first's database file:
+
+    ./manage.py runserver 8000
+    export REPLICA_DATABASE_URL=sqlite:///replica.sqlite3
+    ./manage.py follow_replica db.sqlite3 --interval 2 &
+    ./manage.py runserver 8001
+
+(Or have `litestream replicate` write to a `file://` replica and follow that.)
+
+A replica machine can't write at all, so `WriteForwardingMiddleware` sends
+requests that might write, reads pinned after one, and views marked
+`@primary_only` (GETs that write anyway, like logging someone in) to the
+primary. By
+default it answers with a `REPLAY_HEADER` (`fly-replay`) of `PRIMARY_REPLAY`,
+and Fly's proxy replays the request there. Fly only replays bodies of up to
+1 MB or so, so big imports may need to be sent to the primary directly.
+Without a `REPLAY_HEADER` it redirects them to `PRIMARY_URL` with a 307,
+which keeps the method and body. That's how to try it out locally:
+
+    ./manage.py runserver 8000
+    export DATABASE_ROLE=replica DATABASE_URL=sqlite:///replica.sqlite3
+    export REPLAY_HEADER= PRIMARY_URL=http://localhost:8000
+    ./manage.py follow_replica db.sqlite3 --interval 2 &
+    ./manage.py runserver 8001
+
+(Cookies don't mind the port, but the primary needs http://localhost:8001 in
+its CSRF_TRUSTED_ORIGINS.)
+"""
+
+import contextvars
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import HttpResponse, HttpResponseRedirect
+
+replica = "replica"
+pin_cookie = "pin_primary"
+safe_methods = ("GET", "HEAD", "OPTIONS", "TRACE")
+copy_version_key = "replica-copy-version"
+copied_as_of_key = "replica-copied-as-of"
+
+# Whether the request being handled reads from the default database.
+pinned = contextvars.ContextVar("pinned", default=False)
+
+
+def is_replica():
+    return settings.DATABASE_ROLE == "replica"
+
+
+def reads_from_copy():
+    return is_replica() or replica in connections.settings
+
+
+def copy_version():
+    "Which copy of the database this machine reads from, if it's a copy."
+
+    return cache.get(copy_version_key, "") if reads_from_copy() else ""
+
+
+def record_copy(as_of, changed):
+    """
+    Note that the copy now has everything written before `as_of` (a Unix
+    time), and whether the copy just made changed anything.
+    """
+
+    if changed:
+        cache.set(copy_version_key, time.time_ns(), None)
+    cache.set(copied_as_of_key, as_of, None)
+
+
+def primary_only(view):
+    "Mark a view that writes even when it's only asked to read."
+
+    view.primary_only = True
+    return view
+
+
+def needs_primary(request):
+    "Whether a request might write, or has to see what someone just wrote."
+
+    if request.method not in safe_methods:
+        return True
+    try:
+        written = float(request.COOKIES[pin_cookie])
+    except (KeyError, ValueError):
+        return False
+    # Until the copy has caught up with their last write.
+    return cache.get(copied_as_of_key, 0) <= written
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if pinned.get() or replica not in connections.settings:
+            return DEFAULT_DB_ALIAS
+        return replica
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # They're the same database, however far behind.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db != replica
+
+
+class ReplicaMiddleware:
+    """
+    Read from the default database for requests that might write, views
+    that are `@primary_only`, and after writes until the copy has caught up.
+    It goes before anything that reads.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = pinned.set(needs_primary(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            pinned.reset(token)
+
+        if request.method not in safe_methods:
+            response.set_cookie(
+                pin_cookie,
+                f"{time.time():.3f}",
+                max_age=settings.REPLICA_PIN_SECONDS,
+                secure=request.is_secure(),
+                httponly=True,
+                samesite="Lax",
+            )
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Reset along with the rest in __call__.
+        if getattr(view_func, "primary_only", False):
+            pinned.set(True)
+
+
+class WriteForwardingMiddleware:
+    """
+    On a replica, send requests that need the primary there, with a replay
+    header for the proxy or a redirect. It goes before anything that reads.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not is_replica() or not needs_primary(request):
+            return self.get_response(request)
+        return self.forward(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if is_replica() and getattr(view_func, "primary_only", False):
+            return self.forward(request)
+
+    def forward(self, request):
+        header = settings.REPLAY_HEADER
+        if header:
+            # The proxy says where a request it's replayed came from. If it's
+            # landed on a replica again, the primary isn't where it was sent.
+            if f"{header}-src" in request.headers:
+                return HttpResponse("The primary can’t be reached.", status=503)
+            response = HttpResponse(status=409)
+            response[header] = settings.PRIMARY_REPLAY
+            return response
+
+        if settings.PRIMARY_URL:
+            response = HttpResponseRedirect(
+                settings.PRIMARY_URL.rstrip("/") + request.get_full_path()
+            )
+            response.status_code = 307
+            return response
+
+        return HttpResponse("Nowhere to send this to.", status=503)
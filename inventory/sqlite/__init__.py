@@ -0,0 +1,39 @@
+"""
+Django's SQLite backend, tuned for one database file shared by a few web
+workers and `manage.py run_jobs`. Use it with ENGINE "inventory.sqlite".
+
+Each new connection sets the `pragmas` in `base.py` (which OPTIONS["pragmas"]
+can add to or override), chiefly WAL, so reads never wait for writes, and a
+busy timeout, so writes wait their turn rather than fail.
+
+Transactions start with BEGIN IMMEDIATE, taking the write lock up front. A
+deferred transaction that reads and then writes can't wait for the lock if
+someone else wrote in between; it fails with "database is locked" straight
+away, whatever the busy timeout. `read_transaction()` is for long reads that
+shouldn't hold the lock.
+
+OPTIONS["read_only"] opens the file read-only instead, for a replica of the
+database that only `manage.py follow_replica` writes to. See
+inventory/replicas.py.
+"""
+
+import contextlib
+from django.db import transaction
+
+
+@contextlib.contextmanager
+def read_transaction(using=None):
+    """
+    transaction.atomic(), but for reading a consistent snapshot without
+    holding up anyone else's writes, when it's the outermost block.
+    """
+
+    connection = transaction.get_connection(using)
+    # Other backends don't look at this.
+    connection.defer_next_transaction = True
+    try:
+        with transaction.atomic(using):
+            connection.defer_next_transaction = False
+            yield
+    finally:
+        connection.defer_next_transaction = False
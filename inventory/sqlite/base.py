@@ -0,0 +1,43 @@
+from pathlib import Path
+from django.db.backends.sqlite3 import base
+
+# Set on every new connection. cache_size is in KiB when it's negative.
+pragmas = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,
+    "cache_size": -20000,
+    "mmap_size": 128 * 1024 * 1024,
+    "temp_store": "MEMORY",
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    defer_next_transaction = False
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        self.pragmas = {**pragmas, **kwargs.pop("pragmas", {})}
+        read_only = kwargs.pop("read_only", False)
+        if "transaction_mode" not in self.settings_dict["OPTIONS"]:
+            self.transaction_mode = "DEFERRED" if read_only else "IMMEDIATE"
+        if read_only:
+            # It's whatever mode the file it's a copy of is in.
+            self.pragmas.pop("journal_mode", None)
+            kwargs["database"] = (
+                f"{Path(kwargs['database']).resolve().as_uri()}?mode=ro"
+            )
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        if self.defer_next_transaction:
+            self.defer_next_transaction = False
+            self.cursor().execute("BEGIN DEFERRED")
+        else:
+            super()._start_transaction_under_autocommit()
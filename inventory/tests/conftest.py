@@ -1,5 +1,6 @@
 import os
 import pytest
+from django.core.cache import cache
 
 os.environ.setdefault("DJANGO_ALLOW_ASYNC_UNSAFE", "True")
 
@@ -30,6 +31,15 @@ def pytest_collection_modifyitems(config, items):
             item.add_marker(skip_slow)
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """
+    The cache lives outside the test database, so it isn't rolled back with
+    everything else.
+    """
+    cache.clear()
+
+
 @pytest.fixture()
 def test_server(page, live_server):
     page.goto(live_server.url)
@@ -0,0 +1,207 @@
+import datetime
+import io
+import json
+import os
+import tempfile
+import zipfile
+from contextlib import contextmanager
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from model_bakery import baker
+from inventory.archive import RestoreError, restore
+from inventory.models import (
+    Camera,
+    CameraBack,
+    Film,
+    Frame,
+    Job,
+    Journal,
+    Project,
+    Roll,
+    RollCounter,
+    Stock,
+)
+from inventory.utils import status_number
+
+staticfiles_storage = {
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"}
+}
+
+
+@override_settings(STORAGES=staticfiles_storage)
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="test", password="secret")
+        cls.other = User.objects.create_user(username="other", password="secret")
+        cls.film = baker.make(Film, stock=baker.make(Stock, slug="portra-400"))
+        cls.yesterday = timezone.now() - datetime.timedelta(days=1)
+
+        camera = baker.make(Camera, owner=cls.user, name="Nikon", status="loaded")
+        back = baker.make(CameraBack, camera=camera, name="A")
+        project = baker.make(Project, owner=cls.user, name="Trip")
+        project.cameras.add(camera)
+        roll = baker.make(
+            Roll,
+            owner=cls.user,
+            film=cls.film,
+            camera=camera,
+            camera_back=back,
+            project=project,
+            status=status_number("loaded"),
+        )
+        baker.make(Roll, owner=cls.user, film=cls.film, status=status_number("storage"))
+        baker.make(Journal, roll=roll, frame=12)
+        baker.make(Frame, roll=roll, number=1)
+        Roll.objects.filter(owner=cls.user).update(created_at=cls.yesterday)
+
+    def setUp(self):
+        self.client.force_login(user=self.user)
+
+    def export(self):
+        response = self.client.get(reverse("export-account"))
+        self.assertEqual(response["Content-Type"], "application/zip")
+        return response.getvalue()
+
+    def test_export(self):
+        with zipfile.ZipFile(io.BytesIO(self.export())) as archive:
+            manifest = json.loads(archive.read("manifest.json"))
+            rolls = [
+                json.loads(line) for line in archive.read("rolls.jsonl").splitlines()
+            ]
+            films = [
+                json.loads(line) for line in archive.read("films.jsonl").splitlines()
+            ]
+
+        self.assertEqual(
+            manifest["counts"],
+            {
+                "cameras": 1,
+                "camera-backs": 1,
+                "projects": 1,
+                "project-cameras": 1,
+                "rolls": 2,
+                "journals": 1,
+                "frames": 1,
+            },
+        )
+        self.assertNotIn("owner_id", rolls[0])
+        self.assertEqual(
+            films,
+            [
+                {
+                    "id": self.film.pk,
+                    "stock__slug": "portra-400",
+                    "format": "135",
+                    "slug": "",
+                }
+            ],
+        )
+
+    def test_export_queries_dont_grow(self):
+        def queries():
+            with CaptureQueriesContext(connection) as context:
+                self.export()
+            return len(context.captured_queries)
+
+        before = queries()
+        baker.make(Roll, owner=self.user, film=self.film, _quantity=10)
+        self.assertEqual(queries(), before)
+
+    def test_written_before_its_sent(self):
+        # A slow download mustn't hold the snapshot open.
+        transactions = []
+
+        @contextmanager
+        def read_transaction():
+            transactions.append("begun")
+            yield
+            transactions.append("over")
+
+        with mock.patch("inventory.archive.read_transaction", read_transaction):
+            response = self.client.get(reverse("export-account"))
+            self.assertEqual(transactions, ["begun", "over"])
+
+        with zipfile.ZipFile(io.BytesIO(response.getvalue())) as archive:
+            self.assertIn("manifest.json", archive.namelist())
+
+    def test_restore(self):
+        counts = restore(self.other, io.BytesIO(self.export()))
+        self.assertEqual(counts["rolls"], 2)
+
+        roll = Roll.objects.get(owner=self.other, status=status_number("loaded"))
+        camera = Camera.objects.get(owner=self.other)
+        self.assertEqual(roll.camera, camera)
+        self.assertEqual(roll.camera_back.camera, camera)
+        self.assertEqual(roll.project.owner, self.other)
+        self.assertEqual(list(roll.project.cameras.all()), [camera])
+        self.assertEqual(roll.journal_set.get().frame, 12)
+        self.assertEqual(roll.frame_set.get().number, 1)
+        self.assertEqual(roll.film, self.film)
+        self.assertEqual(roll.created_at, self.yesterday)
+
+        # The copy is separate from the original.
+        self.assertEqual(Roll.objects.filter(owner=self.user).count(), 2)
+        self.assertNotEqual(roll.camera_id, Camera.objects.get(owner=self.user).pk)
+        self.assertEqual(RollCounter.objects.mismatches(self.other), [])
+
+    def test_restore_only_to_an_empty_account(self):
+        with self.assertRaisesMessage(RestoreError, "don’t have anything in them"):
+            restore(self.user, io.BytesIO(self.export()))
+
+    def test_restore_is_all_or_nothing(self):
+        data = self.export()
+        self.film.delete()
+
+        with self.assertRaisesMessage(RestoreError, "portra-400"):
+            restore(self.other, io.BytesIO(data))
+        self.assertFalse(Camera.objects.filter(owner=self.other).exists())
+
+        with self.assertRaisesMessage(RestoreError, "isn’t an account archive"):
+            restore(self.other, io.BytesIO(b"Nothing."))
+
+    def test_commands(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "test.zip")
+
+        call_command("export_account", "test", path, stdout=io.StringIO())
+        out = io.StringIO()
+        call_command("restore_account", "other", path, stdout=out)
+
+        self.assertIn(
+            "Restored 1 camera, 1 camera back, 1 project, 2 rolls", out.getvalue()
+        )
+        self.assertEqual(Frame.objects.filter(roll__owner=self.other).count(), 1)
+
+    def test_restore_view(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        data = self.export()
+
+        response = self.client.post(
+            reverse("import-account"),
+            data={"archive": SimpleUploadedFile("test.zip", data)},
+        )
+        self.assertRedirects(response, reverse("settings"))
+        self.assertFalse(Job.objects.exists())
+
+        self.client.force_login(user=self.other)
+        with self.settings(JOBS_DIR=directory.name):
+            response = self.client.post(
+                reverse("import-account"),
+                data={"archive": SimpleUploadedFile("test.zip", data)},
+            )
+            self.assertRedirects(response, reverse("settings") + "#jobs")
+            call_command("run_jobs", once=True, stdout=io.StringIO())
+
+            response = self.client.get(reverse("settings"))
+        self.assertContains(response, "Restored 1 camera, 1 camera back")
+        self.assertEqual(Roll.objects.filter(owner=self.other).count(), 2)
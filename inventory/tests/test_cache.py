@@ -0,0 +1,197 @@
+import os
+import tempfile
+from unittest import mock
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from inventory.cache import TwoTierCache, local_tiers, recheck_generations
+
+
+class TwoTierCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "cache.sqlite")
+        self.cache = self.worker(self.path)
+        self.addCleanup(local_tiers.clear)
+
+    def worker(self, location, **options):
+        options = {"GENERATION_CHECK": 60, "LOCAL_MAX_ENTRIES": 2, **options}
+        cache = TwoTierCache(location, {"OPTIONS": options})
+        self.addCleanup(lambda: cache._db and cache._db.close())
+        return cache
+
+    def other_worker(self):
+        # Another spelling of the same file gets its own local tier, like a
+        # second process would.
+        return self.worker(
+            os.path.join(os.path.dirname(self.path), ".", "cache.sqlite")
+        )
+
+    def test_get_set_delete(self):
+        self.assertIsNone(self.cache.get("roll"))
+        self.cache.set("roll", {"code": "35-c41-1"})
+        self.assertEqual(self.cache.get("roll"), {"code": "35-c41-1"})
+        self.assertTrue(self.cache.has_key("roll"))
+
+        self.assertFalse(self.cache.add("roll", "other"))
+        self.assertTrue(self.cache.add("camera", "Nikon"))
+        self.assertEqual(self.cache.get_or_set("lens", lambda: "50mm"), "50mm")
+
+        self.assertTrue(self.cache.delete("roll"))
+        self.assertFalse(self.cache.delete("roll"))
+        self.assertIsNone(self.cache.get("roll"))
+
+        self.cache.clear()
+        self.assertIsNone(self.cache.get("camera"))
+
+    def test_expiry(self):
+        self.cache.set("roll", 1, 0)
+        self.assertIsNone(self.cache.get("roll"))
+        self.assertTrue(self.cache.add("roll", 2))
+        self.assertEqual(self.cache.get("roll"), 2)
+
+        self.assertTrue(self.cache.touch("roll", 0))
+        self.assertIsNone(self.cache.get("roll"))
+
+    def test_values_are_copies(self):
+        self.cache.set("rolls", [1])
+        self.cache.get("rolls").append(2)
+        self.assertEqual(self.cache.get("rolls"), [1])
+
+    def test_local_tier_is_lru(self):
+        for key in ("a", "b", "c"):
+            self.cache.set(key, key)
+        self.cache.get("b")
+        self.cache.set("d", "d")
+
+        self.assertEqual(list(self.cache.tier.entries), [":1:b", ":1:d"])
+        # Evicted locally, but still shared.
+        self.assertEqual(self.cache.get("a"), "a")
+        self.assertEqual(self.cache.get("c"), "c")
+
+    def test_other_workers_see_writes_on_their_next_request(self):
+        other = self.other_worker()
+        self.cache.set("facets", 1)
+        self.assertEqual(other.get("facets"), 1)
+        self.assertEqual(other.get("facets"), 1)
+        self.assertEqual(other.tier.counts["shared_hits"], 1)
+        self.assertEqual(other.tier.counts["local_hits"], 1)
+
+        self.cache.set("facets", 2)
+        other.delete("unrelated")
+        # Mid-request, the other worker doesn't reread the generation...
+        self.assertEqual(other.get("facets"), 1)
+
+        recheck_generations()
+        self.assertEqual(other.get("facets"), 2)
+        self.assertEqual(self.cache.get("facets"), 2)
+
+        self.cache.delete("facets")
+        recheck_generations()
+        self.assertIsNone(other.get("facets"))
+
+    def test_other_keys_stay_in_memory(self):
+        other = self.other_worker()
+        self.cache.set("facets", 1)
+        other.get("facets")
+
+        # A new key, and a change to one the other worker doesn't have.
+        self.cache.set("new", 1)
+        self.cache.set("new", 2)
+        recheck_generations()
+        self.assertEqual(other.get("facets"), 1)
+        self.assertEqual(other.tier.counts["local_hits"], 1)
+        self.assertEqual(other.get("new"), 2)
+
+    def test_far_behind(self):
+        other = self.other_worker()
+        self.cache.set("facets", 1)
+        other.get("facets")
+
+        with mock.patch("inventory.cache.changes_kept", 1):
+            self.cache.set("a", 1)
+            self.cache.set("a", 2)
+            self.cache.set("a", 3)
+        recheck_generations()
+        other.get("facets")
+        self.assertEqual(other.tier.counts["local_hits"], 0)
+
+    def test_own_writes_keep_the_local_tier(self):
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        self.cache.delete("nothing")
+
+        recheck_generations()
+        self.assertEqual(self.cache.get("a"), 1)
+        self.assertEqual(self.cache.tier.counts["local_hits"], 1)
+
+    def test_culling(self):
+        cache = self.worker(self.path, MAX_ENTRIES=10, CULL_FREQUENCY=2)
+        for i in range(12):
+            cache.set(i, i, 60 + i)
+
+        shared, local = cache.size()
+        self.assertLessEqual(shared, 10)
+        # The ones closest to expiring went first.
+        self.assertIsNone(cache.get(0))
+        self.assertEqual(cache.get(11), 11)
+        # Without counting them each time.
+        (entries,) = cache.db.execute("SELECT entries FROM size").fetchone()
+        self.assertEqual(entries, shared)
+
+    def test_culled_entries_leave_memory(self):
+        cache = self.worker(self.path, MAX_ENTRIES=2, CULL_FREQUENCY=2)
+        other = self.other_worker()
+        cache.set("a", 1, 60)
+        other.get("a")
+
+        cache.set("b", 2, 120)
+        cache.set("c", 3, 180)
+        recheck_generations()
+        self.assertIsNone(other.get("a"))
+
+    def test_stats(self):
+        other = self.other_worker()
+        self.cache.set("a", 1)
+        self.cache.get("a")
+        self.cache.get("b")
+        other.get("a")
+        other.flush_stats()
+
+        processes = self.cache.stats()
+        self.assertEqual(len(processes), 1)  # Both are this process.
+        stats = processes[0]
+        self.assertEqual(stats.pid, os.getpid())
+        self.assertEqual((stats.local_hits, stats.misses, stats.writes), (1, 1, 1))
+        self.assertEqual(stats.hit_rate, 0.5)
+
+
+@override_settings(
+    STORAGES={
+        "staticfiles": {
+            "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+        }
+    }
+)
+class CacheStatsViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_superuser("admin", "test", "secret")
+        cls.user = User.objects.create_user(username="test", password="secret")
+
+    def test_staff_only(self):
+        self.client.force_login(user=self.user)
+        response = self.client.get(reverse("cache-stats"))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(reverse("admin:login"), response.url)
+
+    def test_cache_stats(self):
+        self.client.force_login(user=self.staff)
+        response = self.client.get(reverse("admin:index"))
+        self.assertContains(response, reverse("cache-stats"))
+
+        response = self.client.get(reverse("cache-stats"))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Hit rate")
+        self.assertEqual(response.context["total"].pid, None)
@@ -0,0 +1,149 @@
+import datetime
+import io
+import re
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from model_bakery import baker
+from inventory import catalog
+from inventory.models import Camera, CameraBack, Film, Project, Roll, Stock
+from inventory.utils import status_number
+
+staticfiles_storage = {
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"}
+}
+
+# Tables that grow with everyone's own things, which should never be read
+# from start to finish.
+owned_tables = re.compile(
+    r"^SCAN (inventory_(roll|camera|cameraback|project|journal|frame)|U\d+)\b"
+)
+
+
+@override_settings(STORAGES=staticfiles_storage)
+class QueryPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="test", password="secret")
+        cls.film = baker.make(Film, stock=baker.make(Stock))
+        cls.camera = baker.make(Camera, owner=cls.user, status="loaded")
+        cls.back = baker.make(CameraBack, camera=cls.camera, status="loaded")
+        cls.project = baker.make(Project, owner=cls.user)
+        started_on = datetime.date(2024, 1, 1)
+        baker.make(
+            Roll,
+            owner=cls.user,
+            film=cls.film,
+            camera=cls.camera,
+            camera_back=cls.back,
+            project=cls.project,
+            status=status_number("loaded"),
+            started_on=started_on,
+        )
+        baker.make(
+            Roll,
+            owner=cls.user,
+            film=cls.film,
+            camera=baker.make(Camera, owner=cls.user),
+            project=cls.project,
+            status=status_number("shot"),
+            started_on=started_on,
+        )
+        baker.make(
+            Roll,
+            owner=cls.user,
+            film=cls.film,
+            status=status_number("storage"),
+            _quantity=3,
+        )
+
+    def setUp(self):
+        self.client.force_login(user=self.user)
+
+    def plans(self, url):
+        "Each of the page's queries, with how SQLite runs it."
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+
+        plans = []
+        with connection.cursor() as cursor:
+            for query in queries:
+                if query["sql"].startswith("SELECT"):
+                    cursor.execute(f"EXPLAIN QUERY PLAN {query['sql']}")
+                    plans.append((query["sql"], [row[3] for row in cursor]))
+        return plans
+
+    def test_no_full_scans(self):
+        for url in (
+            reverse("index"),
+            reverse("logbook"),
+            reverse("logbook") + "?status=shot",
+            reverse("inventory"),
+            reverse("ready"),
+            reverse("film-rolls", args=(self.film.stock.slug, self.film.format)),
+            reverse("project-detail", args=(self.project.pk,)),
+            reverse("camera-detail", args=(self.camera.pk,)),
+            reverse("camera-back-detail", args=(self.camera.pk, self.back.pk)),
+        ):
+            for sql, plan in self.plans(url):
+                scans = [step for step in plan if owned_tables.match(step)]
+                self.assertEqual(scans, [], f"{url}: {sql}")
+
+    def test_logbook_order(self):
+        for url in (
+            reverse("logbook"),
+            reverse("logbook") + "?status=shot",
+            reverse("ready"),
+        ):
+            pages = [
+                plan
+                for sql, plan in self.plans(url)
+                if '"inventory_roll"."ended_on" DESC' in sql
+            ]
+            self.assertTrue(pages, url)
+            for plan in pages:
+                self.assertIn("roll_owner_status", plan[0], url)
+                self.assertFalse(
+                    [step for step in plan if "ORDER BY" in step], f"{url}: {plan}"
+                )
+
+    def test_loaded_rolls(self):
+        for url, index in (
+            (reverse("camera-detail", args=(self.camera.pk,)), "roll_loaded_camera"),
+            (
+                reverse("camera-back-detail", args=(self.camera.pk, self.back.pk)),
+                "roll_loaded_camera_back",
+            ),
+        ):
+            self.assertTrue(
+                [
+                    plan
+                    for sql, plan in self.plans(url)
+                    if f"USING INDEX {index} " in plan[0]
+                ],
+                url,
+            )
+
+
+@override_settings(STORAGES=staticfiles_storage)
+class IndexAdvisorTests(TransactionTestCase):
+    # It copies the database, which it can't while a test's transaction has
+    # the in-memory one locked.
+    def test_report(self):
+        out = io.StringIO()
+        call_command(
+            "index_advisor", rolls=5, all=True, stdout=out, stderr=io.StringIO()
+        )
+        report = out.getvalue()
+
+        self.assertIn(f"logbook ({reverse('logbook')}, 200): cost ", report)
+        self.assertIn("the same query", report)
+        # Everything it added went into copies.
+        self.assertFalse(User.objects.filter(username__startswith="index-advisor-"))
+        self.assertIsNone(cache.get(catalog.version_key))
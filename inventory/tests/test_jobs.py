@@ -0,0 +1,155 @@
+import datetime
+import io
+import tempfile
+from unittest import mock
+from django.contrib.auth.models import User
+from django.contrib.messages import get_messages
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from freezegun import freeze_time
+from model_bakery import baker
+from inventory import jobs
+from inventory.models import Film, Job, Roll, Stock
+
+staticfiles_storage = {
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"}
+}
+
+
+@override_settings(STORAGES=staticfiles_storage)
+class JobTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="test", password="secret")
+        cls.film = baker.make(Film, stock=baker.make(Stock))
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = self.settings(JOBS_DIR=directory.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.client.force_login(user=self.user)
+
+    def run_jobs(self):
+        call_command("run_jobs", once=True, stdout=io.StringIO())
+
+    def jobs_list(self):
+        return self.client.get(reverse("jobs"), headers={"HX-Request": "true"})
+
+    def test_export(self):
+        baker.make(Roll, owner=self.user, film=self.film, _quantity=3)
+
+        response = self.client.post(reverse("export-rolls"))
+        self.assertRedirects(response, reverse("settings") + "#jobs")
+        job = Job.objects.get(owner=self.user)
+        self.assertEqual(
+            (job.action, job.data, job.status), ("export", "rolls", "queued")
+        )
+        self.assertContains(self.jobs_list(), 'hx-trigger="every 2s"')
+
+        self.run_jobs()
+        job.refresh_from_db()
+        self.assertEqual(job.status, "done")
+        self.assertEqual((job.done, job.total), (3, 3))
+
+        response = self.jobs_list()
+        self.assertNotContains(response, "hx-trigger")
+        self.assertContains(response, reverse("job-download", args=(job.pk,)))
+
+        response = self.client.get(reverse("job-download", args=(job.pk,)))
+        self.assertEqual(
+            response.get("Content-Disposition"), 'attachment; filename="rolls.csv"'
+        )
+        downloaded = b"".join(response.streaming_content)
+        # The same as downloading it right away.
+        self.assertEqual(
+            downloaded, self.client.get(reverse("export-rolls")).getvalue()
+        )
+
+    def test_download_is_only_for_the_owner(self):
+        self.client.post(reverse("export-rolls"))
+        self.run_jobs()
+        job = Job.objects.get(owner=self.user, status="done")
+
+        other = User.objects.create_user(username="other", password="secret")
+        self.client.force_login(user=other)
+        response = self.client.get(reverse("job-download", args=(job.pk,)))
+        self.assertEqual(response.status_code, 404)
+
+    @mock.patch("inventory.views.background_import_size", 0)
+    def test_import(self):
+        baker.make(Roll, owner=self.user, film=self.film, _quantity=2)
+        exported = self.client.get(reverse("export-rolls")).getvalue()
+        Roll.objects.filter(owner=self.user).delete()
+
+        response = self.client.post(
+            reverse("import-rolls"),
+            data={"csv": SimpleUploadedFile("rolls.csv", exported)},
+        )
+        messages = [m.message for m in get_messages(response.wsgi_request)]
+        self.assertIn(
+            "Your rolls are being imported. You can see how it’s going below.",
+            messages,
+        )
+        job = Job.objects.get(owner=self.user)
+        self.assertTrue(job.path.exists())
+        self.assertFalse(Roll.objects.filter(owner=self.user).exists())
+
+        self.run_jobs()
+        job.refresh_from_db()
+        self.assertEqual(job.status, "done")
+        self.assertEqual(job.report["created"], 2)
+        self.assertEqual(Roll.objects.filter(owner=self.user).count(), 2)
+        # The upload isn't kept.
+        self.assertFalse(job.path.exists())
+        self.assertContains(self.jobs_list(), "Imported 2 rolls.")
+
+    @mock.patch("inventory.views.background_import_size", 0)
+    def test_import_of_something_that_isnt_a_csv(self):
+        self.client.post(
+            reverse("import-rolls"),
+            data={"csv": SimpleUploadedFile("rolls.csv", b"\xff\xfe\x00")},
+        )
+        self.run_jobs()
+
+        job = Job.objects.get(owner=self.user)
+        self.assertEqual(job.status, "failed")
+        self.assertContains(self.jobs_list(), "That doesn’t look like a CSV file.")
+
+    def test_settings_page(self):
+        baker.make(Roll, owner=self.user, film=self.film)
+
+        response = self.client.get(reverse("settings"))
+        self.assertContains(response, f'href="{reverse("export-rolls")}"')
+        self.assertNotContains(response, "Prepare download")
+
+        with mock.patch("inventory.views.background_export_rows", 0):
+            response = self.client.get(reverse("settings"))
+        self.assertContains(response, "Prepare download")
+
+        self.client.post(reverse("export-rolls"))
+        response = self.client.get(reverse("settings"))
+        self.assertContains(response, "Rolls export")
+        self.assertContains(response, "Waiting to start…")
+
+    def test_stale_and_old_jobs(self):
+        with freeze_time(timezone.now() - datetime.timedelta(days=8)):
+            old = baker.make(Job, owner=self.user, action="export", data="rolls")
+            jobs.run(jobs.claim())
+            self.assertTrue(old.path.exists())
+        with freeze_time(timezone.now() - datetime.timedelta(hours=1)):
+            stale = baker.make(Job, owner=self.user, action="export", data="rolls")
+            jobs.claim()
+
+        self.run_jobs()
+
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, "failed")
+        self.assertEqual(stale.error, "This was interrupted. Please try again.")
+        self.assertFalse(Job.objects.filter(pk=old.pk).exists())
+        self.assertFalse(old.path.parent.exists())
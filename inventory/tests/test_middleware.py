@@ -0,0 +1,43 @@
+import zoneinfo
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from inventory.middleware import get_zone
+
+staticfiles_storage = {
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"}
+}
+
+
+@override_settings(STORAGES=staticfiles_storage)
+class TimezoneMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="test", password="secret")
+        cls.user.profile.timezone = "Europe/London"
+        cls.user.profile.save()
+
+    def test_profile_comes_with_the_user(self):
+        self.client.login(username="test", password="secret")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("settings"))
+        self.assertEqual(response.status_code, 200)
+
+        request = response.wsgi_request
+        self.assertEqual(request.profile, self.user.profile)
+        self.assertEqual(request.timezone, zoneinfo.ZoneInfo("Europe/London"))
+        self.assertIs(request.timezone, get_zone("Europe/London"))
+        self.assertEqual(
+            [q["sql"] for q in queries if 'FROM "inventory_profile"' in q["sql"]],
+            [],
+        )
+
+    def test_anonymous(self):
+        response = self.client.get(reverse("login"))
+        self.assertIsNone(response.wsgi_request.profile)
+        self.assertEqual(
+            response.wsgi_request.timezone, zoneinfo.ZoneInfo("America/New_York")
+        )
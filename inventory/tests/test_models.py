@@ -1,4 +1,7 @@
 import datetime
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.test import TestCase
 from django.contrib.auth.models import User
 from model_bakery import baker
@@ -6,6 +9,8 @@ from freezegun import freeze_time
 from inventory.models import (
     Film,
     Roll,
+    RollCounter,
+    RollCodeSequence,
     Camera,
     CameraBack,
     Profile,
@@ -16,6 +21,7 @@ from inventory.models import (
     Frame,
 )
 from inventory.utils import status_number
+from inventory.versions import data_version
 
 
 class ProfileTests(TestCase):
@@ -248,6 +254,290 @@ class RollTests(TestCase):
         self.assertEqual(roll.push_pull, "")
 
 
+class RollTransitionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = baker.make(User)
+        cls.film = baker.make(Film, stock=baker.make(Stock))
+        cls.today = datetime.date.today()
+
+    def load(self, **kwargs):
+        roll = baker.make(Roll, owner=self.user, film=self.film, **kwargs)
+        roll.camera = roll.camera or baker.make(Camera, owner=self.user)
+        roll.started_on = self.today - datetime.timedelta(days=3)
+        roll.save()
+        return roll
+
+    def test_transition(self):
+        loaded = self.load()
+        back = baker.make(CameraBack, camera=loaded.camera, status="empty")
+        in_back = self.load(camera=loaded.camera, camera_back=back)
+        shot = self.load()
+        shot.status = status_number("shot")
+        shot.save()
+        ended_on = shot.ended_on
+        Roll.objects.filter(pk=shot.pk).update(ended_on=ended_on)
+        someone_elses = baker.make(Roll, film=self.film)
+
+        with freeze_time(self.today + datetime.timedelta(days=1)):
+            outcomes = Roll.objects.filter(owner=self.user).transition(
+                [str(loaded.pk), in_back.pk, shot.pk, someone_elses.pk, "nope"],
+                status_number("processing"),
+                lab="Home",
+            )
+
+        self.assertEqual(
+            outcomes,
+            {
+                str(loaded.pk): "updated",
+                in_back.pk: "updated",
+                shot.pk: "updated",
+                someone_elses.pk: "not found",
+                "nope": "not found",
+            },
+        )
+
+        for roll in (loaded, in_back, shot):
+            roll.refresh_from_db()
+            self.assertEqual(roll.status, status_number("processing"))
+            self.assertEqual(roll.lab, "Home")
+
+        # Already finished rolls keep their dates.
+        self.assertEqual(shot.ended_on, ended_on)
+        self.assertEqual(loaded.ended_on, self.today + datetime.timedelta(days=1))
+
+        loaded.camera.refresh_from_db()
+        back.refresh_from_db()
+        self.assertEqual(loaded.camera.status, "empty")
+        self.assertEqual(back.status, "empty")
+
+        self.assertEqual(
+            RollCounter.objects.get(
+                owner=self.user, status=status_number("processing")
+            ).count,
+            3,
+        )
+        self.assertEqual(RollCounter.objects.mismatches(self.user), [])
+
+    def test_transition_only_past_loaded(self):
+        with self.assertRaises(ValueError):
+            Roll.objects.transition([], status_number("loaded"))
+
+
+class RollCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = baker.make(User)
+        cls.film = baker.make(Film, stock=baker.make(Stock))
+
+    def counts(self):
+        return {
+            (c.status, c.push_pull): c.count
+            for c in RollCounter.objects.filter(owner=self.user)
+            if c.count
+        }
+
+    def test_save_and_delete(self):
+        roll = baker.make(Roll, owner=self.user, film=self.film)
+        baker.make(Roll, owner=self.user, film=self.film)
+        self.assertEqual(self.counts(), {(status_number("storage"), ""): 2})
+
+        roll.camera = baker.make(Camera)
+        roll.started_on = datetime.date.today()
+        roll.push_pull = "+1"
+        roll.save()
+        self.assertEqual(
+            self.counts(),
+            {(status_number("storage"), ""): 1, (status_number("loaded"), "+1"): 1},
+        )
+
+        # Loaded from the database rather than the instance that was saved.
+        roll = Roll.objects.get(pk=roll.pk)
+        roll.status = status_number("shot")
+        roll.save()
+        self.assertEqual(
+            self.counts(),
+            {(status_number("storage"), ""): 1, (status_number("shot"), "+1"): 1},
+        )
+
+        roll.delete()
+        self.assertEqual(self.counts(), {(status_number("storage"), ""): 1})
+
+    def test_saved_from_stale_copies(self):
+        roll = baker.make(
+            Roll,
+            owner=self.user,
+            film=self.film,
+            camera=baker.make(Camera),
+            status=status_number("shot"),
+            started_on=datetime.date.today(),
+        )
+        # Two requests load the same roll, then each moves it somewhere else.
+        first = Roll.objects.get(pk=roll.pk)
+        second = Roll.objects.get(pk=roll.pk)
+        first.status = status_number("processing")
+        first.save()
+        second.status = status_number("processed")
+        second.save()
+        self.assertEqual(self.counts(), {(status_number("processed"), ""): 1})
+
+        first.delete()
+        self.assertEqual(self.counts(), {})
+        self.assertEqual(RollCounter.objects.mismatches(self.user), [])
+
+    def test_queryset_update_and_delete(self):
+        baker.make(Roll, owner=self.user, film=self.film, _quantity=3)
+        Roll.objects.filter(owner=self.user).update(status=status_number("archived"))
+        self.assertEqual(self.counts(), {(status_number("archived"), ""): 3})
+
+        # Fields that aren't counted don't touch the counters.
+        Roll.objects.filter(owner=self.user).update(notes="Notes")
+        self.assertEqual(self.counts(), {(status_number("archived"), ""): 3})
+
+        Roll.objects.filter(owner=self.user).delete()
+        self.assertEqual(self.counts(), {})
+
+    def test_bulk_create(self):
+        Roll.objects.bulk_create(
+            [Roll(owner=self.user, film=self.film) for x in range(4)]
+        )
+        self.assertEqual(self.counts(), {(status_number("storage"), ""): 4})
+
+    def test_command(self):
+        baker.make(Roll, owner=self.user, film=self.film, _quantity=2)
+        RollCounter.objects.filter(owner=self.user).update(count=5)
+        out = StringIO()
+
+        with self.assertRaises(CommandError):
+            call_command("roll_counters", verify=True, stdout=out)
+        self.assertIn("expected 2, counted 5", out.getvalue())
+
+        call_command("roll_counters", user=self.user.username, stdout=out)
+        self.assertEqual(self.counts(), {(status_number("storage"), ""): 2})
+        self.assertEqual(RollCounter.objects.mismatches(), [])
+
+
+class RollCodeSequenceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = baker.make(User)
+        cls.film = baker.make(Film, stock=baker.make(Stock, type="c41"))
+        cls.today = datetime.date.today()
+
+    def load(self, roll=None):
+        roll = roll or baker.make(Roll, owner=self.user, film=self.film)
+        roll.camera = baker.make(Camera)
+        roll.started_on = self.today
+        roll.save()
+        return roll
+
+    def test_codes_are_not_reused(self):
+        first = self.load()
+        second = self.load()
+        self.assertEqual(second.code, "35-c41-2")
+
+        second.delete()
+        first.delete()
+        self.assertEqual(self.load().code, "35-c41-3")
+
+    def test_seeded_from_existing_codes(self):
+        baker.make(
+            Roll,
+            owner=self.user,
+            film=self.film,
+            code="35-c41-7",
+            started_on=self.today,
+            status=status_number("archived"),
+            camera=baker.make(Camera),
+        )
+        RollCodeSequence.objects.all().delete()
+
+        self.assertEqual(self.load().code, "35-c41-8")
+
+    def test_loading_doesnt_count_rolls(self):
+        self.load()
+        roll = baker.make(Roll, owner=self.user, film=self.film)
+        camera = baker.make(Camera)
+        roll = Roll.objects.select_related("film__stock").get(pk=roll.pk)
+        roll.camera = camera
+        roll.started_on = self.today
+
+        with self.assertNumQueries(9):
+            # Savepoint and release, sequence update and read, camera update,
+            # reading the saved row's counter key, roll update and two counter
+            # updates: no counting rolls.
+            roll.save()
+        self.assertEqual(roll.code, "35-c41-2")
+
+    def test_command(self):
+        self.load()
+        self.load()
+        RollCodeSequence.objects.update(last=1)
+        out = StringIO()
+
+        call_command("roll_code_sequences", user=self.user.username, stdout=out)
+        self.assertEqual(RollCodeSequence.objects.get(owner=self.user).last, 2)
+
+        # Never wound back.
+        RollCodeSequence.objects.update(last=10)
+        call_command("roll_code_sequences", stdout=out)
+        self.assertEqual(RollCodeSequence.objects.get(owner=self.user).last, 10)
+
+
+class DataVersionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="test", password="secret")
+        cls.other = User.objects.create_user(username="other", password="secret")
+        cls.camera = baker.make(Camera, owner=cls.user)
+        cls.roll = baker.make(Roll, owner=cls.user, film=baker.make(Film))
+        cls.project = baker.make(Project, owner=cls.user)
+
+    def assertBumps(self, write, owner=None):
+        owner = owner or self.user
+        before = data_version(owner.pk)
+        other_before = data_version(self.other.pk)
+        write()
+        self.assertNotEqual(data_version(owner.pk), before)
+        if owner != self.other:
+            self.assertEqual(data_version(self.other.pk), other_before)
+
+    def test_saves_and_deletes(self):
+        self.assertBumps(lambda: baker.make(CameraBack, camera=self.camera))
+        self.assertBumps(self.camera.save)
+        self.assertBumps(self.roll.save)
+        self.assertBumps(lambda: baker.make(Journal, roll=self.roll, frame=1))
+        self.assertBumps(lambda: baker.make(Frame, roll=self.roll, number=1))
+        self.assertBumps(self.user.profile.save)
+        self.assertBumps(self.project.delete)
+
+    def test_bulk_writes(self):
+        self.assertBumps(
+            lambda: Camera.objects.filter(owner=self.user).update(notes="!")
+        )
+        self.assertBumps(
+            lambda: Frame.objects.bulk_create(
+                [Frame(roll=self.roll, number=number) for number in (2, 3)]
+            )
+        )
+        self.assertBumps(
+            lambda: Roll.objects.filter(pk=self.roll.pk).update(lab="Local"),
+        )
+        self.assertBumps(
+            lambda: Roll.objects.filter(pk=self.roll.pk).update(owner=self.other),
+            owner=self.other,
+        )
+
+    def test_project_cameras(self):
+        self.assertBumps(lambda: self.project.cameras.add(self.camera))
+        self.assertBumps(lambda: self.camera.project_set.clear())
+
+    def test_no_write_no_bump(self):
+        version = data_version(self.user.pk)
+        Camera.objects.filter(owner=self.user).exists()
+        self.assertEqual(data_version(self.user.pk), version)
+
+
 class CameraTests(TestCase):
     @classmethod
     def setUpTestData(cls):
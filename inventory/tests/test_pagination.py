@@ -0,0 +1,102 @@
+import datetime
+from django.contrib.auth.models import User
+from django.test import TestCase
+from model_bakery import baker
+from inventory.models import Roll
+from inventory.pagination import (
+    CursorPage,
+    CursorPaginator,
+    NumberedPage,
+    logbook_ordering,
+)
+from inventory.utils import status_number
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="test", password="secret")
+        film = baker.make("Film")
+        today = datetime.date.today()
+
+        # Plenty of ties and nulls in the sort key.
+        for i in range(12):
+            roll = baker.make(
+                Roll,
+                owner=cls.user,
+                film=film,
+                camera=baker.make("Camera"),
+                status=status_number("shot" if i % 2 else "processed"),
+                started_on=today - datetime.timedelta(days=i // 3),
+                code=f"35-c41-{i % 3}",
+            )
+            # Skip save() so it doesn't fill the dates in.
+            Roll.objects.filter(pk=roll.pk).update(
+                started_on=roll.started_on if i % 4 else None,
+                ended_on=today if i % 5 else None,
+            )
+
+        cls.rolls = Roll.objects.filter(owner=cls.user)
+
+        # Sort in Python, least significant key first: nulls last going down.
+        expected = sorted(cls.rolls, key=lambda roll: roll.pk, reverse=True)
+        expected.sort(key=lambda roll: roll.code, reverse=True)
+        for field in ("started_on", "ended_on"):
+            expected.sort(
+                key=lambda roll: (
+                    getattr(roll, field) is not None,
+                    getattr(roll, field),
+                ),
+                reverse=True,
+            )
+        expected.sort(key=lambda roll: roll.status)
+        cls.expected = expected
+
+    def test_walk_forwards_and_back(self):
+        paginator = CursorPaginator(self.rolls, 5, logbook_ordering)
+        pages = [paginator.get_page({})]
+        while pages[-1].has_next():
+            pages.append(paginator.get_page({"cursor": pages[-1].next_cursor}))
+
+        self.assertEqual([len(page) for page in pages], [5, 5, 2])
+        self.assertEqual([roll for page in pages for roll in page], self.expected)
+        self.assertFalse(pages[0].has_previous())
+
+        page = pages[-1]
+        for expected in reversed(pages[:-1]):
+            page = paginator.get_page({"cursor": page.previous_cursor})
+            self.assertEqual(list(page), list(expected))
+        self.assertFalse(page.has_previous())
+        self.assertTrue(page.has_next())
+
+    def test_turning_a_page_is_one_query(self):
+        paginator = CursorPaginator(self.rolls, 5, logbook_ordering)
+        cursor = paginator.get_page({}).next_cursor
+
+        with self.assertNumQueries(1):
+            list(paginator.get_page({"cursor": cursor}))
+
+    def test_bad_cursor_is_the_first_page(self):
+        paginator = CursorPaginator(self.rolls, 5, logbook_ordering)
+
+        for cursor in ("nope", "W10", "WzAsIFsxXV0"):
+            page = paginator.get_page({"cursor": cursor})
+            self.assertIsInstance(page, CursorPage)
+            self.assertEqual(list(page), self.expected[:5])
+
+    def test_numbered_when_the_count_is_known(self):
+        paginator = CursorPaginator(self.rolls, 5, logbook_ordering, count=12)
+
+        with self.assertNumQueries(1):
+            page = paginator.get_page({"page": "2"})
+            self.assertEqual(list(page), self.expected[5:10])
+
+        self.assertIsInstance(page, NumberedPage)
+        self.assertEqual(page.querystring, "page=2")
+        self.assertEqual(page.next_querystring, "page=3")
+        self.assertEqual(list(page.page_range), [1, 2, 3])
+
+    def test_cursor_when_there_are_lots_of_pages(self):
+        paginator = CursorPaginator(self.rolls, 5, logbook_ordering, count=1000)
+
+        self.assertIsInstance(paginator.get_page({"page": "2"}), CursorPage)
@@ -0,0 +1,371 @@
+import datetime
+import io
+import os
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager
+from unittest import mock
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection, connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from model_bakery import baker
+from inventory.management.commands import follow_replica
+from inventory.models import Camera, Film, Frame, Roll, Stock
+from inventory.replicas import (
+    ReplicaMiddleware,
+    ReplicaRouter,
+    copied_as_of_key,
+    copy_version_key,
+    pin_cookie,
+    pinned,
+    record_copy,
+)
+from inventory.sqlite.base import DatabaseWrapper
+from inventory.utils import status_number
+
+staticfiles_storage = {
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"}
+}
+
+
+class ReplicaRouterTests(SimpleTestCase):
+    def test_without_a_replica(self):
+        self.assertEqual(ReplicaRouter().db_for_read(Roll), "default")
+
+    def test_with_a_replica(self):
+        router = ReplicaRouter()
+        with mock.patch.dict(connections.settings, {"replica": {}}):
+            self.assertEqual(router.db_for_read(Roll), "replica")
+            self.assertEqual(router.db_for_write(Roll), "default")
+            self.assertFalse(router.allow_migrate("replica", "inventory"))
+
+            token = pinned.set(True)
+            try:
+                self.assertEqual(router.db_for_read(Roll), "default")
+            finally:
+                pinned.reset(token)
+
+
+class ReplicaMiddlewareTests(SimpleTestCase):
+    def pinned_for(self, request):
+        seen = []
+
+        def get_response(request):
+            seen.append(pinned.get())
+            return HttpResponse()
+
+        response = ReplicaMiddleware(get_response)(request)
+        return seen[0], response
+
+    def test_reads(self):
+        is_pinned, response = self.pinned_for(RequestFactory().get("/"))
+        self.assertFalse(is_pinned)
+        self.assertNotIn(pin_cookie, response.cookies)
+        self.assertFalse(pinned.get())
+
+    def test_writes_pin_until_copied(self):
+        record_copy(as_of=time.time() - 1, changed=True)
+        is_pinned, response = self.pinned_for(RequestFactory().post("/"))
+        self.assertTrue(is_pinned)
+        cookie = response.cookies[pin_cookie]
+        self.assertEqual(cookie["max-age"], settings.REPLICA_PIN_SECONDS)
+
+        request = RequestFactory().get("/")
+        request.COOKIES[pin_cookie] = cookie.value
+        is_pinned, response = self.pinned_for(request)
+        self.assertTrue(is_pinned)
+
+        record_copy(as_of=float(cookie.value) + 1, changed=True)
+        is_pinned, response = self.pinned_for(request)
+        self.assertFalse(is_pinned)
+
+
+class ReplicaDatabaseTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.source = os.path.join(directory.name, "source.sqlite")
+        self.target = os.path.join(directory.name, "replica.sqlite")
+
+        db = sqlite3.connect(self.source)
+        db.execute("PRAGMA journal_mode = WAL")
+        db.execute("CREATE TABLE rolls (id INTEGER PRIMARY KEY)")
+        db.execute("INSERT INTO rolls DEFAULT VALUES")
+        db.commit()
+        db.close()
+
+    def follow(self, **kwargs):
+        call_command("follow_replica", self.source, once=True, **kwargs)
+
+    def test_follow(self):
+        with mock.patch.dict(settings.DATABASES, {"replica": {"NAME": self.target}}):
+            self.follow(database="replica")
+
+        replica = DatabaseWrapper(
+            {
+                **connection.settings_dict,
+                "NAME": self.target,
+                "OPTIONS": {"read_only": True},
+            },
+            alias="replica-test",
+        )
+        try:
+            with replica.cursor() as cursor:
+                cursor.execute("SELECT count(*) FROM rolls")
+                self.assertEqual(cursor.fetchone()[0], 1)
+                with self.assertRaisesMessage(OperationalError, "readonly"):
+                    cursor.execute("INSERT INTO rolls DEFAULT VALUES")
+        finally:
+            replica.close()
+
+    def test_records_copies(self):
+        command = follow_replica.Command()
+        command.position = None
+        before = time.time()
+        command.follow(self.source, self.target)
+        version = cache.get(copy_version_key)
+        self.assertIsNotNone(version)
+        self.assertGreaterEqual(cache.get(copied_as_of_key), before)
+
+        # Nothing's changed, but it's newer.
+        before = time.time()
+        command.follow(self.source, self.target)
+        self.assertEqual(cache.get(copy_version_key), version)
+        self.assertGreaterEqual(cache.get(copied_as_of_key), before)
+
+        db = sqlite3.connect(self.source)
+        db.execute("INSERT INTO rolls DEFAULT VALUES")
+        db.commit()
+        db.close()
+        command.follow(self.source, self.target)
+        self.assertNotEqual(cache.get(copy_version_key), version)
+
+    def test_restores_only_whats_new(self):
+        command = follow_replica.Command()
+        command.position = None
+        url = "s3://bucket/db"
+        with (
+            mock.patch.object(follow_replica, "litestream", return_value="1") as wal,
+            mock.patch.object(command, "restore") as restore,
+        ):
+            command.follow(url, self.target)
+            command.follow(url, self.target)
+            self.assertEqual(restore.call_count, 1)
+            wal.assert_called_with("wal", url)
+
+            wal.return_value = "1\n2"
+            command.follow(url, self.target)
+            self.assertEqual(restore.call_count, 2)
+
+    def test_never_into_the_primary(self):
+        with self.assertRaisesMessage(CommandError, "is the primary’s"):
+            self.follow(database="default")
+
+    def test_missing_source(self):
+        self.source += "-missing"
+        with mock.patch.dict(settings.DATABASES, {"replica": {"NAME": self.target}}):
+            with self.assertRaisesMessage(CommandError, "Couldn’t copy"):
+                self.follow(database="replica", stderr=io.StringIO())
+
+
+@contextmanager
+def read_only():
+    "Make the test database read-only, as a replica's is."
+
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA query_only = ON")
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA query_only = OFF")
+
+
+class TwoNodes:
+    """
+    A replica in front of a primary, sharing one browser's cookies. Requests
+    go to the replica, and are replayed on the primary as Fly's proxy would.
+    The replica can't write to the database, and has its own cache, as each
+    machine does.
+    """
+
+    def __init__(self, test):
+        self.client = test.client
+        self.replayed = []
+
+        directory = tempfile.TemporaryDirectory()
+        test.addCleanup(directory.cleanup)
+        self.replica_settings = override_settings(
+            DATABASE_ROLE="replica",
+            CACHES={
+                "default": {
+                    **settings.CACHES["default"],
+                    "LOCATION": os.path.join(directory.name, "cache.sqlite"),
+                }
+            },
+        )
+
+    def caught_up(self):
+        "As `follow_replica` would after copying everything written so far."
+
+        with self.replica_settings:
+            record_copy(as_of=time.time(), changed=True)
+
+    def request(self, method, path, **kwargs):
+        with self.replica_settings, read_only():
+            response = getattr(self.client, method)(path, **kwargs)
+        if settings.REPLAY_HEADER not in response.headers:
+            return response
+
+        self.replayed.append(path)
+        self.replay = response.headers[settings.REPLAY_HEADER]
+        headers = {
+            **kwargs.pop("headers", {}),
+            f"{settings.REPLAY_HEADER}-src": "instance=replica",
+        }
+        return getattr(self.client, method)(path, headers=headers, **kwargs)
+
+    def get(self, path, **kwargs):
+        return self.request("get", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("post", path, **kwargs)
+
+
+@override_settings(
+    STORAGES=staticfiles_storage,
+    REPLAY_HEADER="fly-replay",
+    PRIMARY_REPLAY="region=yyz",
+)
+class WriteForwardingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="test", password="secret")
+        cls.film = baker.make(Film, stock=baker.make(Stock))
+        cls.roll = baker.make(
+            Roll,
+            owner=cls.user,
+            film=cls.film,
+            camera=baker.make(Camera, owner=cls.user),
+            status=status_number("processing"),
+            started_on=datetime.date(2024, 1, 1),
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.nodes = TwoNodes(self)
+
+    def test_reads_stay_on_the_replica(self):
+        response = self.nodes.get(reverse("logbook"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.nodes.replayed, [])
+
+    def test_writes_are_replayed_on_the_primary(self):
+        url = reverse("rolls-update")
+        response = self.nodes.post(
+            url,
+            data={
+                "current_status": "processing",
+                "updated_status": "processed",
+                "roll": [self.roll.pk],
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.nodes.replayed, [url])
+        self.assertEqual(self.nodes.replay, "region=yyz")
+        self.roll.refresh_from_db()
+        self.assertEqual(self.roll.status, status_number("processed"))
+
+        # Then they see it on the primary until the replica's caught up.
+        self.nodes.get(reverse("logbook"))
+        self.assertEqual(self.nodes.replayed, [url, reverse("logbook")])
+
+        self.nodes.caught_up()
+        self.nodes.get(reverse("logbook"))
+        self.assertEqual(len(self.nodes.replayed), 2)
+
+    def test_replica_cache_follows_the_copy(self):
+        url = reverse("logbook")
+        etag = self.nodes.get(url)["ETag"]
+
+        # Written on the primary, which only bumps the primary's cache.
+        self.roll.lab = "Local"
+        self.roll.save()
+        response = self.client.get(url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+
+        # Until the replica's copy has it, the old page is still right there.
+        response = self.nodes.get(url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 304)
+
+        self.nodes.caught_up()
+        response = self.nodes.get(url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_frames(self):
+        url = reverse("roll-frame-add", args=(self.roll.pk,))
+        self.nodes.post(url, data={"number": "1", "date": "2024-01-02"})
+        self.assertEqual(self.nodes.replayed, [url])
+        self.assertTrue(Frame.objects.filter(roll=self.roll, number=1).exists())
+
+    def test_reads_that_write(self):
+        url = reverse("session-sidebar")
+        response = self.nodes.get(url, headers={"hx-request": "true"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.session["sidebar"], "closed")
+
+        self.client.logout()
+        url = reverse("account-verified", args=(self.user.pk,))
+        self.assertRedirects(self.nodes.get(url), reverse("index"))
+
+        # Logging in changed last_login, which the token depends on.
+        self.user.refresh_from_db()
+
+        url = reverse(
+            "password_reset_confirm",
+            args=(
+                urlsafe_base64_encode(force_bytes(self.user.pk)),
+                default_token_generator.make_token(self.user),
+            ),
+        )
+        response = self.nodes.get(url, follow=True)
+        self.assertTrue(response.context["validlink"])
+
+        self.assertEqual(
+            self.nodes.replayed,
+            [
+                reverse("session-sidebar"),
+                reverse("account-verified", args=(self.user.pk,)),
+                url,
+            ],
+        )
+
+    def test_not_on_the_primary(self):
+        response = self.client.post(reverse("rolls-update"))
+        self.assertNotIn("fly-replay", response.headers)
+
+    @override_settings(DATABASE_ROLE="replica")
+    def test_replayed_onto_a_replica(self):
+        response = self.client.post(
+            reverse("rolls-update"), headers={"fly-replay-src": "instance=replica"}
+        )
+        self.assertEqual(response.status_code, 503)
+
+    @override_settings(
+        DATABASE_ROLE="replica", REPLAY_HEADER="", PRIMARY_URL="http://primary/"
+    )
+    def test_redirected_to_the_primary(self):
+        url = f"{reverse('rolls-update')}?page=2"
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, 307)
+        self.assertEqual(response["Location"], f"http://primary{url}")
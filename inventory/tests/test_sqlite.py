@@ -0,0 +1,44 @@
+import io
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from inventory.sqlite import read_transaction
+
+
+class PragmaTests(TestCase):
+    def test_pragmas(self):
+        with connection.cursor() as cursor:
+            for pragma, value in (
+                ("synchronous", 1),
+                ("busy_timeout", 5000),
+                ("cache_size", -20000),
+                ("temp_store", 2),
+            ):
+                cursor.execute(f"PRAGMA {pragma}")
+                self.assertEqual(cursor.fetchone()[0], value, pragma)
+
+
+class TransactionModeTests(TransactionTestCase):
+    def begins(self, block):
+        with CaptureQueriesContext(connection) as queries:
+            with block():
+                with transaction.atomic():
+                    pass
+        return [q["sql"] for q in queries if q["sql"].startswith("BEGIN")]
+
+    def test_writes_take_the_lock_up_front(self):
+        self.assertEqual(self.begins(transaction.atomic), ["BEGIN IMMEDIATE"])
+
+    def test_reads_dont(self):
+        self.assertEqual(self.begins(read_transaction), ["BEGIN DEFERRED"])
+        # Only the outermost transaction is deferred.
+        self.assertEqual(self.begins(transaction.atomic), ["BEGIN IMMEDIATE"])
+
+
+class BenchmarkTests(TestCase):
+    def test_benchmark(self):
+        out = io.StringIO()
+        call_command("benchmark_sqlite", seconds=0.1, workers=2, rows=100, stdout=out)
+        self.assertIn("Django’s defaults:", out.getvalue())
+        self.assertIn("inventory.sqlite:", out.getvalue())
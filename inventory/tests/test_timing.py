@@ -0,0 +1,95 @@
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from model_bakery import baker
+from inventory.models import Roll
+from inventory.timing import RouteTimings, Timing, percentile, route_timings
+
+staticfiles_storage = {
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"}
+}
+
+
+class RouteTimingsTests(TestCase):
+    def test_percentile(self):
+        numbers = list(range(1, 101))
+        self.assertEqual(percentile(numbers, 0.5), 50)
+        self.assertEqual(percentile(numbers, 0.95), 95)
+        self.assertEqual(percentile([7], 0.95), 7)
+
+    def test_rolling_window(self):
+        timings = RouteTimings(window=10)
+        for milliseconds in range(1, 21):
+            timing = Timing()
+            timing.total = milliseconds / 1000
+            timing.queries = milliseconds
+            timings.add("/logbook/", timing)
+
+        [stats] = timings.stats()
+        self.assertEqual(stats.requests, 20)
+        self.assertEqual(stats.sampled, 10)
+        self.assertAlmostEqual(stats.p50, 15)
+        self.assertAlmostEqual(stats.max, 20)
+        self.assertEqual(stats.queries_max, 20)
+
+
+@override_settings(STORAGES=staticfiles_storage, SERVER_TIMING_SAMPLE_RATE=1)
+class ServerTimingMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_superuser("admin", "test", "secret")
+        cls.user = User.objects.create_user(username="test", password="secret")
+        baker.make(Roll, owner=cls.user)
+
+    def setUp(self):
+        route_timings.clear()
+
+    def test_header(self):
+        self.client.force_login(user=self.staff)
+        response = self.client.get(reverse("logbook"))
+
+        names = [part.split(";")[0] for part in response["Server-Timing"].split(", ")]
+        self.assertEqual(names, ["db", "tpl", "view", "total"])
+        self.assertRegex(response["Server-Timing"], r'db;dur=[\d.]+;desc="\d+ queries"')
+
+        [stats] = route_timings.stats()
+        self.assertEqual(stats.route, "/logbook/")
+        self.assertGreater(stats.queries_p50, 0)
+        self.assertGreater(stats.templates_p50, 0)
+
+    def test_header_is_for_staff(self):
+        self.client.force_login(user=self.user)
+        response = self.client.get(reverse("logbook"))
+        self.assertNotIn("Server-Timing", response)
+        self.assertNotIn("Server-Timing", self.client.get(reverse("login")))
+        # They're still counted.
+        self.assertEqual(len(route_timings.stats()), 2)
+
+        with self.settings(SERVER_TIMING_PUBLIC=True):
+            self.assertIn("Server-Timing", self.client.get(reverse("logbook")))
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=0)
+    def test_not_sampled(self):
+        response = self.client.get(reverse("login"))
+        self.assertNotIn("Server-Timing", response)
+        self.assertEqual(route_timings.stats(), [])
+
+    def test_staff_only(self):
+        self.client.force_login(user=self.user)
+        response = self.client.get(reverse("request-timings"))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(reverse("admin:login"), response.url)
+
+    def test_request_timings(self):
+        self.client.force_login(user=self.staff)
+        response = self.client.get(reverse("admin:index"))
+        self.assertContains(response, reverse("request-timings"))
+
+        response = self.client.get(reverse("request-timings"))
+        self.assertContains(response, '<th scope="row">/innards/</th>', html=True)
+
+        response = self.client.post(reverse("request-timings"))
+        self.assertRedirects(response, reverse("request-timings"))
+        self.assertEqual(
+            [stats.route for stats in route_timings.stats()], ["/innards/timings/"]
+        )
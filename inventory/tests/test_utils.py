@@ -0,0 +1,55 @@
+from django.test import SimpleTestCase
+from inventory.utils import SectionTabs
+
+
+class SectionTabsTests(SimpleTestCase):
+    def setUp(self):
+        self.calls = []
+
+        def rows(name):
+            def provider():
+                self.calls.append(name)
+                return [name]
+
+            return provider
+
+        self.section = SectionTabs(
+            "Cameras",
+            "#target",
+            0,
+            [
+                {"name": "One", "count": 1, "rows": rows("one"), "action": "roll"},
+                {"name": "Two", "count": 1, "rows": rows("two")},
+                {"name": "Three", "count": 1, "rows": ["three"]},
+            ],
+        )
+
+    def test_slug(self):
+        self.assertEqual(self.section.slug, "c")
+
+    def test_only_current_rows_are_evaluated(self):
+        self.assertEqual(self.section.current_rows(), ["one"])
+        self.assertEqual(self.section.current_rows(), ["one"])
+        self.assertEqual(self.calls, ["one"])
+
+        self.section.set_tab(1)
+        self.assertEqual(self.section.current_rows(), ["two"])
+        self.assertEqual(self.calls, ["one", "two"])
+
+    def test_plain_rows(self):
+        self.section.set_tab("2")
+        self.assertEqual(self.section.current_rows(), ["three"])
+        self.assertEqual(self.calls, [])
+
+    def test_set_tab_ignores_bad_values(self):
+        self.section.set_tab("nope")
+        self.assertEqual(self.section.current_tab, 0)
+
+        self.section.set_tab(3)
+        self.assertEqual(self.section.current_tab, 0)
+
+    def test_current_tab_action(self):
+        self.assertEqual(self.section.current_tab_action(), "roll")
+
+        self.section.set_tab(1)
+        self.assertEqual(self.section.current_tab_action(), "view")
@@ -6,6 +6,8 @@ import pytz
 import logging
 import json
 from django.test import TestCase, override_settings, RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
 from django.urls import reverse
 from django.contrib.auth.models import User, AnonymousUser
 from django.contrib.messages import get_messages
@@ -19,6 +21,7 @@ from model_bakery import baker
 from waffle.testutils import override_flag
 from django_htmx.middleware import HtmxDetails
 from inventory.views import stocks, inventory
+from inventory.counts import LogbookFacets
 from inventory.models import (
     Roll,
     Camera,
@@ -29,6 +32,7 @@ from inventory.models import (
     Frame,
     Stock,
     Manufacturer,
+    Tombstone,
 )
 from inventory.utils import status_number, bulk_status_next_keys, status_description
 
@@ -94,6 +98,45 @@ class IndexTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.context["projects"].current_tab, 1)
 
+    def test_summary_counts(self):
+        camera = baker.make(Camera, owner=self.user, status="loaded")
+        baker.make(Camera, owner=self.user, status="empty")
+        baker.make(Camera, owner=self.user, status="unavailable")
+        multi = baker.make(Camera, owner=self.user, status="empty", multiple_backs=True)
+        baker.make(CameraBack, camera=multi, status="empty", _quantity=2)
+        baker.make(CameraBack, camera=multi, status="unavailable")
+        baker.make(Roll, owner=self.user, camera=camera, status="02_loaded")
+        baker.make(Roll, owner=self.user, _quantity=3)
+        baker.make(Project, owner=self.user, status="archived")
+        # Someone else's stuff shouldn't count.
+        baker.make(Camera, status="empty")
+        baker.make(Roll)
+
+        response = self.client.get(self.index_url)
+        summary = response.context["summary"]
+
+        self.assertEqual(summary.cameras_total, 4)
+        self.assertEqual(summary.cameras_ready, 3)
+        self.assertEqual(summary.cameras_unavailable, 1)
+        self.assertEqual(summary.rolls_loaded, 1)
+        self.assertEqual(summary.rolls_total, 4)
+        self.assertEqual(summary.projects_current, 0)
+        self.assertEqual(summary.projects_archived, 1)
+        self.assertEqual(response.context["cameras"].current_tab, 0)
+        self.assertEqual(response.context["projects"].current_tab, 1)
+
+    def test_onboarding(self):
+        response = self.client.get(self.index_url)
+        self.assertContains(response, "Let’s get started")
+
+        self.user.email = "test@example.com"
+        self.user.save()
+        baker.make(Camera, owner=self.user)
+        baker.make(Roll, owner=self.user)
+
+        response = self.client.get(self.index_url)
+        self.assertNotContains(response, "Let’s get started")
+
 
 class MarketingSiteCORSTests(TestCase):
     @classmethod
@@ -336,6 +379,27 @@ class InventoryTests(TestCase):
         self.assertContains(response, "Stock Name")
         self.assertContains(response, "No Stock")
 
+    def test_inventory_counts(self):
+        bw = baker.make(Film, format="120", stock=baker.make(Stock, type="bw"))
+        baker.make(Roll, owner=self.user, film=bw, _quantity=3)
+        baker.make(Roll, owner=self.user, film=bw, status=status_number("shot"))
+        baker.make(Roll, film=bw)
+        response = self.client.get(reverse("inventory"))
+        counts = response.context["inventory_counts"]
+
+        self.assertEqual(counts["all"], 5)
+        self.assertEqual(counts["135"], 2)
+        self.assertEqual(counts["120"], 3)
+        self.assertEqual(counts["c41"], {**counts["c41"], "all": 1, "135": 1})
+        self.assertEqual(counts["bw"], {**counts["bw"], "all": 3, "120": 3})
+        self.assertEqual(counts["e6"]["all"], 0)
+        self.assertEqual(
+            [f["format"] for f in response.context["format_counts"]], ["135", "120"]
+        )
+        self.assertEqual(
+            [t["stock__type"] for t in response.context["type_counts"]], ["bw", "c41"]
+        )
+
     # HTMX / Ajax
     def test_filtered_with_htmx(self):
         response = inventory(
@@ -419,6 +483,166 @@ class LogbookTests(TestCase):
         self.assertEqual(response.context["year"], str(self.today.year))
         self.assertEqual(len(response.context["rolls"]), 1)
 
+    def test_logbook_facets(self):
+        last_year = self.today.replace(year=self.today.year - 1, day=1)
+        baker.make(
+            Roll,
+            film__stock=baker.make(Stock),
+            owner=self.user,
+            status=status_number("archived"),
+            code="35-c41-1",
+            started_on=last_year,
+            ended_on=last_year,
+            camera=baker.make(Camera),
+        )
+        baker.make(Roll, owner=self.user, status=status_number("storage"))
+
+        response = self.client.get(reverse("logbook"))
+
+        self.assertEqual(response.context["status_counts"]["all"], 2)
+        self.assertEqual(response.context["status_counts"]["shot"], 1)
+        self.assertEqual(response.context["status_counts"]["archived"], 1)
+        self.assertEqual(response.context["status_counts"]["loaded"], 0)
+        self.assertEqual(
+            list(response.context["all_years"].items()),
+            [("all", 2), (self.today.year, 1), (last_year.year, 1)],
+        )
+        self.assertEqual(response.context["all_years_count"], 2)
+
+        # Cached, but forgotten as soon as a roll changes.
+        with self.assertNumQueries(0):
+            LogbookFacets(self.user)
+
+        Roll.objects.filter(owner=self.user, status=status_number("archived")).update(
+            status=status_number("scanned")
+        )
+        response = self.client.get(reverse("logbook"))
+
+        self.assertEqual(response.context["status_counts"]["archived"], 0)
+        self.assertEqual(response.context["status_counts"]["scanned"], 1)
+
+    def test_logbook_pagination(self):
+        baker.make(
+            Roll,
+            film=baker.make(Film, stock=baker.make(Stock)),
+            owner=self.user,
+            status=status_number("shot"),
+            started_on=self.today,
+            camera=baker.make(Camera),
+            _quantity=10,
+        )
+
+        # The facets know how many shot rolls there are, so pages are numbered.
+        response = self.client.get(reverse("logbook"), data={"status": "shot"})
+        page_obj = response.context["page_obj"]
+
+        self.assertEqual(page_obj.number, 1)
+        self.assertEqual(page_obj.next_querystring, "page=2")
+
+        # They don't know about shot rolls in a given year, so use a cursor.
+        data = {"status": "shot", "year": self.today.year}
+        response = self.client.get(reverse("logbook"), data=data)
+        page_obj = response.context["page_obj"]
+
+        self.assertIsNone(page_obj.number)
+        self.assertEqual(len(page_obj), 10)
+        self.assertContains(response, page_obj.next_querystring)
+
+        response = self.client.get(
+            reverse("logbook"), data={**data, "cursor": page_obj.next_cursor}
+        )
+        page_obj = response.context["page_obj"]
+
+        self.assertEqual(len(page_obj), 1)
+        self.assertFalse(page_obj.has_next())
+        self.assertTrue(page_obj.has_previous())
+
+
+@override_settings(STORAGES=staticfiles_storage)
+class DataVersionETagTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="test", password="secret")
+        cls.project = baker.make(Project, owner=cls.user)
+        cls.roll = baker.make(
+            Roll,
+            film__stock=baker.make(Stock),
+            owner=cls.user,
+            status=status_number("shot"),
+            project=cls.project,
+        )
+
+    def setUp(self):
+        self.client.force_login(user=self.user)
+
+    def test_not_modified(self):
+        for url in (
+            reverse("index"),
+            reverse("inventory"),
+            reverse("logbook"),
+            reverse("ready"),
+            reverse("project-detail", args=(self.project.pk,)),
+        ):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            etag = response["ETag"]
+            self.assertTrue(etag.startswith('W/"'))
+            self.assertIn("no-cache", response["Cache-Control"])
+            self.assertIn("private", response["Cache-Control"])
+
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, headers={"if-none-match": etag})
+            self.assertEqual(response.status_code, 304, url)
+            self.assertEqual(response["ETag"], etag)
+            # Only the middleware's queries (for the session, and user and profile).
+            self.assertFalse(
+                [
+                    q
+                    for q in queries
+                    if "inventory_" in q["sql"] and "inventory_profile" not in q["sql"]
+                ]
+            )
+
+    def test_query_string_and_htmx(self):
+        etag = self.client.get(reverse("logbook"))["ETag"]
+
+        for data, headers in (({"status": "shot"}, {}), ({}, {"hx-request": "true"})):
+            response = self.client.get(
+                reverse("logbook"), data, headers={"if-none-match": etag, **headers}
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response["ETag"], etag)
+
+    def test_writes_change_the_etag(self):
+        url = reverse("logbook")
+        etag = self.client.get(url)["ETag"]
+
+        self.roll.lab = "Local"
+        self.roll.save()
+        response = self.client.get(url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_other_users_writes_dont(self):
+        url = reverse("logbook")
+        etag = self.client.get(url)["ETag"]
+
+        baker.make(Camera, owner=baker.make(User))
+        response = self.client.get(url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 304)
+
+    def test_not_with_messages(self):
+        url = reverse("logbook")
+        etag = self.client.get(url)["ETag"]
+
+        # Posting a change sets a message to show on the next page.
+        self.client.post(
+            reverse("rolls-update"),
+            {"current_status": "shot", "updated_status": "processing", "roll": []},
+        )
+        response = self.client.get(url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+
 
 class ExportTests(TestCase):
     @classmethod
@@ -441,7 +665,7 @@ class ExportTests(TestCase):
         baker.make(Roll, owner=self.user)
 
         response = self.client.get(reverse("export-rolls"))
-        reader = csv.reader(io.StringIO(response.content.decode("UTF-8")))
+        reader = csv.reader(io.StringIO(response.getvalue().decode("UTF-8")))
         # Disregard the header row.
         next(reader)
         rows = sum(1 for row in reader)
@@ -454,7 +678,7 @@ class ExportTests(TestCase):
         baker.make(Camera, owner=self.user)
 
         response = self.client.get(reverse("export-cameras"))
-        reader = csv.reader(io.StringIO(response.content.decode("UTF-8")))
+        reader = csv.reader(io.StringIO(response.getvalue().decode("UTF-8")))
         # Disregard the header row.
         next(reader)
         rows = sum(1 for row in reader)
@@ -467,7 +691,7 @@ class ExportTests(TestCase):
         baker.make(CameraBack, camera=baker.make(Camera, owner=self.user))
 
         response = self.client.get(reverse("export-camera-backs"))
-        reader = csv.reader(io.StringIO(response.content.decode("UTF-8")))
+        reader = csv.reader(io.StringIO(response.getvalue().decode("UTF-8")))
         # Disregard the header row.
         next(reader)
         rows = sum(1 for row in reader)
@@ -482,7 +706,7 @@ class ExportTests(TestCase):
         project1.cameras.add(baker.make(Camera, owner=self.user))
 
         response = self.client.get(reverse("export-projects"))
-        reader = csv.reader(io.StringIO(response.content.decode("UTF-8")))
+        reader = csv.reader(io.StringIO(response.getvalue().decode("UTF-8")))
         # Disregard the header row.
         next(reader)
         rows = sum(1 for row in reader)
@@ -495,7 +719,7 @@ class ExportTests(TestCase):
         baker.make(Journal, roll=baker.make(Roll, owner=self.user))
 
         response = self.client.get(reverse("export-journals"))
-        reader = csv.reader(io.StringIO(response.content.decode("UTF-8")))
+        reader = csv.reader(io.StringIO(response.getvalue().decode("UTF-8")))
         # Disregard the header row.
         next(reader)
         rows = sum(1 for row in reader)
@@ -508,7 +732,7 @@ class ExportTests(TestCase):
         baker.make(Frame, roll=baker.make(Roll, owner=self.user))
         response = self.client.get(reverse("export-frames"))
 
-        reader = csv.reader(io.StringIO(response.content.decode("UTF-8")))
+        reader = csv.reader(io.StringIO(response.getvalue().decode("UTF-8")))
         # Disregard the header row.
         next(reader)
         rows = sum(1 for row in reader)
@@ -516,6 +740,188 @@ class ExportTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(rows, 2)
 
+    def export(self, name):
+        "Download an export, counting the queries it takes to stream."
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(name))
+            content = response.getvalue().decode("UTF-8")
+
+        self.assertTrue(response.streaming)
+        return list(csv.DictReader(io.StringIO(content))), len(queries)
+
+    def test_export_queries_dont_grow(self):
+        camera = baker.make(Camera, owner=self.user, multiple_backs=True)
+        back = baker.make(CameraBack, camera=camera)
+        project = baker.make(Project, owner=self.user)
+        project.cameras.add(camera)
+        film = baker.make(Film, stock=baker.make(Stock), format="120")
+
+        def add_rolls():
+            for roll in baker.make(
+                Roll,
+                owner=self.user,
+                film=film,
+                camera=camera,
+                camera_back=back,
+                project=project,
+                _quantity=3,
+            ):
+                baker.make(Journal, roll=roll, frame=1)
+                baker.make(Frame, roll=roll, number=1)
+
+        add_rolls()
+        counts = {}
+        for name in ("export-rolls", "export-projects", "export-frames"):
+            rows, counts[name] = self.export(name)
+
+        add_rolls()
+        for name in ("export-rolls", "export-projects", "export-frames"):
+            rows, queries = self.export(name)
+            self.assertEqual(queries, counts[name], name)
+
+        rolls, queries = self.export("export-rolls")
+        self.assertEqual(len(rolls), 6)
+        self.assertEqual(rolls[0]["film"], str(film))
+        self.assertEqual(rolls[0]["camera_back"], str(back))
+        self.assertEqual(rolls[0]["camera_back_id"], str(back.pk))
+        self.assertEqual(rolls[0]["project"], project.name)
+
+        frames, queries = self.export("export-frames")
+        self.assertEqual(len(frames), 6)
+        self.assertEqual(
+            {frame["roll"] for frame in frames},
+            {str(roll) for roll in Roll.objects.filter(owner=self.user)},
+        )
+
+
+@override_settings(STORAGES=staticfiles_storage)
+class ExportSinceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="test", password="secret")
+        cls.film = baker.make(Film, stock=baker.make(Stock))
+
+    def setUp(self):
+        self.client.force_login(user=self.user)
+
+    def export(self, name, since=None):
+        data = {"since": since} if since else {}
+        response = self.client.get(reverse(name), data)
+        rows = list(csv.DictReader(io.StringIO(response.getvalue().decode("UTF-8"))))
+        return rows, response["X-Since"]
+
+    def test_only_whats_changed(self):
+        with freeze_time(timezone.now() - datetime.timedelta(hours=2)):
+            kept, changed, deleted = baker.make(
+                Roll, owner=self.user, film=self.film, _quantity=3
+            )
+        with freeze_time(timezone.now() - datetime.timedelta(hours=1)):
+            rows, since = self.export("export-rolls")
+        self.assertEqual(len(rows), 3)
+        self.assertNotIn("deleted", rows[0])
+
+        changed.notes = "Changed."
+        changed.save()
+        deleted_pk = deleted.pk
+        deleted.delete()
+        added = baker.make(Roll, owner=self.user, film=self.film)
+
+        rows, next_since = self.export("export-rolls", since)
+        self.assertEqual(
+            [(row["id"], row["notes"], bool(row["deleted"])) for row in rows],
+            [
+                (str(changed.pk), "Changed.", False),
+                (str(added.pk), "", False),
+                (str(deleted_pk), "", True),
+            ],
+        )
+
+        # Anything changed just before the export is in the next one too.
+        rows, since = self.export("export-rolls", next_since)
+        self.assertEqual(len(rows), 3)
+
+    def test_deleted_with_what_they_belong_to(self):
+        roll = baker.make(Roll, owner=self.user, film=self.film)
+        frame = baker.make(Frame, roll=roll, number=1)
+        rows, since = self.export("export-frames")
+
+        roll.delete()
+        rows, since = self.export("export-frames", since)
+        self.assertEqual([row["id"] for row in rows], [str(frame.pk)])
+        self.assertTrue(rows[0]["deleted"])
+
+        # Deleting an account doesn't leave anything behind.
+        self.user.delete()
+        self.assertFalse(Tombstone.objects.exists())
+
+    def test_references_cleared_by_a_delete(self):
+        with freeze_time(timezone.now() - datetime.timedelta(hours=2)):
+            project = baker.make(Project, owner=self.user)
+            roll = baker.make(Roll, owner=self.user, film=self.film, project=project)
+            baker.make(Roll, owner=self.user, film=self.film)
+        with freeze_time(timezone.now() - datetime.timedelta(hours=1)):
+            rows, since = self.export("export-rolls")
+
+        project.delete()
+        rows, since = self.export("export-rolls", since)
+        self.assertEqual(
+            [(row["id"], row["project_id"]) for row in rows], [(str(roll.pk), "")]
+        )
+
+    def test_bulk_changes(self):
+        with freeze_time(timezone.now() - datetime.timedelta(hours=2)):
+            roll = baker.make(Roll, owner=self.user, film=self.film)
+            camera = baker.make(Camera, owner=self.user)
+            project = baker.make(Project, owner=self.user)
+        with freeze_time(timezone.now() - datetime.timedelta(hours=1)):
+            rows, since = self.export("export-rolls")
+            rows, projects_since = self.export("export-projects")
+
+        Roll.objects.filter(pk=roll.pk).update(status=status_number("loaded"))
+        rows, since = self.export("export-rolls", since)
+        self.assertEqual([row["id"] for row in rows], [str(roll.pk)])
+
+        project.cameras.add(camera)
+        rows, since = self.export("export-projects", projects_since)
+        self.assertEqual([row["id"] for row in rows], [str(project.pk)])
+
+    def test_rolls_in_projects(self):
+        with freeze_time(timezone.now() - datetime.timedelta(hours=2)):
+            project, other = baker.make(Project, owner=self.user, _quantity=2)
+            roll = baker.make(Roll, owner=self.user, film=self.film)
+        with freeze_time(timezone.now() - datetime.timedelta(hours=1)):
+            rows, since = self.export("export-projects")
+
+        self.client.post(
+            reverse("project-rolls-add", args=(project.pk,)),
+            data={"film": self.film.pk, "quantity": 1},
+        )
+        rows, next_since = self.export("export-projects", since)
+        self.assertEqual(
+            [(row["id"], row["roll_ids"]) for row in rows],
+            [(str(project.pk), f"[{roll.pk}]")],
+        )
+
+        # Moved from one project to another, both rows change.
+        with freeze_time(timezone.now() + datetime.timedelta(hours=1)):
+            roll.refresh_from_db()
+            roll.project = other
+            roll.save()
+            rows, since = self.export("export-projects", next_since)
+        self.assertEqual(
+            sorted(row["id"] for row in rows), sorted([str(project.pk), str(other.pk)])
+        )
+
+    def test_bad_since(self):
+        response = self.client.get(reverse("export-rolls"), {"since": "1234"})
+        self.assertEqual(response.status_code, 400)
+
+        with freeze_time(timezone.now() - datetime.timedelta(days=100)):
+            rows, since = self.export("export-rolls")
+        response = self.client.get(reverse("export-rolls"), {"since": since})
+        self.assertEqual(response.status_code, 410)
+
 
 @freeze_time(datetime.datetime.now())
 class ImportTests(TestCase):
@@ -574,7 +980,8 @@ class ImportTests(TestCase):
 
         # First, export.
         response1 = self.client.get(reverse("export-rolls"))
-        reader = csv.reader(io.StringIO(response1.content.decode("UTF-8")))
+        exported = response1.getvalue()
+        reader = csv.reader(io.StringIO(exported.decode("UTF-8")))
         next(reader)  # Disregard the header row.
         rows = sum(1 for row in reader)
         self.assertEqual(rows, 1)
@@ -589,7 +996,7 @@ class ImportTests(TestCase):
         # Then import from our export.
         response2 = self.client.post(
             reverse("import-rolls"),
-            data={"csv": SimpleUploadedFile("rolls.csv", response1.content)},
+            data={"csv": SimpleUploadedFile("rolls.csv", exported)},
         )
         messages = [m.message for m in get_messages(response2.wsgi_request)]
 
@@ -625,7 +1032,8 @@ class ImportTests(TestCase):
 
         # First, export.
         response1 = self.client.get(reverse("export-cameras"))
-        reader = csv.reader(io.StringIO(response1.content.decode("UTF-8")))
+        exported = response1.getvalue()
+        reader = csv.reader(io.StringIO(exported.decode("UTF-8")))
         next(reader)  # Disregard the header row.
         rows = sum(1 for row in reader)
         self.assertEqual(rows, 1)
@@ -640,7 +1048,7 @@ class ImportTests(TestCase):
         # Then import from our export.
         response2 = self.client.post(
             reverse("import-cameras"),
-            data={"csv": SimpleUploadedFile("cameras.csv", response1.content)},
+            data={"csv": SimpleUploadedFile("cameras.csv", exported)},
         )
         messages = [m.message for m in get_messages(response2.wsgi_request)]
 
@@ -676,7 +1084,8 @@ class ImportTests(TestCase):
 
         # First, export.
         response1 = self.client.get(reverse("export-camera-backs"))
-        reader = csv.reader(io.StringIO(response1.content.decode("UTF-8")))
+        exported = response1.getvalue()
+        reader = csv.reader(io.StringIO(exported.decode("UTF-8")))
         next(reader)  # Disregard the header row.
         rows = sum(1 for row in reader)
         self.assertEqual(rows, 1)
@@ -692,7 +1101,7 @@ class ImportTests(TestCase):
         # Then import from our export.
         response2 = self.client.post(
             reverse("import-camera-backs"),
-            data={"csv": SimpleUploadedFile("camera-backs.csv", response1.content)},
+            data={"csv": SimpleUploadedFile("camera-backs.csv", exported)},
         )
         messages = [m.message for m in get_messages(response2.wsgi_request)]
 
@@ -730,7 +1139,8 @@ class ImportTests(TestCase):
 
         # First, export.
         response1 = self.client.get(reverse("export-projects"))
-        reader = csv.reader(io.StringIO(response1.content.decode("UTF-8")))
+        exported = response1.getvalue()
+        reader = csv.reader(io.StringIO(exported.decode("UTF-8")))
         next(reader)  # Disregard the header row.
         rows = sum(1 for row in reader)
         self.assertEqual(rows, 1)
@@ -745,7 +1155,7 @@ class ImportTests(TestCase):
         # Then import from our export.
         response2 = self.client.post(
             reverse("import-projects"),
-            data={"csv": SimpleUploadedFile("projects.csv", response1.content)},
+            data={"csv": SimpleUploadedFile("projects.csv", exported)},
         )
         messages = [m.message for m in get_messages(response2.wsgi_request)]
 
@@ -781,7 +1191,8 @@ class ImportTests(TestCase):
 
         # First, export.
         response1 = self.client.get(reverse("export-journals"))
-        reader = csv.reader(io.StringIO(response1.content.decode("UTF-8")))
+        exported = response1.getvalue()
+        reader = csv.reader(io.StringIO(exported.decode("UTF-8")))
         next(reader)  # Disregard the header row.
         rows = sum(1 for row in reader)
         self.assertEqual(rows, 1)
@@ -796,7 +1207,7 @@ class ImportTests(TestCase):
         # Then import from our export.
         response2 = self.client.post(
             reverse("import-journals"),
-            data={"csv": SimpleUploadedFile("journals.csv", response1.content)},
+            data={"csv": SimpleUploadedFile("journals.csv", exported)},
         )
         messages = [m.message for m in get_messages(response2.wsgi_request)]
 
@@ -832,7 +1243,8 @@ class ImportTests(TestCase):
 
         # First, export.
         response1 = self.client.get(reverse("export-frames"))
-        reader = csv.reader(io.StringIO(response1.content.decode("UTF-8")))
+        exported = response1.getvalue()
+        reader = csv.reader(io.StringIO(exported.decode("UTF-8")))
         next(reader)  # Disregard the header row.
         rows = sum(1 for row in reader)
         self.assertEqual(rows, 1)
@@ -847,7 +1259,7 @@ class ImportTests(TestCase):
         # Then import from our export.
         response2 = self.client.post(
             reverse("import-frames"),
-            data={"csv": SimpleUploadedFile("frames.csv", response1.content)},
+            data={"csv": SimpleUploadedFile("frames.csv", exported)},
         )
         messages = [m.message for m in get_messages(response2.wsgi_request)]
 
@@ -860,6 +1272,78 @@ class ImportTests(TestCase):
         self.assertEqual(frames[0].created_at, self.tz_yesterday)
         self.assertEqual(frames[0].updated_at, self.tz_yesterday)
 
+    def export_rolls(self):
+        response = self.client.get(reverse("export-rolls"))
+        return list(csv.DictReader(io.StringIO(response.getvalue().decode("UTF-8"))))
+
+    def import_rolls(self, rows):
+        file = io.StringIO()
+        writer = csv.DictWriter(file, fieldnames=rows[0].keys())
+        writer.writeheader()
+        writer.writerows(rows)
+
+        response = self.client.post(
+            reverse("import-rolls"),
+            data={"csv": SimpleUploadedFile("rolls.csv", file.getvalue().encode())},
+        )
+        self.assertEqual(response.status_code, 302)
+        return [m.message for m in get_messages(response.wsgi_request)]
+
+    def test_import_rolls_reports_bad_rows(self):
+        film = baker.make(Film, stock=baker.make(Stock))
+        baker.make(Roll, owner=self.user, film=film, _quantity=4)
+        rows = self.export_rolls()
+        Roll.objects.filter(owner=self.user).delete()
+
+        rows[1]["film_id"] = "999999"
+        rows[2]["status"] = "99_nope"
+        rows[3]["id"] = rows[0]["id"]
+        messages = self.import_rolls(rows)
+
+        self.assertIn("Imported 1 roll.", messages)
+        self.assertIn("3 rows couldn’t be imported.", messages[-1])
+        self.assertIn("Line 3: There’s no film with id 999999.", messages[-1])
+        self.assertIn("Line 4: status:", messages[-1])
+        self.assertIn(f"Line 5: id {rows[0]['id']} is in the file", messages[-1])
+        self.assertEqual(
+            list(Roll.objects.filter(owner=self.user).values_list("id", flat=True)),
+            [int(rows[0]["id"])],
+        )
+
+    def test_import_rolls_twice(self):
+        film = baker.make(Film, stock=baker.make(Stock))
+        baker.make(Roll, owner=self.user, film=film, _quantity=2)
+        rows = self.export_rolls()
+
+        messages = self.import_rolls(rows)
+        self.assertIn("No rolls imported.", messages)
+        self.assertEqual(Roll.objects.filter(owner=self.user).count(), 2)
+
+        # Someone else's rows aren't overwritten.
+        other = User.objects.create_user(username="other", password="secret")
+        self.client.force_login(other)
+        messages = self.import_rolls(rows)
+        self.assertIn("2 rows couldn’t be imported.", messages[-1])
+        self.assertIn("is already taken", messages[-1])
+        self.assertFalse(Roll.objects.filter(owner=other).exists())
+
+    def test_import_rolls_queries_dont_grow(self):
+        film = baker.make(Film, stock=baker.make(Stock))
+        camera = baker.make(Camera, owner=self.user)
+
+        def queries(count):
+            Roll.objects.filter(owner=self.user).delete()
+            baker.make(Roll, owner=self.user, film=film, camera=camera, _quantity=count)
+            rows = self.export_rolls()
+            Roll.objects.filter(owner=self.user).delete()
+
+            with CaptureQueriesContext(connection) as context:
+                messages = self.import_rolls(rows)
+            self.assertIn(f"Imported {count} rolls.", messages)
+            return len(context.captured_queries)
+
+        self.assertEqual(queries(2), queries(20))
+
 
 @override_settings(STORAGES=staticfiles_storage)
 class JournalTests(TestCase):
@@ -975,6 +1459,26 @@ class ReadyTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "You have 1 roll ready to process.", html=True)
 
+    def test_ready_counts(self):
+        film_135 = baker.make(Film, format="135", stock=baker.make(Stock, type="e6"))
+        film_120 = baker.make(Film, format="120", stock=baker.make(Stock, type="c41"))
+        shot = status_number("shot")
+        baker.make(Roll, owner=self.user, film=film_135, status=shot, _quantity=2)
+        baker.make(Roll, owner=self.user, film=film_135, status=shot, push_pull="+2")
+        baker.make(Roll, owner=self.user, film=film_120, status=shot, push_pull="-2")
+        baker.make(Roll, owner=self.user, film=film_120)
+        response = self.client.get(reverse("ready"))
+        counts = response.context["rolls"]
+
+        self.assertEqual(counts["all"], 4)
+        self.assertEqual(counts["135"], 3)
+        self.assertEqual(counts["120"], 1)
+        self.assertEqual(counts["e6"]["all"], 3)
+        self.assertEqual(counts["e6"]["push2"], {"135": 1, "120": 0})
+        self.assertEqual(counts["c41"]["pull2"], {"135": 0, "120": 1})
+        self.assertEqual(counts["bw"]["all"], 0)
+        self.assertContains(response, "Pull 2")
+
 
 @override_settings(STORAGES=staticfiles_storage)
 class RollsAddTests(TestCase):
@@ -1012,6 +1516,23 @@ class RollsAddTests(TestCase):
         self.assertEqual(response.status_code, 302)
         self.assertIn(f"Added 2 rolls of {self.film}!", messages)
 
+    def test_adding_lots_of_rolls(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(
+                reverse("rolls-add"),
+                data={
+                    "film": self.film.id,
+                    "quantity": 100,
+                },
+            )
+
+        # A handful of INSERTs, not one per roll.
+        inserts = [
+            q for q in queries if q["sql"].startswith('INSERT INTO "inventory_roll"')
+        ]
+        self.assertLess(len(inserts), 5)
+        self.assertEqual(Roll.objects.filter(owner=self.user).count(), 100)
+
     def test_adding_rolls_invalid_quantity(self):
         response = self.client.post(
             reverse("rolls-add"),
@@ -1023,7 +1544,21 @@ class RollsAddTests(TestCase):
         messages = [m.message for m in get_messages(response.wsgi_request)]
 
         self.assertEqual(response.status_code, 302)
-        self.assertIn("Enter a valid quantity of 1 or more", messages)
+        self.assertIn("Enter a valid quantity from 1 to 100", messages)
+
+    def test_adding_too_many_rolls(self):
+        response = self.client.post(
+            reverse("rolls-add"),
+            data={
+                "film": self.film.id,
+                "quantity": 101,
+            },
+        )
+        messages = [m.message for m in get_messages(response.wsgi_request)]
+
+        self.assertEqual(response.status_code, 302)
+        self.assertIn("Enter a valid quantity from 1 to 100", messages)
+        self.assertFalse(Roll.objects.filter(owner=self.user).exists())
 
     def test_adding_rolls_less_than_1(self):
         response = self.client.post(
@@ -1036,7 +1571,7 @@ class RollsAddTests(TestCase):
         messages = [m.message for m in get_messages(response.wsgi_request)]
 
         self.assertEqual(response.status_code, 302)
-        self.assertIn("Enter a valid quantity of 1 or more", messages)
+        self.assertIn("Enter a valid quantity from 1 to 100", messages)
 
 
 @override_settings(STORAGES=staticfiles_storage)
@@ -1161,6 +1696,33 @@ class RollsUpdateTests(TestCase):
 
         self.assertEqual(response.status_code, 302)
         self.assertIn("2 rolls updated from processing to processed!", messages)
+        self.assertEqual(
+            list(
+                Roll.objects.filter(pk__in=roll_ids)
+                .values_list("status", "lab")
+                .distinct()
+            ),
+            [(status_number("processed"), "Home")],
+        )
+
+    def test_update_rolls_not_found(self):
+        roll = Roll.objects.filter(owner=self.user).first()
+        someone_elses = baker.make(Roll, status=status_number("processing"))
+
+        response = self.client.post(
+            reverse("rolls-update"),
+            data={
+                "current_status": "processing",
+                "updated_status": "processed",
+                "roll": [roll.id, someone_elses.id],
+            },
+        )
+        messages = [m.message for m in get_messages(response.wsgi_request)]
+
+        self.assertIn("1 roll updated from processing to processed!", messages)
+        self.assertIn("1 roll couldn’t be found.", messages)
+        someone_elses.refresh_from_db()
+        self.assertEqual(someone_elses.status, status_number("processing"))
 
     def test_update_rolls_errors(self):
         # Neither of these statuses are are `bulk_status`es.
@@ -1476,6 +2038,45 @@ class ProjectTests(TestCase):
             response, "partials/project-camera-logbook-wrapper.html"
         )
 
+    def test_project_detail_camera_tabs(self):
+        project = baker.make(Project, owner=self.user)
+        camera_loaded = baker.make(Camera, owner=self.user, status="loaded")
+        camera_outside = baker.make(Camera, owner=self.user, status="loaded")
+        camera_empty = baker.make(Camera, owner=self.user, status="empty")
+        camera_multi = baker.make(
+            Camera, owner=self.user, status="empty", multiple_backs=True
+        )
+        back = baker.make(CameraBack, camera=camera_multi, status="empty")
+        baker.make(CameraBack, camera=camera_multi, status="unavailable")
+        project.cameras.add(camera_loaded, camera_outside, camera_empty, camera_multi)
+        roll = baker.make(
+            Roll,
+            owner=self.user,
+            project=project,
+            camera=camera_loaded,
+            status=status_number("loaded"),
+        )
+        outside_roll = baker.make(
+            Roll,
+            owner=self.user,
+            camera=camera_outside,
+            status=status_number("loaded"),
+        )
+
+        response = self.client.get(reverse("project-detail", args=(project.id,)))
+        cameras = response.context["cameras"]
+
+        self.assertEqual(cameras.title, "Cameras and Backs")
+        self.assertEqual([tab["count"] for tab in cameras.tabs], [1, 2, 1])
+        self.assertEqual(cameras.current_tab, 2)
+        self.assertEqual(list(cameras.current_rows()), [outside_roll])
+
+        cameras.set_tab(0)
+        self.assertEqual(list(cameras.current_rows()), [roll])
+
+        cameras.set_tab(1)
+        self.assertEqual(cameras.current_rows(), [camera_empty, back])
+
     def test_project_rolls_add(self):
         project = baker.make(Project, owner=self.user)
         film = baker.make(Film)
@@ -2013,6 +2614,47 @@ class FrameViewTests(TestCase):
 
         self.assertEqual(response.status_code, 302)
         self.assertIn("3 frames saved!", messages)
+        self.assertEqual(
+            list(
+                Frame.objects.filter(roll=self.roll)
+                .order_by("number")
+                .values_list("number", flat=True)
+            ),
+            [1, 2, 3, 4],
+        )
+
+    def test_frame_create_too_many(self):
+        count = Frame.objects.filter(roll=self.roll).count()
+        response = self.client.post(
+            reverse("roll-frame-add", args=(self.roll.id,)),
+            data={"number": "1", "date": self.today, "ending_number": "1000"},
+        )
+
+        messages = [m.message for m in get_messages(response.wsgi_request)]
+
+        # Ranges stop at 100.
+        self.assertEqual(response.status_code, 302)
+        self.assertIn("Something is not right.", messages)
+        self.assertEqual(Frame.objects.filter(roll=self.roll).count(), count)
+
+    def test_frame_create_multiple_overlapping(self):
+        baker.make(Frame, roll=self.roll, number=4)
+
+        response = self.client.post(
+            reverse("roll-frame-add", args=(self.roll.id,)),
+            data={
+                "number": "2",
+                "date": self.today,
+                "ending_number": "6",
+            },
+        )
+
+        messages = [m.message for m in get_messages(response.wsgi_request)]
+
+        self.assertEqual(response.status_code, 302)
+        self.assertIn("This roll already has frame #4.", messages)
+        # All or nothing.
+        self.assertEqual(Frame.objects.filter(roll=self.roll).count(), 2)
 
     def test_frame_create_and_add_another(self):
         response = self.client.post(
@@ -2320,6 +2962,31 @@ class StockViewTests(TestCase):
         self.assertContains(response, "Your inventory of this stock")
         self.assertIsNotNone(response.context["stock"])
 
+    def test_stock_page_counts(self):
+        film_135 = baker.make(Film, stock=self.public_stock, format="135")
+        film_120 = baker.make(Film, stock=self.public_stock, format="120")
+        baker.make(Roll, film=film_135, owner=self.user, _quantity=2)
+        baker.make(
+            Roll, film=film_120, owner=self.user, status=status_number("archived")
+        )
+        baker.make(Roll, film=film_120, _quantity=3)
+
+        response = self.client.get(
+            reverse(
+                "stock",
+                args=(self.public_stock.manufacturer.slug, self.public_stock.slug),
+            )
+        )
+
+        self.assertEqual(response.context["total_rolls"], 6)
+        self.assertEqual(response.context["total_inventory"], 2)
+        self.assertEqual(response.context["total_history"], 1)
+        inventory = {
+            row["columns"][0]: row["columns"][1]
+            for row in response.context["total_inventory_table"]["rows"]
+        }
+        self.assertEqual(inventory, {"35mm": 2, "120": 0})
+
     def test_stock_page_logged_out(self):
         self.client.logout()
         response = self.client.get(
@@ -2332,6 +2999,32 @@ class StockViewTests(TestCase):
         self.assertNotContains(response, "Your inventory of this stock")
         self.assertIsNotNone(response.context["stock"])
 
+    def test_stocks_page_cached_logged_out(self):
+        self.client.logout()
+        self.client.get(self.stocks_url)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.stocks_url)
+        self.assertContains(response, self.public_stock.name)
+        self.assertFalse([q for q in queries if "inventory_" in q["sql"]])
+
+        # Changing the catalog starts over.
+        baker.make(Stock, name="Gold 200", manufacturer=self.public_stock.manufacturer)
+        response = self.client.get(self.stocks_url)
+        self.assertContains(response, "Gold 200")
+
+    def test_stocks_data_cached_logged_in(self):
+        self.client.get(self.stocks_url)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.stocks_url)
+        self.assertContains(response, self.personal_stock.name)
+        self.assertFalse([q for q in queries if "inventory_stock" in q["sql"]])
+
+        self.personal_stock.delete()
+        response = self.client.get(self.stocks_url)
+        self.assertNotContains(response, "Dracula")
+
     # HTMX / Ajax
     def test_stocks_htmx_with_type(self):
         response = stocks(
@@ -0,0 +1,227 @@
+"""
+How long requests spend in the database, in templates and in the rest of the
+view, sent back in a `Server-Timing` header (which browsers' developer tools
+show) and kept as rolling stats for each route for the innards' timings page.
+
+Only `SERVER_TIMING_SAMPLE_RATE` of requests (0 to 1) are timed. The stats
+are kept in memory, so each process only has its own, since it started. The
+header says how many queries each page runs and how long they take, so it's
+only for staff unless `SERVER_TIMING_PUBLIC` is set.
+"""
+
+import contextlib
+import contextvars
+import math
+import random
+import threading
+import time
+from collections import deque
+from typing import NamedTuple
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import DjangoTemplates, Template
+
+# How many of each route's latest requests its stats are worked out from.
+window = 500
+
+# The Timing of the request being handled, if it's being timed.
+current = contextvars.ContextVar("timing", default=None)
+
+
+class Timing:
+    "What one request has spent its time on so far, in seconds."
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total = 0.0
+        self.db = 0.0
+        self.queries = 0
+        self.templates = 0.0
+        self.depth = 0
+
+    def execute(self, execute, sql, params, many, context):
+        "For `connection.execute_wrapper`."
+
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - start
+            self.queries += 1
+
+    @contextlib.contextmanager
+    def rendering(self):
+        # Templates render others (and run queries) as they go. Only the
+        # outermost render is counted, less the queries it ran.
+        self.depth += 1
+        start = time.perf_counter()
+        db = self.db
+        try:
+            yield
+        finally:
+            self.depth -= 1
+            if not self.depth:
+                self.templates += time.perf_counter() - start - (self.db - db)
+
+    def finish(self):
+        self.total = time.perf_counter() - self.started
+
+    @property
+    def view(self):
+        "Whatever wasn't queries or templates."
+
+        return max(self.total - self.db - self.templates, 0.0)
+
+    def header(self):
+        return ", ".join(
+            [
+                f'db;dur={self.db * 1000:.1f};desc="{self.queries} queries"',
+                f"tpl;dur={self.templates * 1000:.1f}",
+                f"view;dur={self.view * 1000:.1f}",
+                f"total;dur={self.total * 1000:.1f}",
+            ]
+        )
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        timing = current.get()
+        if timing is None:
+            return super().render(context, request)
+
+        with timing.rendering():
+            return super().render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    "The usual template backend, with its renders timed for Server-Timing."
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
+
+
+def percentile(ordered, share):
+    "The nearest-rank percentile of some already sorted numbers."
+
+    return ordered[max(math.ceil(share * len(ordered)) - 1, 0)]
+
+
+class Sample(NamedTuple):
+    "One request's timings, in milliseconds."
+
+    total: float
+    db: float
+    templates: float
+    queries: int
+
+
+class RouteStats(NamedTuple):
+    route: str
+    requests: int
+    sampled: int
+    p50: float
+    p95: float
+    max: float
+    db_p50: float
+    templates_p50: float
+    queries_p50: int
+    queries_max: int
+
+    @classmethod
+    def from_samples(cls, route, requests, samples):
+        totals = sorted(sample.total for sample in samples)
+        queries = sorted(sample.queries for sample in samples)
+        return cls(
+            route,
+            requests,
+            len(samples),
+            percentile(totals, 0.5),
+            percentile(totals, 0.95),
+            totals[-1],
+            percentile(sorted(sample.db for sample in samples), 0.5),
+            percentile(sorted(sample.templates for sample in samples), 0.5),
+            percentile(queries, 0.5),
+            queries[-1],
+        )
+
+
+class RouteTimings:
+    "The latest timed requests for each route, in this process."
+
+    def __init__(self, window=window):
+        self.window = window
+        self.lock = threading.Lock()
+        self.routes = {}  # route: [requests, deque of Samples]
+        self.started = time.time()
+
+    def add(self, route, timing):
+        sample = Sample(
+            timing.total * 1000,
+            timing.db * 1000,
+            timing.templates * 1000,
+            timing.queries,
+        )
+        with self.lock:
+            counted = self.routes.setdefault(route, [0, deque(maxlen=self.window)])
+            counted[0] += 1
+            counted[1].append(sample)
+
+    def stats(self):
+        "Each route's stats, slowest (at the 95th percentile) first."
+
+        with self.lock:
+            routes = [
+                (route, requests, list(samples))
+                for route, (requests, samples) in self.routes.items()
+            ]
+
+        return sorted(
+            (RouteStats.from_samples(*route) for route in routes),
+            key=lambda stats: stats.p95,
+            reverse=True,
+        )
+
+    def clear(self):
+        with self.lock:
+            self.routes.clear()
+            self.started = time.time()
+
+
+route_timings = RouteTimings()
+
+
+class ServerTimingMiddleware:
+    """
+    Time a sample of requests, adding a Server-Timing header and counting
+    them in `route_timings`. It goes first so it covers everything else.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.SERVER_TIMING_SAMPLE_RATE:
+            return self.get_response(request)
+
+        timing = Timing()
+        token = current.set(timing)
+        try:
+            with contextlib.ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timing.execute))
+                response = self.get_response(request)
+        finally:
+            current.reset(token)
+        # Streamed responses are only timed up to when they start.
+        timing.finish()
+
+        user = getattr(request, "user", None)
+        if settings.SERVER_TIMING_PUBLIC or (user and user.is_staff):
+            response["Server-Timing"] = timing.header()
+        match = request.resolver_match
+        route_timings.add(f"/{match.route}" if match else "(no route)", timing)
+
+        return response
@@ -1,7 +1,9 @@
+from itertools import islice
 from django.core.mail import send_mail
 from django.db.models import Count, Q
 from django.utils.encoding import force_str
 from django.utils.text import slugify
+from .replicas import copy_version
 
 
 def get_project_or_none(Project, owner, project_id):
@@ -105,6 +107,19 @@ def status_description(status):
     return valid_statuses[status]["description"]
 
 
+def logbook_facets_cache_key(owner_id):
+    # On a replica, facets counted from one copy aren't used with the next.
+    return f"logbook-facets:{owner_id}:{copy_version()}"
+
+
+def batched(items, size=500):
+    "Lists of up to `size` items at a time, e.g. to keep `pk__in` lookups small."
+
+    items = iter(items)
+    while batch := list(islice(items, size)):
+        yield batch
+
+
 def pluralize(noun, count):
     if count != 1:
         return noun + "s"
@@ -232,7 +247,13 @@ film_formats = [
 
 
 class SectionTabs:
-    # TODO: write tests for this stuff.
+    """
+    A section of tabbed rows. Each tab's "rows" can be a list, an unevaluated
+    queryset, or a callable that returns either. Only the current tab's rows
+    are ever evaluated, so tab counts should come from an aggregate rather
+    than from the rows themselves.
+    """
+
     def __init__(self, title, target, current_tab, tabs, add_url=None):
         self.title = title
         self.slug = slugify(self.title)[:1]
@@ -240,9 +261,15 @@ class SectionTabs:
         self.tabs = tabs
         self.target = target
         self.add_url = add_url
+        self._rows = {}
 
     def current_rows(self):
-        return self.tabs[self.current_tab]["rows"]
+        # Templates ask for these more than once, so only build them once.
+        if self.current_tab not in self._rows:
+            rows = self.tabs[self.current_tab]["rows"]
+            self._rows[self.current_tab] = rows() if callable(rows) else rows
+
+        return self._rows[self.current_tab]
 
     def current_tab_action(self):
         try:
@@ -251,9 +278,5 @@ class SectionTabs:
             return "view"
 
     def set_tab(self, new_tab):
-        if str(new_tab).isdigit():
-            try:
-                self.current_tab = int(new_tab)
-            except IndexError:
-                # That tab doesn't exist.
-                pass
+        if str(new_tab).isdigit() and int(new_tab) < len(self.tabs):
+            self.current_tab = int(new_tab)
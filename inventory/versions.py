@@ -0,0 +1,103 @@
+"""
+Per-user data versions, so pages built only from someone's own rows can tell
+a browser nothing has changed without building them again.
+
+Every write to a user's rolls, cameras, backs, projects, journal entries or
+frames sets a new version for them (see the receivers and `OwnedQuerySet` in
+models.py). Views wrapped in `etag_on_data_version` answer a matching
+If-None-Match with a 304 before they run a single query of their own.
+"""
+
+import hashlib
+import time
+from functools import wraps
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+from .catalog import catalog_version
+from .replicas import copy_version
+
+
+def data_version_key(owner_id):
+    return f"data-version:{owner_id}"
+
+
+def data_version(owner_id):
+    return cache.get_or_set(data_version_key(owner_id), time.time_ns, None)
+
+
+def bump_data_versions(owner_ids):
+    """
+    Give these owners new versions now and again once the current transaction
+    commits, so a request that read the old rows in the meantime can't tag
+    them with the new version.
+    """
+
+    owner_ids = {owner_id for owner_id in owner_ids if owner_id is not None}
+
+    def bump():
+        version = time.time_ns()
+        for owner_id in owner_ids:
+            cache.set(data_version_key(owner_id), version, None)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def data_etag(request, *args, **kwargs):
+    "A weak ETag for everything a page of someone's own data depends on."
+
+    if (
+        request.method not in ("GET", "HEAD")
+        or not request.user.is_authenticated
+        or get_messages(request)
+    ):
+        return None
+
+    parts = [
+        settings.RELEASE,
+        request.user.pk,
+        data_version(request.user.pk),
+        catalog_version(),
+        # A replica's data versions don't change when the primary's do.
+        copy_version(),
+        # For anything that says how long ago something happened.
+        timezone.localdate(),
+        getattr(request, "session", {}).get("sidebar"),
+        request.headers.get("HX-Request"),
+        request.headers.get("HX-Target"),
+        request.headers.get("HX-History-Restore-Request"),
+        request.get_full_path(),
+    ]
+    digest = hashlib.md5(
+        "|".join(map(str, parts)).encode(), usedforsecurity=False
+    ).hexdigest()
+
+    return f'W/"{digest}"'
+
+
+def etag_on_data_version(view):
+    """
+    Answer with a 304 if the browser already has this page for the current
+    data version, and make browsers check back every time rather than guess.
+    """
+
+    conditional_view = condition(etag_func=data_etag)(view)
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        response = conditional_view(request, *args, **kwargs)
+        if response.has_header("ETag"):
+            if response.status_code in (200, 304):
+                patch_cache_control(response, private=True, no_cache=True)
+                patch_vary_headers(response, ["HX-Request"])
+            else:
+                del response.headers["ETag"]
+
+        return response
+
+    return wrapper
@@ -1,9 +1,18 @@
+import copy
 import datetime
 import json
-from django.http import HttpResponse, HttpResponseForbidden, Http404
+from django.http import (
+    FileResponse,
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseForbidden,
+    HttpResponseGone,
+    Http404,
+)
 from django.shortcuts import render, get_object_or_404, redirect
 from django.views.generic import View
-from django.db.models import Count, Q
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
 from django.db import IntegrityError, transaction
 from django.contrib.auth import login
 from django.views.decorators.http import require_POST
@@ -11,11 +20,15 @@ from django.views.decorators.csrf import csrf_exempt
 from django.utils.encoding import force_str
 from django.utils.decorators import method_decorator
 from django.utils.text import slugify
+from django.utils import timezone
 from django.urls import reverse
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
+from django.contrib import admin
+from django.core import signing
+from django.core.cache import cache
 from django.contrib.auth.models import User
 from django.contrib import messages
-from django.core.paginator import Paginator
 from django.contrib.sites.shortcuts import get_current_site
 from django.conf import settings
 from django_registration.backends.activation.views import (
@@ -33,7 +46,9 @@ from .models import (
     Journal,
     Project,
     Roll,
+    RollCounter,
     Frame,
+    Job,
 )
 from .forms import (
     CameraForm,
@@ -49,6 +64,7 @@ from .forms import (
     StockForm,
     UserForm,
     UploadCSVForm,
+    UploadArchiveForm,
     FrameForm,
     CameraOrBackLoadForm,
     ProjectFilmForm,
@@ -73,33 +89,57 @@ from .utils import (
     push_pull_to_db,
     push_pull_to_form,
 )
+from .cache import CacheStats
+from .catalog import cache_for_anonymous, cached
+from .counts import DashboardSummary, LogbookFacets, ProjectCamerasSummary, RollPivot
+from .pagination import CursorPaginator, logbook_ordering
+from .replicas import primary_only
+from .timing import route_timings
+from .versions import etag_on_data_version
+from . import archive
+from .exports import (
+    CameraBackExport,
+    CameraExport,
+    FrameExport,
+    JournalExport,
+    ProjectExport,
+    RollExport,
+    parse_since,
+    tombstones_kept,
+)
+from .imports import (
+    CameraBackImport,
+    CameraImport,
+    FrameImport,
+    ImportReport,
+    JournalImport,
+    ProjectImport,
+    RollImport,
+)
+from .jobs import (
+    background_export_rows,
+    background_import_size,
+    queue_export,
+    queue_import,
+)
 from .mixins import ReadCSVMixin, WriteCSVMixin, RedirectAfterImportMixin
 
 
 @login_required
+@etag_on_data_version
 def index(request):
     owner = request.user
+    summary = DashboardSummary(owner)
     cameras_total = Camera.objects.filter(owner=owner)
-    camera_backs_total = CameraBack.objects.filter(camera__owner=owner)
     cameras_empty = cameras_total.filter(status="empty").exclude(multiple_backs=True)
-    camera_backs_empty = camera_backs_total.filter(status="empty")
+    camera_backs_empty = CameraBack.objects.filter(camera__owner=owner, status="empty")
     cameras_unavailable = cameras_total.filter(status="unavailable")
-    rolls = Roll.objects.filter(owner=owner)
-    rolls_loaded = rolls.filter(status=status_number("loaded"))
+    rolls_loaded = Roll.objects.filter(owner=owner, status=status_number("loaded"))
     all_projects = Project.objects.filter(owner=owner).order_by(
         "-updated_at",
     )
 
-    # Define counts so that we can intelligently show non-empty tabs by default.
-    count_loaded_cameras = rolls_loaded.count()
-    count_ready_cameras = cameras_empty.count() + camera_backs_empty.count()
-    count_unavailable_cameras = cameras_unavailable.count()
-
-    initial_cameras_tab = 0
-    if count_ready_cameras and not count_loaded_cameras:
-        initial_cameras_tab = 1
-    elif count_unavailable_cameras and not count_loaded_cameras:
-        initial_cameras_tab = 2
+    initial_cameras_tab = summary.initial_cameras_tab()
 
     cameras = SectionTabs(
         "Cameras",
@@ -108,32 +148,26 @@ def index(request):
         [
             {
                 "name": "Loaded",
-                "count": count_loaded_cameras,
+                "count": summary.rolls_loaded,
                 "rows": rolls_loaded,
                 "action": "roll",
             },
             {
                 "name": "Ready to Load",
-                "count": count_ready_cameras,
-                "rows": list(chain(cameras_empty, camera_backs_empty)),
+                "count": summary.cameras_ready,
+                "rows": lambda: list(chain(cameras_empty, camera_backs_empty)),
                 "action": "load",
             },
             {
                 "name": "Unavailable",
-                "count": count_unavailable_cameras,
+                "count": summary.cameras_unavailable,
                 "rows": cameras_unavailable,
             },
         ],
         reverse("camera-add"),
     )
 
-    # Define counts so that we can intelligently show non-empty tabs by default.
-    count_current_projects = all_projects.filter(status="current").count()
-    count_archived_projects = all_projects.filter(status="archived").count()
-
-    initial_projects_tab = 0
-    if not count_current_projects and count_archived_projects:
-        initial_projects_tab = 1
+    initial_projects_tab = summary.initial_projects_tab()
 
     projects = SectionTabs(
         "Projects",
@@ -142,12 +176,12 @@ def index(request):
         [
             {
                 "name": "Current",
-                "count": count_current_projects,
+                "count": summary.projects_current,
                 "rows": all_projects.filter(status="current"),
             },
             {
                 "name": "Archived",
-                "count": count_archived_projects,
+                "count": summary.projects_archived,
                 "rows": all_projects.filter(status="archived"),
             },
         ],
@@ -184,9 +218,8 @@ def index(request):
         context = {
             "email": owner.email,
             "cameras": cameras,
-            "cameras_total": cameras_total,
             "projects": projects,
-            "rolls": rolls,
+            "summary": summary,
             "film_types": film_types,
         }
 
@@ -290,6 +323,47 @@ def marketing_site(request):
         return HttpResponseForbidden("You are not logged in.")
 
 
+@staff_member_required
+def cache_stats(request):
+    "Hit rates for the cache of each process that's used it lately."
+
+    context = {
+        **admin.site.each_context(request),
+        "title": "Cache",
+    }
+
+    # Only the two-tier cache keeps stats.
+    if hasattr(cache, "stats"):
+        processes = cache.stats()
+        context["processes"] = processes
+        context["total"] = CacheStats.total(processes)
+        context["shared_entries"], context["local_entries"] = cache.size()
+
+    return render(request, "admin/cache_stats.html", context)
+
+
+@staff_member_required
+def request_timings(request):
+    "How long each route's sampled requests have been taking in this process."
+
+    if request.method == "POST":
+        route_timings.clear()
+        return redirect("request-timings")
+
+    context = {
+        **admin.site.each_context(request),
+        "title": "Request timings",
+        "routes": route_timings.stats(),
+        "started_at": datetime.datetime.fromtimestamp(
+            route_timings.started, datetime.timezone.utc
+        ),
+        "sample_rate": settings.SERVER_TIMING_SAMPLE_RATE,
+        "window": route_timings.window,
+    }
+
+    return render(request, "admin/request_timings.html", context)
+
+
 @login_required
 def account_settings(request):
     if request.method == "POST":
@@ -320,17 +394,21 @@ def account_settings(request):
         user_form = UserForm(instance=request.user)
         profile_form = ProfileForm(instance=request.user.profile)
         csv_form = UploadCSVForm()
+        archive_form = UploadArchiveForm()
         exportable = {
             "cameras": Camera.objects.filter(owner=request.user).count(),
             "camera-backs": CameraBack.objects.filter(
                 camera__owner=request.user
             ).count(),
-            "rolls": Roll.objects.filter(owner=request.user).count(),
+            "rolls": RollCounter.objects.filter(owner=request.user).aggregate(
+                count=Coalesce(Sum("count"), 0)
+            )["count"],
             "projects": Project.objects.filter(owner=request.user).count(),
             "journals": Journal.objects.filter(roll__owner=request.user).count(),
             "frames": Frame.objects.filter(roll__owner=request.user).count(),
         }
-        exportable_data = True if sum(exportable.values()) else False
+        exportable_total = sum(exportable.values())
+        exportable_data = True if exportable_total else False
         imports = [
             "Cameras",
             "Camera-Backs",
@@ -344,10 +422,14 @@ def account_settings(request):
             "user_form": user_form,
             "profile_form": profile_form,
             "csv_form": csv_form,
+            "archive_form": archive_form,
             "exportable": exportable,
             "exportable_data": exportable_data,
+            "exportable_total": exportable_total,
             "imports": imports,
+            "background_export_rows": background_export_rows,
             "js_needed": True,
+            **jobs_context(request),
         }
 
         return render(request, "inventory/settings.html", context)
@@ -375,6 +457,7 @@ def kofi_webhooks(request):
     return HttpResponse(status=200)
 
 
+@cache_for_anonymous
 def stocks(request, manufacturer="all"):
     filters = {
         "manufacturer": manufacturer,
@@ -426,13 +509,19 @@ def stocks(request, manufacturer="all"):
             )
         )
 
+    # What each person can see differs by their personal stocks.
+    viewer = request.user.pk or "public"
+    manufacturers = cached(("manufacturers", viewer), lambda: list(manufacturers))
     type_names = dict(Stock._meta.get_field("type").flatchoices)
     type_choices = {}
 
     if filters["manufacturer"] != "all":
         m = get_object_or_404(Manufacturer, slug=filters["manufacturer"])
         stocks = stocks.filter(manufacturer=m)
-        type_choices = available_types(request, Stock, type_names, type_choices, m)
+        type_choices = cached(
+            ("types", viewer, m.pk),
+            lambda: available_types(request, Stock, type_names, {}, m),
+        )
     else:
         type_choices = type_names
 
@@ -446,6 +535,11 @@ def stocks(request, manufacturer="all"):
                 reverse("stocks-manufacturer", args=(filters["manufacturer"],))
             )
 
+    stocks = cached(
+        ("stocks", viewer, filters["manufacturer"], filters["type"]),
+        lambda: list(stocks.select_related("manufacturer")),
+    )
+
     context = {
         "manufacturer": m,
         "manufacturers": manufacturers,
@@ -471,45 +565,42 @@ def stocks(request, manufacturer="all"):
         return render(request, "inventory/stocks.html", context)
 
 
+@cache_for_anonymous
 def stock(request, manufacturer, slug):
     manufacturer = get_object_or_404(Manufacturer, slug=manufacturer)
     stock = get_object_or_404(Stock, manufacturer=manufacturer, slug=slug)
 
+    films = Film.objects.filter(stock=stock).select_related("stock")
+
     if request.user.is_authenticated:
         if stock.personal and stock.added_by != request.user:
             raise Http404()
 
-        films = (
-            Film.objects.filter(stock=stock)
-            .exclude(Q(personal=True) & ~Q(added_by=request.user))
-            .annotate(count=Count("roll"))
+        # Everyone's rolls plus this person's inventory and history in one go.
+        storage = status_number("storage")
+        films = films.exclude(Q(personal=True) & ~Q(added_by=request.user)).annotate(
+            count=Count("roll"),
+            user_inventory_count=Count(
+                "roll", filter=Q(roll__owner=request.user, roll__status=storage)
+            ),
+            user_history_count=Count(
+                "roll", filter=Q(roll__owner=request.user) & ~Q(roll__status=storage)
+            ),
         )
     else:
         if stock.personal:
             raise Http404()
 
-        films = (
-            Film.objects.filter(stock=stock)
-            .exclude(Q(personal=True))
-            .annotate(count=Count("roll"))
-        )
+        films = films.exclude(Q(personal=True)).annotate(count=Count("roll"))
 
     films_list = []
     total_rolls = 0
     total_inventory = 0
     total_history = 0
     for film in films:
-        user_inventory_count = None
-        user_history_count = None
+        user_inventory_count = getattr(film, "user_inventory_count", None)
+        user_history_count = getattr(film, "user_history_count", None)
         if request.user.is_authenticated:
-            user_inventory_count = Roll.objects.filter(
-                owner=request.user, film=film, status=status_number("storage")
-            ).count()
-            user_history_count = (
-                Roll.objects.filter(owner=request.user, film=film)
-                .exclude(status=status_number("storage"))
-                .count()
-            )
             total_inventory = total_inventory + user_inventory_count
             total_history = total_history + user_history_count
 
@@ -517,7 +608,7 @@ def stock(request, manufacturer, slug):
             {
                 "name": film.get_format_display(),
                 "url": film.get_absolute_url(),
-                "type": film.stock.type,
+                "type": stock.type,
                 "count": film.count,
                 "user_inventory_count": user_inventory_count,
                 "user_history_count": user_history_count,
@@ -569,6 +660,7 @@ def stock(request, manufacturer, slug):
 
 
 @login_required
+@etag_on_data_version
 def inventory(request):
     filters = {
         "format": "all",
@@ -584,46 +676,9 @@ def inventory(request):
         roll__owner=request.user,
         roll__status=status_number("storage"),
     )
-    total_rolls = total_film_count.count()
-
-    inventory_rolls = {
-        "c41": total_film_count.filter(stock__type="c41"),
-        "bw": total_film_count.filter(stock__type="bw"),
-        "e6": total_film_count.filter(stock__type="e6"),
-        "135": {
-            "all": total_film_count.filter(format=135),
-            "c41": total_film_count.filter(format=135, stock__type="c41"),
-            "bw": total_film_count.filter(format=135, stock__type="bw"),
-            "e6": total_film_count.filter(format=135, stock__type="e6"),
-        },
-        "120": {
-            "all": total_film_count.filter(format=120),
-            "c41": total_film_count.filter(format=120, stock__type="c41"),
-            "bw": total_film_count.filter(format=120, stock__type="bw"),
-            "e6": total_film_count.filter(format=120, stock__type="e6"),
-        },
-    }
-
-    inventory_counts = {
-        "all": total_rolls,
-        "135": inventory_rolls["135"]["all"].count(),
-        "120": inventory_rolls["120"]["all"].count(),
-        "c41": {
-            "all": inventory_rolls["c41"].count(),
-            "135": inventory_rolls["135"]["c41"].count(),
-            "120": inventory_rolls["120"]["c41"].count(),
-        },
-        "bw": {
-            "all": inventory_rolls["bw"].count(),
-            "135": inventory_rolls["135"]["bw"].count(),
-            "120": inventory_rolls["120"]["bw"].count(),
-        },
-        "e6": {
-            "all": inventory_rolls["e6"].count(),
-            "135": inventory_rolls["135"]["e6"].count(),
-            "120": inventory_rolls["120"]["e6"].count(),
-        },
-    }
+    pivot = RollPivot.from_counters(request.user, status_number("storage"))
+    inventory_counts = pivot.counts()
+    total_rolls = inventory_counts["all"]
 
     # Querystring filters.
     if request.GET.get("format") and request.GET.get("format") != "all":
@@ -638,38 +693,24 @@ def inventory(request):
 
     film_counts = inventory_filter(request, Film, filters["format"], filters["type"])
 
-    format_counts = (
-        Film.objects.filter(
-            roll__owner=request.user, roll__status=status_number("storage")
-        )
-        .values("format")
-        .distinct()
-        .order_by("-format")
-    )
-
-    # Get the display name of formats choices.
+    # Get the display name of formats and types choices.
     format_choices = dict(Film._meta.get_field("format").flatchoices)
-    for format in format_counts:
-        format["format_display"] = force_str(
-            format_choices[format["format"]], strings_only=True
-        )
-
-    type_counts = (
-        Film.objects.filter(
-            roll__owner=request.user, roll__status=status_number("storage")
-        )
-        .values("stock__type")
-        .distinct()
-        .order_by("stock__type")
-    )
+    format_counts = [
+        {
+            "format": format,
+            "format_display": force_str(format_choices[format], strings_only=True),
+        }
+        for format in pivot.formats()
+    ]
 
-    # Get the display name of types choices.
     type_choices = dict(Stock._meta.get_field("type").flatchoices)
-    for type in type_counts:
-        if type["stock__type"] is not None:
-            type["type_display"] = force_str(
-                type_choices[type["stock__type"]], strings_only=True
-            )
+    type_counts = [
+        {
+            "stock__type": type,
+            "type_display": force_str(type_choices[type], strings_only=True),
+        }
+        for type in pivot.types()
+    ]
 
     context = {
         "total_film_count": total_film_count,
@@ -699,33 +740,18 @@ def inventory(request):
 
 
 @login_required
+@etag_on_data_version
 def logbook(request):
     owner = request.user
     status = 0
     description = "Everything that’s not in inventory."
-    rolls = (
-        Roll.objects.filter(owner=owner)
-        .exclude(status=status_number("storage"))
-        .order_by("status", "-ended_on", "-started_on", "-code")
-    )
+    rolls = Roll.objects.filter(owner=owner).exclude(status=status_number("storage"))
     year = ""
-    all_years = {}
-    all_years_count = rolls.count()
-    all_years.update({"all": all_years_count})
+    facets = LogbookFacets(owner)
+    all_years = facets.all_years
+    all_years_count = all_years["all"]
     pagination_querystring = ""
-    status_counts = {
-        "all": rolls.count(),
-        "loaded": rolls.filter(status=status_number("loaded")).count(),
-        "shot": rolls.filter(status=status_number("shot")).count(),
-        "processing": rolls.filter(status=status_number("processing")).count(),
-        "processed": rolls.filter(status=status_number("processed")).count(),
-        "scanned": rolls.filter(status=status_number("scanned")).count(),
-        "archived": rolls.filter(status=status_number("archived")).count(),
-    }
-
-    for y in rolls.dates("started_on", "year", order="DESC"):
-        count = rolls.filter(started_on__year=y.year).count()
-        all_years.update({y.year: count})
+    status_counts = facets.status_counts
 
     if request.GET.get("status") and request.GET.get("status") in status_keys:
         status = request.GET.get("status")
@@ -748,11 +774,14 @@ def logbook(request):
         pagination_querystring += f"&year={year}"
         rolls = rolls.filter(started_on__year=year)
 
-    # Pagination
-    paginator = Paginator(rolls, 10)
-    page_number = request.GET.get("page") if request.GET.get("page") else 1
-    page_obj = paginator.get_page(page_number)
-    page_range = paginator.get_elided_page_range(number=page_number)
+    # Pagination, numbered if the facets already tell us how many rolls match.
+    count = None
+    if not year:
+        count = status_counts[status or "all"]
+    elif not status and year.isdigit():
+        count = all_years.get(int(year), 0)
+
+    page_obj = CursorPaginator(rolls, 10, logbook_ordering, count).get_page(request.GET)
     bulk_status_next = ""
 
     if status in bulk_status_keys:
@@ -763,7 +792,6 @@ def logbook(request):
         "rolls": rolls,
         "status": status,
         "page_obj": page_obj,
-        "page_range": page_range,
         "description": description,
         "year": year,
         "all_years": all_years,
@@ -784,115 +812,16 @@ def logbook(request):
 
 
 @login_required
+@etag_on_data_version
 def ready(request):
     form = ReadyForm()
-    rolls = Roll.objects.filter(
-        owner=request.user, status=status_number("shot")
-    ).order_by("-ended_on", "-started_on", "-code")
-
-    ready_rolls = {
-        "c41": rolls.filter(film__stock__type="c41"),
-        "bw": rolls.filter(film__stock__type="bw"),
-        "e6": rolls.filter(film__stock__type="e6"),
-        "135": {
-            "all": rolls.filter(film__format=135),
-            "c41": rolls.filter(film__format=135, film__stock__type="c41"),
-            "bw": rolls.filter(film__format=135, film__stock__type="bw"),
-            "e6": rolls.filter(film__format=135, film__stock__type="e6"),
-        },
-        "120": {
-            "all": rolls.filter(film__format=120),
-            "c41": rolls.filter(film__format=120, film__stock__type="c41"),
-            "bw": rolls.filter(film__format=120, film__stock__type="bw"),
-            "e6": rolls.filter(film__format=120, film__stock__type="e6"),
-        },
-    }
+    rolls = Roll.objects.filter(owner=request.user, status=status_number("shot"))
 
-    ready_counts = {
-        "all": rolls.count(),
-        "135": ready_rolls["135"]["all"].count(),
-        "120": ready_rolls["120"]["all"].count(),
-        "c41": {
-            "all": ready_rolls["c41"].count(),
-            "135": ready_rolls["135"]["c41"].count(),
-            "120": ready_rolls["120"]["c41"].count(),
-            "pull2": {
-                "135": ready_rolls["135"]["c41"].filter(push_pull="-2").count(),
-                "120": ready_rolls["120"]["c41"].filter(push_pull="-2").count(),
-            },
-            "pull1": {
-                "135": ready_rolls["135"]["c41"].filter(push_pull="-1").count(),
-                "120": ready_rolls["120"]["c41"].filter(push_pull="-1").count(),
-            },
-            "push1": {
-                "135": ready_rolls["135"]["c41"].filter(push_pull="+1").count(),
-                "120": ready_rolls["120"]["c41"].filter(push_pull="+1").count(),
-            },
-            "push2": {
-                "135": ready_rolls["135"]["c41"].filter(push_pull="+2").count(),
-                "120": ready_rolls["120"]["c41"].filter(push_pull="+2").count(),
-            },
-            "push3": {
-                "135": ready_rolls["135"]["c41"].filter(push_pull="+3").count(),
-                "120": ready_rolls["120"]["c41"].filter(push_pull="+3").count(),
-            },
-        },
-        "bw": {
-            "all": ready_rolls["bw"].count(),
-            "135": ready_rolls["135"]["bw"].count(),
-            "120": ready_rolls["120"]["bw"].count(),
-            "pull2": {
-                "135": ready_rolls["135"]["bw"].filter(push_pull="-2").count(),
-                "120": ready_rolls["120"]["bw"].filter(push_pull="-2").count(),
-            },
-            "pull1": {
-                "135": ready_rolls["135"]["bw"].filter(push_pull="-1").count(),
-                "120": ready_rolls["120"]["bw"].filter(push_pull="-1").count(),
-            },
-            "push1": {
-                "135": ready_rolls["135"]["bw"].filter(push_pull="+1").count(),
-                "120": ready_rolls["120"]["bw"].filter(push_pull="+1").count(),
-            },
-            "push2": {
-                "135": ready_rolls["135"]["bw"].filter(push_pull="+2").count(),
-                "120": ready_rolls["120"]["bw"].filter(push_pull="+2").count(),
-            },
-            "push3": {
-                "135": ready_rolls["135"]["bw"].filter(push_pull="+3").count(),
-                "120": ready_rolls["120"]["bw"].filter(push_pull="+3").count(),
-            },
-        },
-        "e6": {
-            "all": ready_rolls["e6"].count(),
-            "135": ready_rolls["135"]["e6"].count(),
-            "120": ready_rolls["120"]["e6"].count(),
-            "pull2": {
-                "135": ready_rolls["135"]["e6"].filter(push_pull="-2").count(),
-                "120": ready_rolls["120"]["e6"].filter(push_pull="-2").count(),
-            },
-            "pull1": {
-                "135": ready_rolls["135"]["e6"].filter(push_pull="-1").count(),
-                "120": ready_rolls["120"]["e6"].filter(push_pull="-1").count(),
-            },
-            "push1": {
-                "135": ready_rolls["135"]["e6"].filter(push_pull="+1").count(),
-                "120": ready_rolls["120"]["e6"].filter(push_pull="+1").count(),
-            },
-            "push2": {
-                "135": ready_rolls["135"]["e6"].filter(push_pull="+2").count(),
-                "120": ready_rolls["120"]["e6"].filter(push_pull="+2").count(),
-            },
-            "push3": {
-                "135": ready_rolls["135"]["e6"].filter(push_pull="+3").count(),
-                "120": ready_rolls["120"]["e6"].filter(push_pull="+3").count(),
-            },
-        },
-    }
+    ready_counts = RollPivot.from_counters(request.user, status_number("shot")).counts()
 
-    # Pagination / 20 per page
-    paginator = Paginator(rolls, 10)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    page_obj = CursorPaginator(
+        rolls, 10, ["-ended_on", "-started_on", "-code"], ready_counts["all"]
+    ).get_page(request.GET)
 
     context = {
         "owner": request.user,
@@ -930,34 +859,23 @@ def rolls_update(request):
     current_status = request.POST.get("current_status")
     updated_status = request.POST.get("updated_status")
     rolls = request.POST.getlist("roll")
+    changes = {}
 
     if form.is_valid():
         # This is for the sake of the Ready page.
         # I guess this works with forms on Logbook views since none of the
         # fields are required so it happily ignores them not being there?
-        lab = form.cleaned_data["lab"]
-        scanner = form.cleaned_data["scanner"]
-        notes_on_development = form.cleaned_data["notes_on_development"]
+        for field in ("lab", "scanner", "notes_on_development"):
+            if form.cleaned_data[field]:
+                changes[field] = form.cleaned_data[field]
 
     if current_status in bulk_status_keys and updated_status in bulk_status_keys:
-        # Bulk update selected rows.
-        # Verify that the selected row IDs belong to request.user.
-        roll_count = 0
-        for roll_to_update in rolls:
-            roll = Roll.objects.get(pk=roll_to_update)
-
-            if roll.owner == owner:
-                roll.status = status_number(updated_status)
-                if lab:
-                    roll.lab = lab
-                if scanner:
-                    roll.scanner = scanner
-                if notes_on_development:
-                    roll.notes_on_development = notes_on_development
-                roll.save()
-                roll_count += 1
-
-        # Check for errors somehow. Don't assume everything worked.
+        # Bulk update selected rows. Only request.user's rolls are found.
+        outcomes = Roll.objects.filter(owner=owner).transition(
+            rolls, status_number(updated_status), **changes
+        )
+        roll_count = list(outcomes.values()).count("updated")
+        missing = len(outcomes) - roll_count
 
         messages.success(
             request,
@@ -969,6 +887,11 @@ def rolls_update(request):
                 updated_status,
             ),
         )
+        if missing:
+            messages.warning(
+                request,
+                "%s %s couldn’t be found." % (missing, pluralize("roll", missing)),
+            )
     else:
         messages.error(request, "Something is amiss.")
 
@@ -1073,103 +996,41 @@ def project_delete(request, pk):
 
 
 @login_required
+@etag_on_data_version
 def project_detail(request, pk):
     owner = request.user
     project = get_object_or_404(Project, id=pk, owner=owner)
-
-    # Get all of this user's cameras not already associated with this project.
-    cameras_to_add = (
-        Camera.objects.filter(owner=owner)
-        .exclude(pk__in=project.cameras.values_list("pk", flat=True))
-        .exclude(status="unavailable")
-        .order_by("status")
-    )
-    cameras_empty = project.cameras.filter(status="empty").exclude(multiple_backs=True)
+    summary = ProjectCamerasSummary(project)
 
     cameras_section_name = "Cameras"
-    camera_backs_empty = []
-    for camera in project.cameras.all():
-        if camera.multiple_backs:
-            cameras_section_name = "Cameras and Backs"
-            for back in camera.camera_backs.all():
-                if back.status == ("empty"):
-                    camera_backs_empty.append(back)
-
-    ready_to_load = []
-    for camera in cameras_empty:
-        ready_to_load.append(camera)
-    for back in camera_backs_empty:
-        ready_to_load.append(back)
-
-    loaded = []
+    if summary.has_multiple_backs:
+        cameras_section_name = "Cameras and Backs"
+
+    cameras_empty = project.cameras.filter(status="empty").exclude(multiple_backs=True)
+    camera_backs_empty = CameraBack.objects.filter(
+        camera__in=project.cameras.filter(multiple_backs=True), status="empty"
+    ).order_by("camera__status", "camera__name", "pk")
     loaded_roll_list = Roll.objects.filter(
         owner=owner,
         project=project,
         status=status_number("loaded"),
     )
-    for roll in loaded_roll_list:
-        loaded.append(roll)
-
-    loaded_outside_project = []
-    for camera in project.cameras.all():
-        for roll in camera.roll_set.all():
-            if roll.status == status_number("loaded") and roll.project != project:
-                loaded_outside_project.append(roll)
-
-    # Unused rolls already in this project
-    total_film_count = Film.objects.filter(
-        roll__owner=owner,
-        roll__project=project,
-        roll__status=status_number("storage"),
-    )
-    film_counts = total_film_count.annotate(count=Count("roll")).order_by(
-        "stock__type",
-        "-format",
-        "stock__manufacturer__name",
-        "name",
-    )
-
-    format_counts = {
-        "135": film_counts.filter(format="135"),
-        "120": film_counts.filter(format="120"),
-    }
-
-    # rolls available to be added to a project
-    film_available_count = (
-        Film.objects.filter(
-            roll__owner=owner,
-            roll__project=None,
-            roll__status=status_number("storage"),
-        )
-        .annotate(count=Count("roll"))
-        .order_by(
-            "stock__type",
-            "stock__manufacturer__name",
-            "format",
-        )
-        .exclude(stock=None)
-    )
+    loaded_outside_project = Roll.objects.filter(
+        owner=owner,
+        camera__in=project.cameras.all(),
+        status=status_number("loaded"),
+    ).exclude(project=project)
 
     roll_logbook = (
         Roll.objects.filter(owner=owner, project=project)
         .exclude(status=status_number("storage"))
-        .order_by("status", "-ended_on", "-started_on", "-code")
+        .order_by(*logbook_ordering)
     )
 
-    count_loaded_cameras = len(loaded)
-    count_ready_cameras = len(ready_to_load)
-    count_outside_cameras = len(loaded_outside_project)
-
-    initial_camera_tab = 0
-    if count_ready_cameras and not count_loaded_cameras:
-        initial_camera_tab = 1
-    elif count_outside_cameras:
-        initial_camera_tab = 2
+    initial_camera_tab = summary.initial_cameras_tab()
 
     c = request.GET.get("c") if request.GET.get("c") else initial_camera_tab
     sectiontab_querystring = f"c={c}"
-    page = request.GET.get("page") or 1
-    pagination_querystring = f"page={page}"
 
     cameras = SectionTabs(
         cameras_section_name,
@@ -1178,19 +1039,19 @@ def project_detail(request, pk):
         [
             {
                 "name": "Loaded",
-                "count": count_loaded_cameras,
-                "rows": loaded,
+                "count": summary.rolls_loaded,
+                "rows": loaded_roll_list,
                 "action": "roll",
             },
             {
                 "name": "Ready to load",
-                "count": count_ready_cameras,
-                "rows": ready_to_load,
+                "count": summary.cameras_ready,
+                "rows": lambda: list(chain(cameras_empty, camera_backs_empty)),
                 "action": "load",
             },
             {
                 "name": "Loaded outside of project",
-                "count": count_outside_cameras,
+                "count": summary.rolls_loaded_outside,
                 "rows": loaded_outside_project,
                 "action": "roll",
             },
@@ -1198,11 +1059,8 @@ def project_detail(request, pk):
     )
     cameras.set_tab(c)
 
-    # Pagination
-    paginator = Paginator(roll_logbook, 10)
-    page_number = request.GET.get("page") if request.GET.get("page") else 1
-    page_obj = paginator.get_page(page_number)
-    page_range = paginator.get_elided_page_range(number=page_number)
+    page_obj = CursorPaginator(roll_logbook, 10, logbook_ordering).get_page(request.GET)
+    pagination_querystring = page_obj.querystring
 
     # Archived project cameras table
     cameras_table = {}
@@ -1222,6 +1080,75 @@ def project_detail(request, pk):
             ],
         }
 
+    if request.htmx:
+        # Only the cameras section and the logbook get swapped in, so skip
+        # everything else.
+        response = render(
+            request,
+            "partials/project-camera-logbook-wrapper.html",
+            {
+                "project": project,
+                "cameras": cameras,
+                "roll_logbook": roll_logbook,
+                "items": cameras,
+                "page_obj": page_obj,
+                "pagination_querystring": pagination_querystring,
+                "sectiontab_querystring": sectiontab_querystring,
+                "cameras_table": cameras_table,
+            },
+        )
+
+        querystring = f"?{sectiontab_querystring}"
+        if pagination_querystring:
+            querystring += f"&{pagination_querystring}"
+        response["HX-Push"] = (
+            reverse("project-detail", args=(project.id,)) + querystring
+        )
+
+        return response
+
+    # Get all of this user's cameras not already associated with this project.
+    cameras_to_add = (
+        Camera.objects.filter(owner=owner)
+        .exclude(pk__in=project.cameras.values_list("pk", flat=True))
+        .exclude(status="unavailable")
+        .order_by("status")
+    )
+
+    # Unused rolls already in this project
+    total_film_count = Film.objects.filter(
+        roll__owner=owner,
+        roll__project=project,
+        roll__status=status_number("storage"),
+    )
+    film_counts = total_film_count.annotate(count=Count("roll")).order_by(
+        "stock__type",
+        "-format",
+        "stock__manufacturer__name",
+        "name",
+    )
+
+    format_counts = {
+        "135": film_counts.filter(format="135"),
+        "120": film_counts.filter(format="120"),
+    }
+
+    # rolls available to be added to a project
+    film_available_count = (
+        Film.objects.filter(
+            roll__owner=owner,
+            roll__project=None,
+            roll__status=status_number("storage"),
+        )
+        .annotate(count=Count("roll"))
+        .order_by(
+            "stock__type",
+            "stock__manufacturer__name",
+            "format",
+        )
+        .exclude(stock=None)
+    )
+
     film_form = ProjectFilmForm(film_counts=film_available_count)
     camera_form = ProjectCameraForm(cameras=cameras_to_add)
 
@@ -1247,30 +1174,7 @@ def project_detail(request, pk):
         "cameras_table": cameras_table,
     }
 
-    if request.htmx:
-        response = render(
-            request,
-            "partials/project-camera-logbook-wrapper.html",
-            {
-                "project": project,
-                "cameras": cameras,
-                "roll_logbook": roll_logbook,
-                "items": cameras,
-                "page_obj": page_obj,
-                "page_range": page_range,
-                "pagination_querystring": pagination_querystring,
-                "sectiontab_querystring": sectiontab_querystring,
-            },
-        )
-
-        querystring = f"?{sectiontab_querystring}&{pagination_querystring}"
-        response["HX-Push"] = (
-            reverse("project-detail", args=(project.id,)) + querystring
-        )
-
-        return response
-    else:
-        return render(request, "inventory/project_detail.html", context)
+    return render(request, "inventory/project_detail.html", context)
 
 
 @require_POST
@@ -1375,14 +1279,15 @@ def rolls_add(request):
             notes = form.cleaned_data["notes"]
             quantity = form.cleaned_data["quantity"]
 
-            roll = Roll.objects.create(owner=request.user, film=film, notes=notes)
-
-            # The first roll has already been created, this creates the rest.
-            for x in range(1, quantity):
-                # https://docs.djangoproject.com/en/3.2/topics/db/queries/#copying-model-instances
-                roll.pk = None
-                roll._state.adding = True
-                roll.save()
+            # New rolls go straight into storage, so there's nothing for
+            # Roll.save() to do that bulk_create doesn't.
+            Roll.objects.bulk_create(
+                [
+                    Roll(owner=request.user, film=film, notes=notes)
+                    for x in range(quantity)
+                ],
+                batch_size=500,
+            )
 
             roll_plural = pluralize("roll", quantity)
             messages.success(
@@ -1390,7 +1295,7 @@ def rolls_add(request):
                 f"Added {quantity} {roll_plural} of {film}!",
             )
         else:
-            messages.error(request, "Enter a valid quantity of 1 or more")
+            messages.error(request, "Enter a valid quantity from 1 to 100")
 
         return redirect(reverse("inventory"))
     else:
@@ -1967,24 +1872,20 @@ def roll_frame_add(request, roll_pk):
             elif form.cleaned_data["shutter_speed_preset"] != "":
                 frame.shutter_speed = form.cleaned_data["shutter_speed_preset"]
 
+            # Potentially save multiple frames at once.
+            ending_number = form.cleaned_data["ending_number"]
+            numbers = range(frame.number, max(ending_number or 0, frame.number) + 1)
+            frames = []
+            for number in numbers:
+                frames.append(copy.copy(frame))
+                frames[-1].number = number
+
             try:
                 with transaction.atomic():
-                    frame.save()
-
-                # Potentially save multiple frames at once.
-                ending_number = form.cleaned_data["ending_number"]
-                if ending_number and ending_number > frame.number:
-                    starting_number = frame.number
-                    additional_frames = ending_number - starting_number
+                    Frame.objects.bulk_create(frames, batch_size=500)
 
-                    for x in range(1, additional_frames + 1):
-                        # https://docs.djangoproject.com/en/3.2/topics/db/queries/#copying-model-instances
-                        frame.pk = None
-                        frame.number = starting_number + x
-                        frame._state.adding = True
-                        frame.save()
-
-                    messages.success(request, f"{additional_frames + 1} frames saved!")
+                if len(frames) > 1:
+                    messages.success(request, f"{len(frames)} frames saved!")
                 else:
                     messages.success(request, "Frame saved!")
 
@@ -1995,8 +1896,20 @@ def roll_frame_add(request, roll_pk):
                 else:
                     return redirect(reverse("roll-detail", args=(roll.id,)))
             except IntegrityError:
-                messages.error(request, f"This roll already has frame #{frame.number}.")
+                # None of the frames were saved; say which one got in the way.
+                taken = (
+                    Frame.objects.filter(roll=roll, number__in=numbers)
+                    .order_by("number")
+                    .values_list("number", flat=True)
+                    .first()
+                )
+                if taken is None:
+                    taken = frame.number
+                messages.error(request, f"This roll already has frame #{taken}.")
                 return redirect(reverse("roll-frame-add", args=(frame.roll.id,)))
+        else:
+            messages.error(request, "Something is not right.")
+            return redirect(reverse("roll-frame-add", args=(roll.id,)))
     else:
         try:
             previous_frame = (
@@ -2315,9 +2228,9 @@ def camera_or_back_detail(request, pk, back_pk=None):
     camera = get_object_or_404(Camera, id=pk, owner=request.user)
     b = request.GET.get("b") if request.GET.get("b") else 0
     pagination_querystring = ""
-    page = request.GET.get("page")
-    if page:
-        pagination_querystring += f"&page={page}"
+    for param in (CursorPaginator.cursor_param, CursorPaginator.page_param):
+        if request.GET.get(param):
+            pagination_querystring += f"&{param}={request.GET[param]}"
 
     if back_pk:
         camera_back = get_object_or_404(
@@ -2354,7 +2267,66 @@ def camera_or_back_detail(request, pk, back_pk=None):
         else:
             return redirect(reverse("roll-detail", args=(roll.id,)))
     else:
-        roll = ""
+        camera_backs = None
+        if camera.multiple_backs:
+            all_camera_backs = CameraBack.objects.filter(
+                camera__owner=request.user,
+                camera=camera,
+            )
+            backs_counts = all_camera_backs.aggregate(
+                loaded=Count("pk", filter=Q(status="loaded")),
+                empty=Count("pk", filter=Q(status="empty")),
+                unavailable=Count("pk", filter=Q(status="unavailable")),
+            )
+            loaded_rolls = Roll.objects.filter(
+                owner=request.user,
+                camera=camera,
+                status=status_number("loaded"),
+            )
+
+            camera_backs = SectionTabs(
+                "Backs",
+                "#camera_backs_section",
+                0,
+                [
+                    {
+                        "name": "Loaded",
+                        "count": backs_counts["loaded"],
+                        "rows": loaded_rolls,
+                        "action": "roll",
+                    },
+                    {
+                        "name": "Ready to Load",
+                        "count": backs_counts["empty"],
+                        "rows": all_camera_backs.filter(status="empty"),
+                        "action": "load",
+                    },
+                    {
+                        "name": "Unavailable",
+                        "count": backs_counts["unavailable"],
+                        "rows": all_camera_backs.filter(status="unavailable"),
+                    },
+                ],
+                reverse("camera-back-add", args=(camera.id,)),
+            )
+            camera_backs.set_tab(b)
+
+        if request.htmx and request.htmx.trigger.startswith("section"):
+            # Camera backs
+            response = render(
+                request,
+                "components/section.html",
+                {
+                    "items": camera_backs,
+                    "pagination_querystring": pagination_querystring,
+                },
+            )
+            response["HX-Push"] = (
+                reverse("camera-detail", args=(camera.id,))
+                + f"?b={b}{pagination_querystring}"
+            )
+            return response
+
         if camera_back:
             rolls_history = (
                 Roll.objects.filter(
@@ -2375,6 +2347,21 @@ def camera_or_back_detail(request, pk, back_pk=None):
                 .order_by("-started_on")
             )
 
+        page_obj = CursorPaginator(rolls_history, 10, ["-started_on"]).get_page(
+            request.GET
+        )
+
+        if request.htmx:
+            return render(
+                request,
+                "components/logbook-table.html",
+                {
+                    "page_obj": page_obj,
+                    "pagination_querystring": f"&b={b}",
+                },
+            )
+
+        roll = ""
         if camera_back:
             if camera_back.status == "loaded":
                 roll = Roll.objects.filter(
@@ -2386,12 +2373,6 @@ def camera_or_back_detail(request, pk, back_pk=None):
                     camera=camera, status=status_number("loaded")
                 )[0]
 
-        # Pagination
-        paginator = Paginator(rolls_history, 10)
-        page_number = request.GET.get("page") if request.GET.get("page") else 1
-        page_obj = paginator.get_page(page_number)
-        page_range = paginator.get_elided_page_range(number=page_number)
-
         context = {
             "owner": request.user,
             "camera": camera,
@@ -2405,77 +2386,13 @@ def camera_or_back_detail(request, pk, back_pk=None):
             "b": b,
         }
 
-        if camera.multiple_backs:
-            all_camera_backs = CameraBack.objects.filter(
-                camera__owner=request.user,
-                camera=camera,
-            )
-            loaded_rolls = Roll.objects.filter(
-                owner=request.user,
-                camera=camera,
-                status=status_number("loaded"),
-            )
-
-            camera_backs = SectionTabs(
-                "Backs",
-                "#camera_backs_section",
-                0,
-                [
-                    {
-                        "name": "Loaded",
-                        "count": all_camera_backs.filter(status="loaded").count(),
-                        "rows": loaded_rolls,
-                        "action": "roll",
-                    },
-                    {
-                        "name": "Ready to Load",
-                        "count": all_camera_backs.filter(status="empty").count(),
-                        "rows": all_camera_backs.filter(status="empty"),
-                        "action": "load",
-                    },
-                    {
-                        "name": "Unavailable",
-                        "count": all_camera_backs.filter(status="unavailable").count(),
-                        "rows": all_camera_backs.filter(status="unavailable"),
-                    },
-                ],
-                reverse("camera-back-add", args=(camera.id,)),
-            )
-            camera_backs.set_tab(b)
+        if camera_backs:
             context["camera_backs"] = camera_backs
 
-        if request.htmx:
-            if request.htmx.trigger.startswith("section"):
-                # Camera backs
-                response = render(
-                    request,
-                    "components/section.html",
-                    {
-                        "items": camera_backs,
-                        "pagination_querystring": pagination_querystring,
-                    },
-                )
-                response["HX-Push"] = (
-                    reverse("camera-detail", args=(camera.id,))
-                    + f"?b={b}{pagination_querystring}"
-                )
-                return response
-            else:
-                return render(
-                    request,
-                    "components/logbook-table.html",
-                    {
-                        "page_obj": page_obj,
-                        "page_range": page_range,
-                        "pagination_querystring": f"&b={b}",
-                    },
-                )
-
+        if camera_back:
+            return render(request, "inventory/camera_back_detail.html", context)
         else:
-            if camera_back:
-                return render(request, "inventory/camera_back_detail.html", context)
-            else:
-                return render(request, "inventory/camera_detail.html", context)
+            return render(request, "inventory/camera_detail.html", context)
 
 
 @login_required
@@ -2690,6 +2607,7 @@ def session_sidebar_status(request):
     return HttpResponse(status)
 
 
+@primary_only
 @login_required
 def session_sidebar(request):
     if not request.htmx:
@@ -2708,562 +2626,211 @@ def session_sidebar(request):
 # EXPORT / IMPORT
 # ------
 @method_decorator(login_required, name="dispatch")
-class ExportRollsView(WriteCSVMixin, View):
-    def get(self, request, *args, **kwargs):
-        export = self.write_csv("rolls.csv")
-        rolls = Roll.objects.filter(owner=request.user)
-
-        export["writer"].writerow(
-            [
-                "id",
-                "code",
-                "status",
-                "film",
-                "film_id",
-                "push_pull",
-                "camera",
-                "camera_id",
-                "camera_back",
-                "camera_back_id",
-                "lens",
-                "project",
-                "project_id",
-                "location",
-                "notes",
-                "lab",
-                "scanner",
-                "notes_on_development",
-                "created",
-                "updated",
-                "started",
-                "ended",
-            ]
-        )
-
-        for roll in rolls:
-            try:
-                camera_id = roll.camera.id
-            except AttributeError:
-                camera_id = ""
-            try:
-                camera_back_id = roll.camera_back.id
-            except AttributeError:
-                camera_back_id = ""
-            try:
-                project_id = roll.project.id
-            except AttributeError:
-                project_id = ""
-
-            export["writer"].writerow(
-                [
-                    roll.id,
-                    roll.code,
-                    roll.status,
-                    roll.film,
-                    roll.film.id,
-                    roll.push_pull,
-                    roll.camera,
-                    camera_id,
-                    roll.camera_back,
-                    camera_back_id,
-                    roll.lens,
-                    roll.project,
-                    project_id,
-                    roll.location,
-                    roll.notes,
-                    roll.lab,
-                    roll.scanner,
-                    roll.notes_on_development,
-                    roll.created_at,
-                    roll.updated_at,
-                    roll.started_on,
-                    roll.ended_on,
-                ]
-            )
-
-        return export["response"]
-
-
-@method_decorator(login_required, name="dispatch")
-class ImportRollsView(ReadCSVMixin, RedirectAfterImportMixin, View):
-    def post(self, request, *args, **kwargs):
-        reader = self.read_csv(request)
-
-        if not reader:
-            return redirect(reverse("settings"))
-
-        count = 0
-
-        for row in reader:
-            obj, created = Roll.objects.get_or_create(
-                owner=request.user,
-                id=row["id"],
-                film=get_object_or_404(Film, id=row["film_id"]),
-            )
-
-            if created:
-                count += 1
-
-                # Add optional foreign keys
-                if row["camera_id"]:
-                    obj.camera = get_object_or_404(
-                        Camera, id=row["camera_id"], owner=request.user
-                    )
-                if row["camera_back_id"]:
-                    obj.camera_back = get_object_or_404(
-                        CameraBack, id=row["camera_back_id"], camera__owner=request.user
-                    )
-                if row["project_id"]:
-                    obj.project = get_object_or_404(
-                        Project, id=row["project_id"], owner=request.user
-                    )
+class ExportView(WriteCSVMixin, View):
+    """
+    Download a CSV right away, or have a big one made by a background job.
 
-                # Add optional dates
-                if row["started"]:
-                    obj.started_on = datetime.datetime.strptime(
-                        row["started"], "%Y-%m-%d"
-                    ).date()
-                if row["ended"]:
-                    obj.ended_on = datetime.datetime.strptime(
-                        row["ended"], "%Y-%m-%d"
-                    ).date()
-
-                # Set status after potentially setting the camera, started, and
-                # ended so things are happy with the Roll model’s automatic `save`
-                # fanciness.
-                obj.status = row["status"]
-
-                obj.save()
-
-                Roll.objects.filter(id=row["id"], owner=request.user).update(
-                    code=row["code"],
-                    push_pull=row["push_pull"],
-                    location=row["location"],
-                    lens=row["lens"],
-                    notes=row["notes"],
-                    lab=row["lab"],
-                    scanner=row["scanner"],
-                    notes_on_development=row["notes_on_development"],
-                    # Keep the original created and updated dates and times.
-                    created_at=row["created"],
-                    updated_at=row["updated"],
-                )
+    Downloads have an X-Since header. Passing it back as `?since=` gets only
+    what's changed since, and what's been deleted.
+    """
 
-        item = {
-            "noun": "roll",
-        }
+    export = None
 
-        return self.redirect(request, count, item)
+    def get(self, request, *args, **kwargs):
+        since = None
+        if "since" in request.GET:
+            try:
+                since = parse_since(request.GET["since"])
+            except signing.BadSignature:
+                return HttpResponseBadRequest("That isn’t a `since` from an export.")
+            if since < timezone.now() - tombstones_kept:
+                return HttpResponseGone("That’s too long ago to go back to.")
 
+        export = self.export(request.user, since=since)
+        response = self.write_csv(export.filename, export.header, export.rows())
+        response["X-Since"] = export.next_since
 
-@method_decorator(login_required, name="dispatch")
-class ExportCamerasView(WriteCSVMixin, View):
-    def get(self, request, *args, **kwargs):
-        export = self.write_csv("cameras.csv")
-        cameras = Camera.objects.filter(owner=request.user)
+        return response
 
-        export["writer"].writerow(
-            [
-                "id",
-                "format",
-                "name",
-                "notes",
-                "status",
-                "multiple_backs",
-                "created",
-                "updated",
-            ]
+    def post(self, request, *args, **kwargs):
+        queue_export(request.user, self.export.name)
+        messages.info(
+            request, "Your export has started. It’ll be ready to download below."
         )
+        return redirect(reverse("settings") + "#jobs")
 
-        for camera in cameras:
-            export["writer"].writerow(
-                [
-                    camera.id,
-                    camera.format,
-                    camera.name,
-                    camera.notes,
-                    camera.status,
-                    camera.multiple_backs,
-                    camera.created_at,
-                    camera.updated_at,
-                ]
-            )
 
-        return export["response"]
+@method_decorator(login_required, name="dispatch")
+class ImportView(ReadCSVMixin, RedirectAfterImportMixin, View):
+    "Import a CSV right away, or leave a big one to a background job."
 
+    importer = None
 
-@method_decorator(login_required, name="dispatch")
-class ImportCamerasView(ReadCSVMixin, RedirectAfterImportMixin, View):
     def post(self, request, *args, **kwargs):
-        reader = self.read_csv(request)
+        csv_file = self.upload_csv(request)
 
-        if not reader:
+        if not csv_file:
             return redirect(reverse("settings"))
 
-        count = 0
-
-        for row in reader:
-            obj, created = Camera.objects.get_or_create(
-                owner=request.user,
-                id=row["id"],
-                format=row["format"],
-                name=row["name"],
+        if csv_file.size > background_import_size:
+            queue_import(request.user, self.importer.name, csv_file)
+            messages.info(
+                request,
+                f"Your {self.importer.noun}s are being imported. "
+                "You can see how it’s going below.",
             )
+            return redirect(reverse("settings") + "#jobs")
 
-            if created:
-                count += 1
+        report = self.importer(request.user).run(self.read_csv(csv_file))
 
-                Camera.objects.filter(id=row["id"], owner=request.user).update(
-                    notes=row["notes"],
-                    status=row["status"],
-                    multiple_backs=row["multiple_backs"],
-                    # Keep the original created and updated dates and times.
-                    created_at=row["created"],
-                    updated_at=row["updated"],
-                )
+        return self.redirect(request, report)
 
-        item = {
-            "noun": "camera",
-        }
 
-        return self.redirect(request, count, item)
+class ExportRollsView(ExportView):
+    export = RollExport
 
 
-@method_decorator(login_required, name="dispatch")
-class ExportCameraBacksView(WriteCSVMixin, View):
-    def get(self, request, *args, **kwargs):
-        export = self.write_csv("camera-backs.csv")
-        camera_backs = CameraBack.objects.filter(camera__owner=request.user)
-
-        export["writer"].writerow(
-            [
-                "id",
-                "camera",
-                "camera_id",
-                "name",
-                "notes",
-                "status",
-                "format",
-                "created",
-                "updated",
-            ]
-        )
+class ImportRollsView(ImportView):
+    importer = RollImport
 
-        for back in camera_backs:
-            export["writer"].writerow(
-                [
-                    back.id,
-                    back.camera,
-                    back.camera.id,
-                    back.name,
-                    back.notes,
-                    back.status,
-                    back.format,
-                    back.created_at,
-                    back.updated_at,
-                ]
-            )
 
-        return export["response"]
+class ExportCamerasView(ExportView):
+    export = CameraExport
 
 
-@method_decorator(login_required, name="dispatch")
-class ImportCameraBacksView(ReadCSVMixin, RedirectAfterImportMixin, View):
-    def post(self, request, *args, **kwargs):
-        reader = self.read_csv(request)
-
-        if not reader:
-            return redirect(reverse("settings"))
-
-        count = 0
-
-        for row in reader:
-            obj, created = CameraBack.objects.get_or_create(
-                id=row["id"],
-                camera=get_object_or_404(
-                    Camera, id=row["camera_id"], owner=request.user
-                ),
-                name=row["name"],
-                format=row["format"],
-            )
+class ImportCamerasView(ImportView):
+    importer = CameraImport
 
-            if created:
-                count += 1
-
-                CameraBack.objects.filter(
-                    id=row["id"], camera__owner=request.user
-                ).update(
-                    notes=row["notes"],
-                    status=row["status"],
-                    # Keep the original created and updated dates and times.
-                    created_at=row["created"],
-                    updated_at=row["updated"],
-                )
-
-        item = {
-            "noun": "camera back",
-        }
-
-        return self.redirect(request, count, item)
 
+class ExportCameraBacksView(ExportView):
+    export = CameraBackExport
 
-@method_decorator(login_required, name="dispatch")
-class ExportProjectsView(WriteCSVMixin, View):
-    def get(self, request, *args, **kwargs):
-        export = self.write_csv("projects.csv")
-        projects = Project.objects.filter(owner=request.user)
-
-        export["writer"].writerow(
-            [
-                "id",
-                "name",
-                "notes",
-                "status",
-                "camera_ids",
-                "cameras",
-                "roll_ids",
-                "rolls",
-                "created",
-                "updated",
-            ]
-        )
 
-        for project in projects:
-            roll_objects = Roll.objects.filter(project=project, owner=request.user)
-            roll_ids = []
-            rolls = []
-            for roll in roll_objects:
-                roll_ids.append(roll.id)
-                roll_code = f"{roll.code} / " if roll.code else ""
-                roll_name = (
-                    f"{roll_code}{roll.film.__str__()} / {roll.get_status_display()}"
-                )
-                rolls.append(roll_name)
-            camera_objects = Camera.objects.filter(project=project)
-            camera_ids = []
-            cameras = []
-            for camera in camera_objects:
-                camera_ids.append(camera.id)
-                cameras.append(camera.__str__())
-
-            export["writer"].writerow(
-                [
-                    project.id,
-                    project.name,
-                    project.notes,
-                    project.status,
-                    camera_ids,
-                    cameras,
-                    roll_ids,
-                    rolls,
-                    project.created_at,
-                    project.updated_at,
-                ]
-            )
+class ImportCameraBacksView(ImportView):
+    importer = CameraBackImport
 
-        return export["response"]
 
+class ExportProjectsView(ExportView):
+    export = ProjectExport
 
-@method_decorator(login_required, name="dispatch")
-class ImportProjectsView(ReadCSVMixin, RedirectAfterImportMixin, View):
-    def post(self, request, *args, **kwargs):
-        reader = self.read_csv(request)
 
-        if not reader:
-            return redirect(reverse("settings"))
+class ImportProjectsView(ImportView):
+    importer = ProjectImport
 
-        count = 0
 
-        for row in reader:
-            roll_ids = json.loads(row["roll_ids"])
-            camera_ids = json.loads(row["camera_ids"])
+class ExportJournalsView(ExportView):
+    export = JournalExport
 
-            obj, created = Project.objects.get_or_create(
-                owner=request.user,
-                id=row["id"],
-                name=row["name"],
-            )
 
-            if created:
-                count += 1
+class ImportJournalsView(ImportView):
+    importer = JournalImport
 
-                if roll_ids:
-                    for id in roll_ids:
-                        roll = get_object_or_404(Roll, id=id, owner=request.user)
-                        roll.project = obj
-                        roll.save()
 
-                if camera_ids:
-                    for id in camera_ids:
-                        obj.cameras.add(
-                            get_object_or_404(Camera, id=id, owner=request.user)
-                        )
+class ExportFramesView(ExportView):
+    export = FrameExport
 
-                    obj.save()
 
-                Project.objects.filter(id=row["id"], owner=request.user).update(
-                    notes=row["notes"],
-                    status=row["status"],
-                    # Keep the original created and updated dates and times.
-                    created_at=row["created"],
-                    updated_at=row["updated"],
-                )
+class ImportFramesView(ImportView):
+    importer = FrameImport
 
-        item = {
-            "noun": "project",
-        }
 
-        return self.redirect(request, count, item)
+# How many of someone's latest imports and exports the settings page lists.
+jobs_shown = 5
 
 
 @method_decorator(login_required, name="dispatch")
-class ExportJournalsView(WriteCSVMixin, View):
+class ExportAccountView(View):
+    "Download everything in one archive, or have it made by a background job."
+
     def get(self, request, *args, **kwargs):
-        export = self.write_csv("journals.csv")
-        journals = Journal.objects.filter(roll__owner=request.user)
-
-        export["writer"].writerow(
-            [
-                "id",
-                "roll_id",
-                "roll",
-                "date",
-                "notes",
-                "frame",
-                "created",
-                "updated",
-            ]
+        filename = f"cassette-nest-{request.user.username}-{timezone.localdate()}.zip"
+        return FileResponse(
+            archive.archive_file(request.user),
+            as_attachment=True,
+            filename=filename,
+            content_type="application/zip",
         )
 
-        for journal in journals:
-            export["writer"].writerow(
-                [
-                    journal.id,
-                    journal.roll.id,
-                    journal.roll,
-                    journal.date,
-                    journal.notes,
-                    journal.frame,
-                    journal.created_at,
-                    journal.updated_at,
-                ]
-            )
-
-        return export["response"]
-
-
-@method_decorator(login_required, name="dispatch")
-class ImportJournalsView(ReadCSVMixin, RedirectAfterImportMixin, View):
     def post(self, request, *args, **kwargs):
-        reader = self.read_csv(request)
-
-        if not reader:
-            return redirect(reverse("settings"))
-
-        count = 0
-
-        for row in reader:
-            obj, created = Journal.objects.get_or_create(
-                id=row["id"],
-                roll=get_object_or_404(Roll, id=row["roll_id"], owner=request.user),
-                frame=row["frame"],
-            )
-
-            if created:
-                count += 1
-
-                Journal.objects.filter(id=row["id"], roll__owner=request.user).update(
-                    date=datetime.datetime.strptime(row["date"], "%Y-%m-%d").date(),
-                    notes=row["notes"],
-                    # Keep the original created and updated dates and times.
-                    created_at=row["created"],
-                    updated_at=row["updated"],
-                )
-
-        item = {
-            "noun": "journal",
-        }
-
-        return self.redirect(request, count, item)
+        queue_export(request.user, "account")
+        messages.info(
+            request, "Your export has started. It’ll be ready to download below."
+        )
+        return redirect(reverse("settings") + "#jobs")
 
 
 @method_decorator(login_required, name="dispatch")
-class ExportFramesView(WriteCSVMixin, View):
-    def get(self, request, *args, **kwargs):
-        export = self.write_csv("frames.csv")
-        frames = Frame.objects.filter(roll__owner=request.user)
-
-        export["writer"].writerow(
-            [
-                "id",
-                "roll_id",
-                "roll",
-                "number",
-                "date",
-                "notes",
-                "aperture",
-                "shutter_speed",
-                "created",
-                "updated",
-            ]
-        )
+class RestoreAccountView(View):
+    "Restore an archive from `ExportAccountView`, always in a background job."
 
-        for frame in frames:
-            export["writer"].writerow(
-                [
-                    frame.id,
-                    frame.roll.id,
-                    frame.roll,
-                    frame.number,
-                    frame.date,
-                    frame.notes,
-                    frame.aperture,
-                    frame.shutter_speed,
-                    frame.created_at,
-                    frame.updated_at,
-                ]
+    def post(self, request, *args, **kwargs):
+        form = UploadArchiveForm(request.POST, request.FILES)
+
+        if not form.is_valid():
+            messages.error(request, "Nope.")
+        elif not request.FILES["archive"].name.endswith(".zip"):
+            messages.error(request, "Please choose a ZIP file.")
+        elif archive.owns_anything(request.user):
+            messages.error(
+                request,
+                "Archives can only be restored to accounts that don’t have "
+                "anything in them yet.",
             )
-
-        return export["response"]
+        else:
+            queue_import(request.user, "account", request.FILES["archive"])
+            messages.info(
+                request,
+                "Your account is being restored. You can see how it’s going below.",
+            )
+            return redirect(reverse("settings") + "#jobs")
+
+        return redirect(reverse("settings"))
+
+
+def jobs_context(request):
+    jobs = list(Job.objects.filter(owner=request.user)[:jobs_shown])
+    for job in jobs:
+        job.summary = job.problems = None
+        if "counts" in job.report:
+            job.summary = archive.summary(job.report["counts"])
+        elif job.report:
+            report = ImportReport(**job.report)
+            job.summary = report.summary
+            if report.errors:
+                job.problems = report.error_summary
+
+    return {
+        "jobs": jobs,
+        # Keep asking for the list again until nothing's left to happen.
+        "jobs_polling": any(not job.finished for job in jobs),
+    }
 
 
-@method_decorator(login_required, name="dispatch")
-class ImportFramesView(ReadCSVMixin, RedirectAfterImportMixin, View):
-    def post(self, request, *args, **kwargs):
-        reader = self.read_csv(request)
+@login_required
+def jobs(request):
+    "The settings page's list of imports and exports, for polling."
 
-        if not reader:
-            return redirect(reverse("settings"))
+    if not request.htmx:
+        return redirect(reverse("settings") + "#jobs")
 
-        count = 0
+    return render(request, "inventory/_jobs.html", jobs_context(request))
 
-        for row in reader:
-            obj, created = Frame.objects.get_or_create(
-                id=row["id"],
-                roll=get_object_or_404(Roll, id=row["roll_id"], owner=request.user),
-                number=row["number"],
-            )
 
-            if created:
-                count += 1
-
-                Frame.objects.filter(id=row["id"], roll__owner=request.user).update(
-                    date=datetime.datetime.strptime(row["date"], "%Y-%m-%d").date(),
-                    notes=row["notes"],
-                    aperture=row["aperture"],
-                    shutter_speed=row["shutter_speed"],
-                    # Keep the original created and updated dates and times.
-                    created_at=row["created"],
-                    updated_at=row["updated"],
-                )
+@login_required
+def job_download(request, pk):
+    job = get_object_or_404(
+        Job, pk=pk, owner=request.user, action="export", status="done"
+    )
 
-        item = {
-            "noun": "frame",
-        }
+    try:
+        file = open(job.path, "rb")
+    except FileNotFoundError:
+        raise Http404
 
-        return self.redirect(request, count, item)
+    return FileResponse(file, as_attachment=True, filename=job.path.name)
 
 
+@primary_only
 def account_verified(request, user_id):
     user = get_object_or_404(User, id=user_id)
 
@@ -3275,7 +2842,7 @@ def account_verified(request, user_id):
         ),
     )
 
-    login(request, user)
+    login(request, user, backend=settings.AUTHENTICATION_BACKENDS[0])
     messages.success(request, "Your account has been activated! Enjoy!")
     return redirect("index")
 